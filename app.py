@@ -7,39 +7,216 @@
 # - Wider phone, light UI, button fit, league logos, safe guards
 # - Sport background images auto-filled (no empty blocks)
 
+from __future__ import annotations
+
 import streamlit as st
 import streamlit.components.v1 as components
-from datetime import datetime, timedelta
-import pandas as pd
+from datetime import datetime
 import uuid
-import base64
 import os
+import time
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from gamekey.assets import AssetCache
+from gamekey.clock import Clock, FixedClock
+from gamekey.entitlements import Entitlements
+from gamekey.ledger import DEFAULT_DB, CartItem, Ledger
+from gamekey.profiler import Profiler, RunProfile, deep_sizeof
+from gamekey.render import HERO, CardRenderer, chrome, minify_css, topbar
+from gamekey.session import GAME_REFS, Cart, Playback, SessionRegistry
+from gamekey.startup import STARTUP, WARM_THREAD, Warmer
+
+log = logging.getLogger("gamekey.app")
+# The catalog / search / pricing modules (numpy) are imported after the first paint (see Startup).
+
+STARTUP.mark("script")
 
 st.set_page_config(page_title="GameKey", page_icon="🔑", layout="wide")
 
+# ----------------------------
+# Rerun profiler (gamekey/profiler.py): time per phase, markdown bytes, widget count per run.
+# On by default (GAMEKEY_PROFILE=0 turns it off). GAMEKEY_PROFILE_EXPORT=path.prom|path.json
+# dumps p50/p90/p99 + phase totals every GAMEKEY_PROFILE_INTERVAL seconds (default 15);
+# ?dev=1 (or GAMEKEY_DEV=1) shows the dev panel.
+# ----------------------------
+PROFILING = os.environ.get("GAMEKEY_PROFILE", "1") != "0"
+_current = threading.local()  # the RunProfile of the script run on this thread
+
+@st.cache_resource
+def profiler() -> Profiler:
+    return Profiler(export_path=os.environ.get("GAMEKEY_PROFILE_EXPORT") or None,
+                    export_interval=float(os.environ.get("GAMEKEY_PROFILE_INTERVAL", "15")),
+                    sessions=session_registry(), startup=STARTUP)
+
+def widget_count():
+    ctx = get_script_run_ctx()
+    ids = getattr(getattr(ctx, "shared", None), "widget_ids_this_run", None) or getattr(ctx, "widget_ids_this_run", None)
+    if hasattr(ids, "snapshot"):
+        ids = ids.snapshot()
+    return len(ids) if ids is not None else None
+
+def begin_run(kind: str):
+    if not PROFILING:
+        return
+    # A run that ended in st.rerun() never reached end_run(); close it at its last activity.
+    prev = st.session_state.get("_run_profile")
+    if prev is not None and prev.seconds is None:
+        prev.finish(status="rerun", at=prev.touched)
+        profiler().record(prev)
+    _current.run = st.session_state["_run_profile"] = RunProfile(kind)
+
+def end_run(status: str = "ok"):
+    run = getattr(_current, "run", None)
+    if run is not None:
+        run.finish(widgets=widget_count(), status=status)
+        profiler().record(run)
+        _current.run = None
+        st.session_state["_run_profile"] = None
+
+@contextmanager
+def phase(name: str):
+    run = getattr(_current, "run", None)
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        if run is not None:
+            run.add(name, time.perf_counter() - t)
+
+def timed(name: str):
+    def wrap(fn):
+        if not PROFILING:
+            return fn
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            run = getattr(_current, "run", None)
+            if run is None:
+                return fn(*args, **kwargs)
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                run.add(name, time.perf_counter() - t)
+        return inner
+    return wrap
+
+def region(name: str):
+    # Page region body (wrapped by st.fragment). A fragment-only rerun never runs the top of
+    # the script, so the region marks the session active and opens its own RunProfile.
+    def wrap(fn):
+        body = timed(name)(fn)
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            if not ctx.fragment_ids_this_run:
+                return body(*args, **kwargs)
+            session_registry().touch(ctx.session_id)
+            if not PROFILING:
+                return fn(*args, **kwargs)
+            begin_run(f"fragment:{name}")
+            try:
+                result = body(*args, **kwargs)
+            except BaseException:
+                end_run(status="rerun")
+                raise
+            end_run()
+            return result
+        return inner
+    return wrap
+
+# ----------------------------
+# Session accounting (gamekey/session.py): approximate st.session_state bytes per session.
+# Sessions without a run for GAMEKEY_SESSION_IDLE seconds (default 1800) are shed down to who
+# the user is; the next run rebuilds the rest (Library from the ledger, widgets from the browser).
+# ----------------------------
+SESSION_KEEP = ("user_id", "display_name")
+
+@st.cache_resource
+def session_registry() -> SessionRegistry:
+    idle = float(os.environ.get("GAMEKEY_SESSION_IDLE", "1800"))
+    return SessionRegistry(idle_seconds=idle, sweep_interval=min(60.0, idle / 2))
+
+def shed_session(session_id: str):
+    # Runs on the server's event loop, in line with incoming reruns (there is none under AppTest).
+    # Streamlit has no public API for another session's state, so this uses runtime internals
+    # (checked against the streamlit range in requirements.txt). If they change, the lookups
+    # below raise and SessionRegistry.evict switches shedding off with one logged warning.
+    if not Runtime.exists():
+        return
+    runtime = Runtime.instance()
+    session_mgr = runtime._session_mgr
+    loop = runtime._get_async_objs().eventloop
+
+    def shed():
+        # The session may have started a run since the sweep picked it: leave it alone then.
+        if session_registry().active(session_id):
+            return
+        try:
+            info = session_mgr.get_session_info(session_id)
+            if info is None:
+                return
+            state = info.session.session_state
+            keep = {key: state[key] for key in SESSION_KEEP if key in state}
+            state.clear()
+            for key, value in keep.items():
+                state[key] = value
+        except Exception:
+            log.warning("Could not shed idle session %s", session_id, exc_info=True)
+
+    loop.call_soon_threadsafe(shed)
+
+def track_session():
+    # End of a full run: re-measure this session (touched when the run started), then sweep idle ones.
+    registry = session_registry()
+    registry.touch(get_script_run_ctx().session_id, st.session_state.get("user_id"),
+                   deep_sizeof(st.session_state.to_dict()))
+    registry.evict(shed_session)
+
+def markdown(body: str, **kwargs):
+    run = getattr(_current, "run", None)
+    if run is not None:
+        run.markdown(len(body.encode("utf-8")))
+    return st.markdown(body, **kwargs)
+
+begin_run("full")
+# Active from the start of the run, so another session's sweep can't shed it mid-run. Fragment
+# runs touch it too (region()); the size is measured at the end, in track_session().
+session_registry().touch(get_script_run_ctx().session_id, st.session_state.get("user_id"))
+
 # ----------------------------
 # Session state
 # ----------------------------
 if "user_id" not in st.session_state:
-    st.session_state.user_id = str(uuid.uuid4())[:8]
+    # Kept in the URL (?u=) so a reload finds the same wallet + purchases in the ledger.
+    st.session_state.user_id = st.query_params.get("u") or str(uuid.uuid4())[:8]
+    st.query_params["u"] = st.session_state.user_id
 if "display_name" not in st.session_state:
     st.session_state.display_name = "Guest"
-if "wallet" not in st.session_state:
-    st.session_state.wallet = 12.00
-if "purchases" not in st.session_state:
-    st.session_state.purchases = {}
 if "toast_msg" not in st.session_state:
     st.session_state.toast_msg = None
 if "active_game" not in st.session_state:
     st.session_state.active_game = None
 if "now_playing" not in st.session_state:
-    st.session_state.now_playing = None  # dict: {title, league, url}
+    st.session_state.now_playing = None  # Playback (gamekey/session.py)
 if "scroll_to" not in st.session_state:
     st.session_state.scroll_to = None  # "selected" or "player"
+if "cart" not in st.session_state:
+    st.session_state.cart = Cart()  # gamekey/session.py
 
 def toast(msg: str):
     st.session_state.toast_msg = msg
 
+def show_toast():
+    # Shown by whichever region runs next: the topbar on a full run, or the fragment itself.
+    if st.session_state.toast_msg:
+        st.success(st.session_state.toast_msg)
+        st.session_state.toast_msg = None
+
 # ----------------------------
 # Scroll helper (works on Streamlit Cloud)
 # ----------------------------
@@ -92,410 +269,532 @@ def to_embed_url(url: str) -> str:
         return f"https://www.youtube.com/embed/{vid}"
     return url
 
-def start_demo_playback(title: str, league: str):
-    raw = YOUTUBE_DEMOS.get(league)
-    st.session_state.now_playing = {
-        "title": title,
-        "league": league,
-        "url": raw,
-        "embed": to_embed_url(raw) if raw else None,
-    }
+def start_demo_playback(game_id: str, title: str, league: str):
+    # Only the game ref is kept in the session; the player resolves title + video at render.
+    st.session_state.now_playing = Playback(GAME_REFS.ref(game_id), GAME_REFS.code(title), GAME_REFS.code(league),
+                                            app_clock().time())
     request_scroll("player")
 
 # ----------------------------
 # CSS: Light UI + wider phone + button fit
 # ALL CSS MUST STAY INSIDE THIS STRING.
+# Minified once per process and shipped with the page chrome (see page_chrome()).
 # ----------------------------
-st.markdown(
-    """
-    <style>
-    #MainMenu, footer, header {visibility: hidden;}
-    .stApp { background: #f3f5f9; }
-
-    .block-container {
-      max-width: 620px !important;
-      padding-top: 1rem;
-      padding-bottom: 3rem;
-    }
-
-    .phone {
-      background: #ffffff;
-      border-radius: 30px;
-      border: 1px solid rgba(15,23,42,0.10);
-      box-shadow: 0 24px 70px rgba(15,23,42,0.12);
-      overflow: hidden;
-    }
-
-    .phone-inner { padding: 18px 16px 20px 16px; }
-
-    .notch {
-      height: 18px;
-      width: 150px;
-      margin: 0 auto;
-      border-radius: 0 0 16px 16px;
-      background: rgba(15,23,42,0.08);
-    }
-
-    .topbar {
-      display: flex;
-      justify-content: space-between;
-      align-items: center;
-      margin-top: 10px;
-    }
-
-    .brand { font-weight: 950; font-size: 18px; color: #0f172a; }
-    .subtle { font-size: 12px; color: #64748b; }
-    .wallet { text-align: right; font-weight: 950; color: #0f172a; }
-
-    .hero {
-      margin-top: 14px;
-      padding: 18px;
-      border-radius: 20px;
-      background: linear-gradient(135deg, rgba(229,9,20,0.10), rgba(15,23,42,0.04));
-      border: 1px solid rgba(15,23,42,0.08);
-    }
-
-    .hero-title { font-size: 26px; font-weight: 950; color: #0f172a; line-height: 1.05; }
-    .hero-sub { margin-top: 6px; font-size: 13px; color: #475569; }
-
-    .pill {
-      display: inline-block;
-      margin-top: 10px;
-      margin-right: 6px;
-      padding: 6px 10px;
-      border-radius: 999px;
-      background: rgba(15,23,42,0.06);
-      border: 1px solid rgba(15,23,42,0.08);
-      color: #0f172a;
-      font-size: 11px;
-      font-weight: 850;
-    }
-
-    .rowtitle {
-      margin: 18px 0 10px 0;
-      font-size: 14px;
-      font-weight: 950;
-      color: #0f172a;
-    }
-
-    .poster {
-      background: #ffffff;
-      border-radius: 18px;
-      border: 1px solid rgba(15,23,42,0.10);
-      box-shadow: 0 10px 30px rgba(15,23,42,0.06);
-      padding: 12px;
-    }
-
-    .poster-art {
-      height: 132px;
-      border-radius: 14px;
-      position: relative;
-      overflow: hidden;
-      border: 1px solid rgba(15,23,42,0.10);
-      background: #eef2ff;
-    }
-
-    .poster-bg {
-      position: absolute;
-      inset: 0;
-      width: 100%;
-      height: 100%;
-      object-fit: cover;
-      opacity: 1;
-    }
-
-    .poster-badge {
-      position: absolute;
-      top: 10px;
-      left: 10px;
-      background: rgba(255,255,255,0.92);
-      padding: 6px 10px;
-      border-radius: 999px;
-      color: #0f172a;
-      font-size: 11px;
-      font-weight: 900;
-      display: flex;
-      gap: 8px;
-      align-items: center;
-      border: 1px solid rgba(15,23,42,0.10);
-      box-shadow: 0 10px 24px rgba(15,23,42,0.08);
-    }
-
-    .logo {
-      width: 22px;
-      height: 22px;
-      border-radius: 6px;
-      object-fit: contain;
-      display: block;
-      background: transparent;
-    }
-
-    .poster-main { margin-top: 10px; font-size: 16px; font-weight: 950; color: #0f172a; }
-    .poster-meta { margin-top: 4px; font-size: 12px; color: #64748b; }
-
-    .price-chip {
-      display: inline-block;
-      margin-top: 8px;
-      padding: 6px 10px;
-      border-radius: 999px;
-      background: rgba(229,9,20,0.10);
-      border: 1px solid rgba(229,9,20,0.20);
-      color: #b91c1c;
-      font-size: 11px;
-      font-weight: 900;
-    }
-
-    .stButton > button {
-      width: 100%;
-      border-radius: 14px;
-      font-weight: 950;
-      border: none;
-      padding: 0.42rem 0.50rem !important;
-      font-size: 0.78rem !important;
-      white-space: nowrap !important;
-      overflow: hidden !important;
-      text-overflow: ellipsis !important;
-      line-height: 1 !important;
-      background: #e50914;
-      color: #ffffff;
-    }
-    .stButton > button:hover { background: #ff1f2d; }
-
-    .stTabs [data-baseweb="tab"] { font-size: 12px; color: #64748b; }
-    .stTabs [aria-selected="true"] { color: #0f172a; border-bottom: 2px solid #e50914; }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
-
-# ----------------------------
-# Logos: local assets + fallback badge
-# Put files in: assets/logos/UCL.png, NBA.png, NFL.png, etc.
-# ----------------------------
-LEAGUE_COLORS = {
-    "UCL": ("#0b5fff", "#ffffff"),
-    "NBA": ("#ff2a5b", "#ffffff"),
-    "NFL": ("#00a3ff", "#ffffff"),
-    "MLS": ("#ff7a00", "#ffffff"),
-    "NWSL": ("#8a5cff", "#ffffff"),
-    "MLB": ("#00d18f", "#0b0b0f"),
-}
-
-def file_to_data_uri(path: str) -> str:
-    ext = os.path.splitext(path)[1].lower().replace(".", "")
-    mime = "image/png"
-    if ext == "svg":
-        mime = "image/svg+xml"
-    elif ext in ("jpg", "jpeg"):
-        mime = "image/jpeg"
-    elif ext == "webp":
-        mime = "image/webp"
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
-
-def svg_badge(text: str, bg: str, fg: str) -> str:
-    svg = f"""
-    <svg xmlns="http://www.w3.org/2000/svg" width="22" height="22" viewBox="0 0 22 22">
-      <circle cx="11" cy="11" r="10" fill="{bg}" stroke="rgba(15,23,42,0.18)" stroke-width="1"/>
-      <text x="11" y="14" text-anchor="middle" font-family="Arial" font-size="8.5" font-weight="900" fill="{fg}">{text}</text>
-    </svg>
-    """
-    b64 = base64.b64encode(svg.encode("utf-8")).decode("utf-8")
-    return f"data:image/svg+xml;base64,{b64}"
+APP_CSS = """
+        #MainMenu, footer, header {visibility: hidden;}
+        .stApp { background: #f3f5f9; }
+
+        .block-container {
+          max-width: 620px !important;
+          padding-top: 1rem;
+          padding-bottom: 3rem;
+        }
+
+        .phone {
+          background: #ffffff;
+          border-radius: 30px;
+          border: 1px solid rgba(15,23,42,0.10);
+          box-shadow: 0 24px 70px rgba(15,23,42,0.12);
+          overflow: hidden;
+        }
+
+        .phone-inner { padding: 18px 16px 20px 16px; }
+
+        .notch {
+          height: 18px;
+          width: 150px;
+          margin: 0 auto;
+          border-radius: 0 0 16px 16px;
+          background: rgba(15,23,42,0.08);
+        }
+
+        .topbar {
+          display: flex;
+          justify-content: space-between;
+          align-items: center;
+          margin-top: 10px;
+        }
+
+        .brand { font-weight: 950; font-size: 18px; color: #0f172a; }
+        .subtle { font-size: 12px; color: #64748b; }
+        .wallet { text-align: right; font-weight: 950; color: #0f172a; }
+
+        .hero {
+          margin-top: 14px;
+          padding: 18px;
+          border-radius: 20px;
+          background: linear-gradient(135deg, rgba(229,9,20,0.10), rgba(15,23,42,0.04));
+          border: 1px solid rgba(15,23,42,0.08);
+        }
+
+        .hero-title { font-size: 26px; font-weight: 950; color: #0f172a; line-height: 1.05; }
+        .hero-sub { margin-top: 6px; font-size: 13px; color: #475569; }
+
+        .pill {
+          display: inline-block;
+          margin-top: 10px;
+          margin-right: 6px;
+          padding: 6px 10px;
+          border-radius: 999px;
+          background: rgba(15,23,42,0.06);
+          border: 1px solid rgba(15,23,42,0.08);
+          color: #0f172a;
+          font-size: 11px;
+          font-weight: 850;
+        }
+
+        .rowtitle {
+          margin: 18px 0 10px 0;
+          font-size: 14px;
+          font-weight: 950;
+          color: #0f172a;
+        }
+
+        .poster {
+          background: #ffffff;
+          border-radius: 18px;
+          border: 1px solid rgba(15,23,42,0.10);
+          box-shadow: 0 10px 30px rgba(15,23,42,0.06);
+          padding: 12px;
+        }
+
+        .poster-art {
+          height: 132px;
+          border-radius: 14px;
+          position: relative;
+          overflow: hidden;
+          border: 1px solid rgba(15,23,42,0.10);
+          background: #eef2ff;
+        }
+
+        .poster-bg {
+          position: absolute;
+          inset: 0;
+          width: 100%;
+          height: 100%;
+          object-fit: cover;
+          opacity: 1;
+        }
+
+        .poster-badge {
+          position: absolute;
+          top: 10px;
+          left: 10px;
+          background: rgba(255,255,255,0.92);
+          padding: 6px 10px;
+          border-radius: 999px;
+          color: #0f172a;
+          font-size: 11px;
+          font-weight: 900;
+          display: flex;
+          gap: 8px;
+          align-items: center;
+          border: 1px solid rgba(15,23,42,0.10);
+          box-shadow: 0 10px 24px rgba(15,23,42,0.08);
+        }
+
+        .logo {
+          width: 22px;
+          height: 22px;
+          border-radius: 6px;
+          object-fit: contain;
+          display: block;
+          background: transparent;
+        }
+
+        .poster-main { margin-top: 10px; font-size: 16px; font-weight: 950; color: #0f172a; }
+        .poster-meta { margin-top: 4px; font-size: 12px; color: #64748b; }
+
+        .rail { display: grid; grid-template-columns: 1fr 1fr; gap: 12px; margin-bottom: 10px; }
+        .rail-1 { grid-template-columns: 1fr; }
+        .rail .rowtitle { grid-column: 1 / -1; margin-bottom: 0; }
+
+        .poster-chip {
+          position: absolute;
+          top: 10px;
+          right: 10px;
+          padding: 6px 10px;
+          border-radius: 999px;
+          background: rgba(255,255,255,0.92);
+          border: 1px solid rgba(15,23,42,0.10);
+          color: #0f172a;
+          font-size: 11px;
+          font-weight: 900;
+        }
+        .poster-chip.owned { background: rgba(22,163,74,0.92); border-color: transparent; color: #ffffff; }
+
+        .cart-line {
+          display: flex;
+          justify-content: space-between;
+          gap: 12px;
+          padding: 8px 12px;
+          border-radius: 12px;
+          background: #ffffff;
+          border: 1px solid rgba(15,23,42,0.08);
+          font-size: 13px;
+          font-weight: 700;
+        }
+
+        .price-chip {
+          display: inline-block;
+          margin-top: 8px;
+          padding: 6px 10px;
+          border-radius: 999px;
+          background: rgba(229,9,20,0.10);
+          border: 1px solid rgba(229,9,20,0.20);
+          color: #b91c1c;
+          font-size: 11px;
+          font-weight: 900;
+        }
+
+        .stButton > button {
+          width: 100%;
+          border-radius: 14px;
+          font-weight: 950;
+          border: none;
+          padding: 0.42rem 0.50rem !important;
+          font-size: 0.78rem !important;
+          white-space: nowrap !important;
+          overflow: hidden !important;
+          text-overflow: ellipsis !important;
+          line-height: 1 !important;
+          background: #e50914;
+          color: #ffffff;
+        }
+        .stButton > button:hover { background: #ff1f2d; }
+
+        .stTabs [data-baseweb="tab"] { font-size: 12px; color: #64748b; }
+        .stTabs [aria-selected="true"] { color: #0f172a; border-bottom: 2px solid #e50914; }
+"""
 
+# ----------------------------
+# Logos + sport background art
+# Built once per process (see gamekey/assets.py) and shared by every session.
+# GAMEKEY_ASSET_MODE=static (default) serves raster logos as cacheable app/static URLs (SVG
+# stays inline), =inline falls back to base64 data URIs (also used if static serving is off).
+# ----------------------------
+@st.cache_resource
+def asset_cache() -> AssetCache:
+    mode = os.environ.get("GAMEKEY_ASSET_MODE", "static")
+    if mode == "static" and not st.get_option("server.enableStaticServing"):
+        mode = "inline"
+    return AssetCache(mode=mode)
+
+@timed("assets.logo")
 def league_logo_uri(league: str) -> str:
-    for ext in ("png", "svg", "jpg", "jpeg", "webp"):
-        path = os.path.join("assets", "logos", f"{league}.{ext}")
-        if os.path.exists(path):
-            return file_to_data_uri(path)
-    bg, fg = LEAGUE_COLORS.get(league, ("#0f172a", "#ffffff"))
-    return svg_badge(league, bg, fg)
+    return asset_cache().logo_uri(league)
+
+@timed("assets.logo_srcset")
+def league_logo_srcset(league: str) -> str:
+    # 1x/2x/3x variants from `python -m gamekey.build_assets` (empty if not built / inline mode).
+    return asset_cache().logo_srcset(league)
+
+@timed("assets.art")
+def sport_art_uri(sport: str, league: str = "") -> str:
+    return asset_cache().art_uri(sport, league)
+
+def card_images(sport: str, league: str):
+    return sport_art_uri(sport, league), league_logo_uri(league), league_logo_srcset(league)
+
+@st.cache_resource
+def page_chrome() -> str:
+    # CSS + phone frame, built once per process and identical on every rerun. The minified CSS is
+    # always inline: Streamlit < 1.53 serves app/static .css files as nosniff text/plain, so a
+    # linked stylesheet would be refused by the browser.
+    return chrome(minify_css(APP_CSS))
+
+@st.cache_resource
+def card_renderer() -> CardRenderer:
+    # Compiled card templates + per-game HTML fragments (gamekey/render.py), shared by every session.
+    return CardRenderer(images=card_images)
 
 # ----------------------------
-# Sport background art (no external images needed)
+# Clock: every time-dependent cache keys on clock().bucket() (GAMEKEY_BUCKET_SECONDS, default 60).
+# GAMEKEY_NOW=2026-01-01T20:00 freezes time for deterministic tests / benchmarks.
 # ----------------------------
-def sport_art_uri(sport: str, league: str = "") -> str:
-    sport_key = (sport or "").lower()
-    if "soccer" in sport_key:
-        bg1, bg2, accent, label = "#16a34a", "#14532d", "rgba(255,255,255,0.55)", "SOCCER"
-        lines = """
-          <rect x="18" y="14" width="324" height="168" rx="18" fill="none" stroke="{accent}" stroke-width="3"/>
-          <line x1="180" y1="14" x2="180" y2="182" stroke="{accent}" stroke-width="3"/>
-          <circle cx="180" cy="98" r="28" fill="none" stroke="{accent}" stroke-width="3"/>
-        """
-    elif "basket" in sport_key:
-        bg1, bg2, accent, label = "#f97316", "#7c2d12", "rgba(255,255,255,0.55)", "BASKETBALL"
-        lines = """
-          <rect x="18" y="14" width="324" height="168" rx="18" fill="none" stroke="{accent}" stroke-width="3"/>
-          <circle cx="180" cy="98" r="30" fill="none" stroke="{accent}" stroke-width="3"/>
-        """
-    elif "baseball" in sport_key:
-        bg1, bg2, accent, label = "#2563eb", "#1e3a8a", "rgba(255,255,255,0.6)", "BASEBALL"
-        lines = """
-          <path d="M180 168 L240 108 L180 48 L120 108 Z" fill="none" stroke="{accent}" stroke-width="3"/>
-          <circle cx="180" cy="108" r="6" fill="{accent}"/>
-        """
-    elif "football" in sport_key:
-        bg1, bg2, accent, label = "#111827", "#020617", "rgba(255,255,255,0.55)", "FOOTBALL"
-        lines = """<rect x="18" y="14" width="324" height="168" rx="18" fill="none" stroke="{accent}" stroke-width="3"/>"""
-    else:
-        bg1, bg2, accent, label = "#7c3aed", "#312e81", "rgba(255,255,255,0.5)", (league or "SPORT").upper()
-        lines = ""
-
-    svg = f"""
-    <svg xmlns="http://www.w3.org/2000/svg" width="360" height="196" viewBox="0 0 360 196">
-      <defs>
-        <linearGradient id="g" x1="0" y1="0" x2="1" y2="1">
-          <stop offset="0" stop-color="{bg1}"/>
-          <stop offset="1" stop-color="{bg2}"/>
-        </linearGradient>
-      </defs>
-      <rect width="360" height="196" rx="18" fill="url(#g)"/>
-      {lines.format(accent=accent)}
-      <text x="20" y="180" font-size="14" font-weight="800" fill="rgba(255,255,255,0.7)">{label}</text>
-    </svg>
-    """
-    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode()).decode()
-
-# ----------------------------
-# Demo catalog
-# ----------------------------
-def demo_catalog():
-    now = datetime.now()
-    games = [
-        {"game_id": "GK-7001", "sport": "Soccer", "league": "UCL", "home": "Manchester City", "away": "Galatasaray",
-         "start": now + timedelta(hours=7), "platform": "Paramount+", "market": "US", "base_price": 2.99,
-         "tags": ["Decision Day", "High stakes", "Prime time"], "about": "A must-win night. One game. One key."},
-
-        {"game_id": "GK-7002", "sport": "Basketball", "league": "NBA", "home": "Knicks", "away": "Celtics",
-         "start": now + timedelta(days=1, hours=2), "platform": "ESPN", "market": "US", "base_price": 1.99,
-         "tags": ["MSG energy", "Playoff race", "Big matchup"], "about": "Classic rivalry energy in the Garden."},
-
-        {"game_id": "GK-7003", "sport": "American Football", "league": "NFL", "home": "Eagles", "away": "Cowboys",
-         "start": now + timedelta(days=2, hours=4), "platform": "FOX Sports", "market": "US", "base_price": 3.99,
-         "tags": ["Rivalry", "Sunday", "Must watch"], "about": "Two brands. One statement game."},
-
-        {"game_id": "GK-7004", "sport": "Soccer", "league": "MLS", "home": "NYCFC", "away": "Inter Miami",
-         "start": now + timedelta(days=3, hours=1), "platform": "Apple TV", "market": "US", "base_price": 2.49,
-         "tags": ["Stars", "Weekend", "Big draw"], "about": "When the stars come to town, you tap in."},
-
-        {"game_id": "GK-7005", "sport": "Soccer", "league": "NWSL", "home": "Gotham FC", "away": "Angel City",
-         "start": now + timedelta(days=4, hours=3), "platform": "Prime Video", "market": "US", "base_price": 1.49,
-         "tags": ["Womens sports", "Community", "Rising"], "about": "Elite talent. Big moment. Easy access."},
-
-        {"game_id": "GK-7006", "sport": "Baseball", "league": "MLB", "home": "Yankees", "away": "Red Sox",
-         "start": now + timedelta(days=5, hours=2), "platform": "MLB.TV", "market": "US", "base_price": 3.49,
-         "tags": ["Classic rivalry", "Prime series", "History"], "about": "A rivalry you do not need a subscription for."},
-    ]
-    df_ = pd.DataFrame(games)
-    df_["start_str"] = df_["start"].dt.strftime("%a, %b %d - %I:%M %p")
-    return df_.sort_values("start")
-
-df = demo_catalog()
-
-# ----------------------------
-# Purchase + pricing
+@st.cache_resource
+def app_clock() -> Clock:
+    bucket_seconds = int(os.environ.get("GAMEKEY_BUCKET_SECONDS", "60"))
+    if os.environ.get("GAMEKEY_NOW"):
+        return FixedClock(datetime.fromisoformat(os.environ["GAMEKEY_NOW"]), bucket_seconds)
+    return Clock(bucket_seconds)
+
 # ----------------------------
-def is_purchased(game_id: str) -> bool:
-    return game_id in st.session_state.purchases
-
-def price_for(base_price: float, deal_on: bool, deal_pct: int) -> float:
-    if deal_on:
-        return round(float(base_price) * (1 - deal_pct / 100), 2)
-    return float(base_price)
-
-def tier_prices(base: float):
-    return {
-        "Standard": round(base, 2),
-        "Plus (24h replay)": round(base + 1.00, 2),
-        "Party (watch link)": round(base + 2.00, 2),
-    }
-
-def purchase(game_row: pd.Series, tier: str, price_paid: float):
-    title = f"{game_row['away']} @ {game_row['home']}"
-    st.session_state.purchases[game_row["game_id"]] = {
-        "game_id": game_row["game_id"],
-        "title": title,
-        "league": game_row["league"],
-        "platform": game_row["platform"],
-        "start": game_row["start_str"],
-        "tier": tier,
-        "price_paid": float(price_paid),
-        "purchased_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
+# Catalog: one source per process (GAMEKEY_CATALOG=demo | csv:path | parquet:path | sqlite:path),
+# refreshed on a TTL (GAMEKEY_CATALOG_TTL seconds) or catalog_store().bump().
+# Filters are pushed down to the source; only the rows a rail shows are materialized.
+# ----------------------------
+@st.cache_resource
+def catalog_store() -> CatalogStore:
+    source = open_source(os.environ.get("GAMEKEY_CATALOG", "demo"), loader=timed("catalog.demo")(demo_catalog))
+    return CatalogStore(source, ttl=float(os.environ.get("GAMEKEY_CATALOG_TTL", "300")), clock=app_clock())
+
+@st.cache_resource(max_entries=2)
+def search_index(version: int) -> SearchIndex:
+    # Rebuilt once per catalog version; the old one is dropped with max_entries.
+    store = catalog_store()
+    anchor = store.bucket()
+    return SearchIndex.from_chunks(store.scan(now=anchor), anchor=anchor)
+
+@st.cache_resource(max_entries=4)
+def time_windows(version: int, bucket: datetime) -> TimeWindows:
+    # Started / within-24h / upcoming for every indexed game, once per (version, time bucket).
+    # Relative (demo) kickoffs were resolved at the index's anchor, so judge them there.
+    index = search_index(version)
+    return TimeWindows(index.starts, index.anchor if catalog_store().relative_starts else bucket)
+
+@st.cache_resource(max_entries=4)
+def home_rails(version: int, bucket: datetime) -> dict:
+    # Trending / Rivalries, shared by every session for this (version, time bucket).
+    return build_home_rails(catalog_store(), search_index(version), time_windows(version, bucket), bucket)
 
 # ----------------------------
-# UI components
+# Wallet + purchases: durable SQLite ledger shared by every session (GAMEKEY_DB path),
+# see gamekey/ledger.py.
 # ----------------------------
-def poster_card(row: pd.Series, section_key: str, deal_on=False, deal_pct=0):
-    game_id = row["game_id"]
-    key_prefix = f"{section_key}__{game_id}"
+@st.cache_resource
+def ledger() -> Ledger:
+    store = Ledger(os.environ.get("GAMEKEY_DB", DEFAULT_DB), clock=app_clock().time)
+    store.prune_keys()
+    return store
 
-    title = f"{row['away']} @ {row['home']}"
-    p = price_for(row["base_price"], deal_on, deal_pct)
-    purchased = is_purchased(game_id)
+def wallet_balance() -> float:
+    return ledger().balance(st.session_state.user_id)
 
-    logo_uri = league_logo_uri(row["league"])
-    art_uri = sport_art_uri(row["sport"], row["league"])
+def credit_wallet(amount: float):
+    ledger().credit(st.session_state.user_id, amount)
 
-    st.markdown(
-        f"""
-        <div class="poster">
-          <div class="poster-art">
-            <img class="poster-bg" src="{art_uri}" />
-            <div class="poster-badge">
-              <img class="logo" src="{logo_uri}" width="22" height="22"/>
-              <span>{row["league"]}</span>
-            </div>
-          </div>
-          <div class="poster-main">{title}</div>
-          <div class="poster-meta">{row["start_str"]} - {row["platform"]}</div>
-        </div>
-        """,
-        unsafe_allow_html=True
+# ----------------------------
+# Pricing: deal rules + tiers live in gamekey/pricing.py. Effective prices for a whole
+# catalog version are computed in one pass per (version, time bucket, surface, deal percent)
+# and shared by every session; cards and checkout just look a game up.
+# ----------------------------
+@st.cache_resource
+def pricing_engine() -> PricingEngine:
+    return PricingEngine()
+
+@st.cache_resource(max_entries=32)
+def price_book(version: int, bucket: datetime, surface: str, deal_pct: int = 0) -> PriceBook:
+    return PriceBook(search_index(version), pricing_engine(), time_windows(version, bucket), surface, deal_pct,
+                     key=(version, bucket, surface, deal_pct))
+
+def quotes(games: list, surface: str, deal_pct: int = 0) -> list:
+    # (effective price, deal percent) per game, from one price book lookup.
+    store = catalog_store()
+    bucket = store.bucket()
+    book = price_book(store.current_version(), bucket, surface, deal_pct)
+    out = []
+    for game in games:
+        hit = book.quote(game.game_id)
+        if hit is None:
+            # Not in the indexed version (catalog just refreshed): price the row on its own.
+            cents, pcts = pricing_engine().price_cents([game.base_price], TimeWindows([game.start], bucket),
+                                                       [game.league], [game.market], surface, deal_pct)
+            hit = int(cents[0]) / 100, int(pcts[0])
+        out.append(hit)
+    return out
+
+def tier_prices(price: float) -> dict:
+    return pricing_engine().tier_prices(price)
+
+# ----------------------------
+# Purchase
+# ----------------------------
+def entitlements() -> Entitlements:
+    # Owned game_ids for this session; cards check membership in memory, never the ledger.
+    if "entitlements" not in st.session_state:
+        st.session_state.entitlements = Entitlements(st.session_state.user_id)
+    ent = st.session_state.entitlements
+    ent.refresh(ledger())
+    return ent
+
+def is_purchased(game_id: str) -> bool:
+    return game_id in entitlements()
+
+def purchase(game_row: Game, tier: str, price_paid: float, key: str = None):
+    # Debit + grant in one ledger transaction; replaying `key` never charges twice.
+    result = ledger().purchase(
+        st.session_state.user_id, game_row.game_id, price_paid, key=key,
+        title=f"{game_row.away} @ {game_row.home}", league=game_row.league, platform=game_row.platform,
+        start=game_row.start_str, tier=tier,
     )
+    if result.status == "ok":
+        entitlements().grant(result.entry, result.version)
+    elif result.status == "owned":
+        entitlements().invalidate()
+    return result
+
+# ----------------------------
+# Cart: games collected from Selected / Explore, then bought in one ledger transaction
+# (Ledger.purchase_many) and one rerun, instead of a Details -> Confirm -> rerun per game.
+# ----------------------------
+def add_to_cart(games: list, tier: str = "Standard", surface: str = "selected", deal_pct: int = 0) -> int:
+    # Skips games already owned; returns how many were new to the cart. `surface` / `deal_pct`
+    # are what the cards were priced with, so the cart charges the price they showed.
+    cart = st.session_state.cart
+    return sum(cart.add(game.game_id, tier, surface, deal_pct) for game in games if not is_purchased(game.game_id))
+
+def cart_items(cart: Cart) -> list:
+    # Every line priced with the same price book as the card it was added from: one catalog
+    # lookup, one quotes() pass per (surface, deal), then the tier add-on.
+    # Games bought since (another tab, Selected) or gone from the catalog drop out of the cart.
+    lines = [line for line in cart.lines() if not is_purchased(line[0])]
+    found = {game.game_id: game for game in records(catalog_store().lookup([line[0] for line in lines]))}
+    books = {}
+    for game_id, _, surface, deal_pct in lines:
+        if game_id in found:
+            books.setdefault((surface, deal_pct), []).append(found[game_id])
+    priced = {}
+    for (surface, deal_pct), games in books.items():
+        prices = quotes(games, surface, deal_pct)
+        priced.update((game.game_id, (game, price)) for game, (price, _) in zip(games, prices))
+    items = []
+    for game_id, tier, _, _ in cart.lines():
+        if game_id not in priced:
+            cart.remove(game_id)
+            continue
+        game, price = priced[game_id]
+        items.append(CartItem(game_id, tier_prices(price)[tier], title=f"{game.away} @ {game.home}",
+                              league=game.league, platform=game.platform, start=game.start_str, tier=tier))
+    return items
+
+def purchase_cart(items: list, key: str = None):
+    # Debit the total + grant every game in one ledger transaction (one wallet version bump).
+    result = ledger().purchase_many(st.session_state.user_id, items, key=key)
+    if result.status == "ok" and not result.skipped:
+        entitlements().grant_all(result.entries, result.version)
+    elif result.status != "insufficient":
+        entitlements().invalidate()
+    return result
+
+# ----------------------------
+# Recommendations (gamekey/recommend.py): the model is rebuilt per (catalog version, time bucket)
+# and warmed at startup; each user's profile is cached process-wide until what they own (or the
+# catalog) changes, so a rerun only scores the bucket's pool against it.
+# ----------------------------
+@st.cache_resource(max_entries=2)
+def recommendation_model(version: int, bucket: datetime) -> RecommendationModel:
+    return RecommendationModel.from_store(catalog_store(), bucket, version=version)
 
-    c1, c2 = st.columns([1, 1])
-    with c1:
+@st.cache_resource
+def recommender() -> Recommender:
+    return Recommender(max_entries=int(os.environ.get("GAMEKEY_RECOMMEND_CACHE", "4096")))
+
+def for_you(n: int) -> list:
+    store = catalog_store()
+    model = recommendation_model(store.current_version(), store.bucket())
+    ent = entitlements()
+
+    def history():
+        ids = [entry.game_id for entry in ent.page(0, HISTORY_SIZE)]
+        return records(store.lookup(ids)) if ids else []
+
+    return recommender().top(model, ent.signature(HISTORY_SIZE), history, exclude=ent, n=n)
+
+# ----------------------------
+# UI components
+# ----------------------------
+def card_actions(row: Game, section_key: str, price: float, purchased: bool):
+    # Button row directly under the card: Details + Buy (Watch once owned).
+    game_id = row.game_id
+    key_prefix = f"{section_key}__{game_id}"
+    title = f"{row.away} @ {row.home}"
+
+    with st.container(horizontal=True):
         if st.button("Details", key=f"details_{key_prefix}", use_container_width=True):
             st.session_state.active_game = game_id
             request_scroll("selected")
             st.rerun()
-    with c2:
         if purchased:
             if st.button("Watch", key=f"watch_{key_prefix}", use_container_width=True):
-                start_demo_playback(title=title, league=row["league"])
+                start_demo_playback(game_id, title=title, league=row.league)
                 toast("Starting demo playback...")
                 st.rerun()
         else:
-            if st.button(f"Buy ${p:,.2f}", key=f"buy_{key_prefix}", use_container_width=True):
+            if st.button(f"Buy ${price:,.2f}", key=f"buy_{key_prefix}", use_container_width=True):
                 st.session_state.active_game = game_id
                 request_scroll("selected")
                 st.rerun()
 
-def row_section(title: str, subset: pd.DataFrame, section_key: str, deal_on=False, deal_pct=0, max_items=4):
-    st.markdown(f"<div class='rowtitle'>{title}</div>", unsafe_allow_html=True)
-    subset = subset.head(max_items)
+@timed("cards")
+def render_cards(games: list, section_key: str, surface="home", deal_pct=0, title: str = None):
+    # Card HTML comes from the shared fragment cache; each card is one markdown block with its
+    # own button row right under it, two cards per row.
+    prices = [price for price, _ in quotes(games, surface, deal_pct)]
+    owned = [is_purchased(game.game_id) for game in games]
+    renderer, version = card_renderer(), catalog_store().current_version()
+    with phase("cards.html"):
+        cards = [renderer.poster(game, price, o, version) for game, price, o in zip(games, prices, owned)]
+    if title:
+        markdown(renderer.row_title(title), unsafe_allow_html=True)
+    if not games:
+        return
+    STARTUP.mark("first_card")
     cols = st.columns(2)
-    for i, (_, row) in enumerate(subset.iterrows()):
+    for i, (game, card, price, o) in enumerate(zip(games, cards, prices, owned)):
         with cols[i % 2]:
-            poster_card(row, section_key=section_key, deal_on=deal_on, deal_pct=deal_pct)
-
-def checkout_sheet(game_row: pd.Series, section_key: str, deal_on=False, deal_pct=0):
-    game_id = game_row["game_id"]
+            markdown(card, unsafe_allow_html=True)
+            card_actions(game, section_key, price, o)
+
+@timed("row_section")
+def row_section(title: str, subset: GameTable, section_key: str, surface="home", deal_pct=0, max_items=4):
+    render_cards(records(subset.head(max_items)), section_key, surface=surface, deal_pct=deal_pct, title=title)
+
+@timed("paged_section")
+def paged_section(title: str, game_ids: list, section_key: str, surface="home", deal_pct=0, page_size=6,
+                  signature=None):
+    # Paged rail: only the visible window is looked up and rendered, so the widget tree stays
+    # at page_size cards + 2 nav buttons no matter how many games match.
+    page = current_page(section_key, len(game_ids), page_size, signature)
+
+    window = game_ids[page * page_size:(page + 1) * page_size]
+    with phase("catalog.lookup"):
+        games = records(catalog_store().lookup(window))
+    render_cards(games, section_key, surface=surface, deal_pct=deal_pct, title=title)
+    page_nav(section_key, len(game_ids), page_size, signature, page)
+    return games
+
+def current_page(section_key: str, total: int, page_size: int, signature=None) -> int:
+    # `signature` identifies the result set; when it changes (new search / filters / purchase)
+    # we jump back to page 1.
+    state_key = f"page__{section_key}"
+    saved_signature, page = st.session_state.get(state_key, (signature, 0))
+    if saved_signature != signature:
+        page = 0
+    page = min(page, max(1, -(-total // page_size)) - 1)
+    st.session_state[state_key] = (signature, page)
+    return page
+
+def page_nav(section_key: str, total: int, page_size: int, signature, page: int):
+    pages = max(1, -(-total // page_size))
+    if pages <= 1:
+        return
+    state_key = f"page__{section_key}"
+    first = page * page_size + 1
+    st.caption(f"{first}-{min(first + page_size - 1, total)} of {total:,}")
+    p1, p2 = st.columns(2)
+    with p1:
+        st.button("Prev", key=f"prev_{section_key}", disabled=page == 0, use_container_width=True,
+                  on_click=set_state, args=(state_key, (signature, page - 1)))
+    with p2:
+        st.button("Next", key=f"next_{section_key}", disabled=page >= pages - 1, use_container_width=True,
+                  on_click=set_state, args=(state_key, (signature, page + 1)))
+
+@timed("checkout")
+def checkout_sheet(game_row: Game, section_key: str, surface="selected", deal_pct=0):
+    game_id = game_row.game_id
     key_prefix = f"{section_key}__checkout__{game_id}"
 
-    title = f"{game_row['away']} @ {game_row['home']}"
-    base = price_for(game_row["base_price"], deal_on, deal_pct)
+    title = f"{game_row.away} @ {game_row.home}"
+    (base, shown_pct), = quotes([game_row], surface, deal_pct)
     tiers = tier_prices(base)
 
     with st.expander("Checkout", expanded=True):
         st.write(f"**{title}**")
-        st.write(f"League: {game_row['league']} | Start: {game_row['start_str']}")
-        st.write(f"Watch on: {game_row['platform']}")
-        if deal_on:
-            st.markdown(f"<span class='price-chip'>Deal -{deal_pct}%</span>", unsafe_allow_html=True)
+        st.write(f"League: {game_row.league} | Start: {game_row.start_str}")
+        st.write(f"Watch on: {game_row.platform}")
+        if shown_pct:
+            markdown(f"<span class='price-chip'>Deal -{shown_pct}%</span>", unsafe_allow_html=True)
 
         st.write("---")
         tier = st.radio("Access", options=list(tiers.keys()), index=0, key=f"tier_{key_prefix}")
@@ -503,20 +802,37 @@ def checkout_sheet(game_row: pd.Series, section_key: str, deal_on=False, deal_pc
         st.write(f"**Total: ${price_paid:,.2f}**")
         st.write("---")
 
-        if st.session_state.wallet < price_paid:
+        in_cart = game_id in st.session_state.cart
+        if st.button("Update cart" if in_cart else "Add to cart", key=f"cart_{key_prefix}", use_container_width=True):
+            add_to_cart([game_row], tier, surface, deal_pct)
+            toast("Cart updated." if in_cart else "Added to cart.")
+            st.session_state.active_game = None
+            request_scroll("selected")
+            st.rerun()
+
+        if wallet_balance() < price_paid:
             st.error("Not enough wallet balance (demo). Add funds in Profile.")
             return
 
+        # One idempotency key per checkout attempt: a double-clicked Confirm replays it. One slot
+        # per session (not per game), so browsing many games leaves nothing behind.
+        token = st.session_state.get("checkout_token")
+        if token is None or token[0] != key_prefix:
+            token = st.session_state.checkout_token = (key_prefix, uuid.uuid4().hex)
         if st.button(f"Confirm ${price_paid:,.2f}", key=f"confirm_{key_prefix}", use_container_width=True):
-            st.session_state.wallet = round(st.session_state.wallet - price_paid, 2)
-            purchase(game_row, tier=tier, price_paid=price_paid)
+            result = purchase(game_row, tier=tier, price_paid=price_paid, key=token[1])
+            if not result.ok:
+                st.error("Not enough wallet balance (demo). Add funds in Profile." if result.status == "insufficient"
+                         else "Already unlocked. Find it in Library.")
+                return
+            st.session_state.checkout_token = None
             toast("Purchased. Unlocked in Library.")
             st.session_state.active_game = None
             request_scroll("selected")
             st.rerun()
 
-def social_sheet(game_row: pd.Series, section_key: str):
-    game_id = game_row["game_id"]
+def social_sheet(game_row: Game, section_key: str):
+    game_id = game_row.game_id
     key_prefix = f"{section_key}__social__{game_id}"
     share_url = f"https://gamekey.app/game/{game_id}"
 
@@ -531,215 +847,286 @@ def social_sheet(game_row: pd.Series, section_key: str):
 # ----------------------------
 # Render: phone frame
 # ----------------------------
-st.markdown("<div class='phone'><div class='notch'></div><div class='phone-inner'>", unsafe_allow_html=True)
-
-st.markdown(
-    f"""
-    <div class="topbar">
-      <div>
-        <div class="brand">GameKey</div>
-        <div class="subtle">Watch one game. Pay once.</div>
-      </div>
-      <div class="wallet">
-        <div class="subtle">Wallet</div>
-        <div>${st.session_state.wallet:,.2f}</div>
-      </div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-if st.session_state.toast_msg:
-    st.success(st.session_state.toast_msg)
-    st.session_state.toast_msg = None
-
-tab_home, tab_explore, tab_library, tab_profile = st.tabs(["Home", "Explore", "Library", "Profile"])
-
-# HOME
-with tab_home:
-    st.markdown(
-        """
-        <div class="hero">
-          <div class="hero-title">Tonight is<br>for big games.</div>
-          <div class="hero-sub">Instant, low-cost access - no subscription needed.</div>
-          <div>
-            <span class="pill">Trending</span>
-            <span class="pill">Rivalries</span>
-            <span class="pill">For You</span>
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-    upcoming = df[df["start"] > datetime.now()].head(6)
-    rivalries = df[df["tags"].apply(lambda x: any(("Rivalry" in t) or ("Classic rivalry" in t) for t in x))].head(6)
+with phase("chrome"):
+    markdown(page_chrome(), unsafe_allow_html=True)
 
-    row_section("Trending Tonight", upcoming, section_key="home_trending", deal_on=True, deal_pct=20, max_items=4)
-    row_section("Rivalries", rivalries if not rivalries.empty else df.sample(min(6, len(df)), random_state=1),
-                section_key="home_rivalries", deal_on=False, max_items=4)
+markdown(topbar(wallet_balance()), unsafe_allow_html=True)
 
-    rec = df.sample(min(6, len(df)), random_state=7)
-    row_section("For You", rec, section_key="home_foryou", deal_on=False, max_items=4)
+show_toast()
+STARTUP.mark("first_paint")
 
-# EXPLORE
-with tab_explore:
-    st.markdown("<div class='rowtitle'>Search and Filter</div>", unsafe_allow_html=True)
+# ----------------------------
+# Startup (gamekey/startup.py): the first paint above needs no catalog, so the catalog stack
+# loads only now. The shared caches a session reaches for next (catalog, search index, rails,
+# price books, card art + logos) are then warmed once per process on a background thread,
+# while this run renders. GAMEKEY_STARTUP=eager warms them in the foreground instead.
+# ----------------------------
+with STARTUP.step("imports"):
+    from gamekey.catalog import CatalogStore, Game, GameTable, demo_catalog, records
+    from gamekey.clock import TimeWindows
+    from gamekey.pricing import PriceBook, PricingEngine
+    from gamekey.rails import build_home_rails
+    from gamekey.recommend import HISTORY_SIZE, RecommendationModel, Recommender
+    from gamekey.search import SearchIndex
+    from gamekey.sources import open_source
+
+WARM_PRICE_BOOKS = (("trending", 0), ("home", 0), ("explore", 0), ("selected", 0))
+
+def off_warm_thread(record: logging.LogRecord) -> bool:
+    return threading.current_thread().name != WARM_THREAD
+
+@st.cache_resource
+def warmer() -> Warmer:
+    # The warm thread runs without a script context: it can outlive the run that started it, and a
+    # borrowed context would send its cache spinners to that finished run. Streamlit's "missing
+    # ScriptRunContext" warning (one per cache call there) is muted for that thread only.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(off_warm_thread)
+    return Warmer(STARTUP)
+
+def warm_tasks() -> list:
+    def index():
+        search_index(catalog_store().current_version())
+
+    def rails_and_cards():
+        # Home rails + their card fragments, which also builds the league logos and sport art.
+        store, renderer = catalog_store(), card_renderer()
+        version = store.current_version()
+        for rail in home_rails(version, store.bucket()).values():
+            games = records(rail)
+            for game, (price, _) in zip(games, quotes(games, "home")):
+                renderer.poster(game, price, False, version)
+
+    def price_books():
+        store = catalog_store()
+        for surface, deal_pct in WARM_PRICE_BOOKS:
+            price_book(store.current_version(), store.bucket(), surface, deal_pct)
+
+    def recommendations():
+        store = catalog_store()
+        recommendation_model(store.current_version(), store.bucket())
+
+    return [("catalog", catalog_store), ("search_index", index), ("home_rails", rails_and_cards),
+            ("recommendations", recommendations),
+            ("price_books", price_books), ("facets", lambda: catalog_store().facets())]
+
+warmer().start(warm_tasks(), background=os.environ.get("GAMEKEY_STARTUP", "lazy") != "eager")
 
+# ----------------------------
+# Page regions are fragments: a widget inside one reruns only that region.
+# Actions that change another region (wallet, purchases, selection, player) still
+# call st.rerun() for a full run; region-local actions use on_click callbacks, which
+# run before the fragment's own rerun (and still work on a full run).
+# ----------------------------
+def set_state(key: str, value):
+    st.session_state[key] = value
+
+def save_display_name():
+    st.session_state.display_name = st.session_state.profile_name.strip() or "Guest"
+    toast("Saved.")
+
+@st.fragment
+@region("tab:home")
+def home_tab():
+    markdown(HERO, unsafe_allow_html=True)
+
+    store = catalog_store()
+    with phase("catalog.rails"):
+        rails = home_rails(store.current_version(), store.bucket())
+
+    row_section("Trending Tonight", rails["trending"], section_key="home_trending", surface="trending", max_items=4)
+    row_section("Rivalries", rails["rivalries"], section_key="home_rivalries", max_items=4)
+    with phase("recommend"):
+        picks = for_you(4)
+    render_cards(picks, section_key="home_foryou", title="For You")
+
+@st.fragment
+@region("tab:explore")
+def explore_tab():
+    markdown("<div class='rowtitle'>Search and Filter</div>", unsafe_allow_html=True)
+
+    facets = catalog_store().facets()
     q = st.text_input("Search teams / league / platform", "", key="explore_search")
     f1, f2 = st.columns(2)
     with f1:
-        sport = st.selectbox("Sport", ["All"] + sorted(df["sport"].unique().tolist()), key="explore_sport")
+        sport = st.selectbox("Sport", ["All"] + facets["sport"], key="explore_sport")
     with f2:
-        league = st.selectbox("League", ["All"] + sorted(df["league"].unique().tolist()), key="explore_league")
+        league = st.selectbox("League", ["All"] + facets["league"], key="explore_league")
 
     max_price = st.slider("Max price", 0.99, 9.99, 4.99, 0.50, key="explore_max_price")
     deal_on = st.toggle("Show Deals", value=False, key="explore_deals")
     deal_pct = st.slider("Deal percent", 10, 60, 20, 5, key="explore_deal_pct") if deal_on else 0
 
-    filtered = df.copy()
-    if q.strip():
-        mask = (
-            filtered["home"].str.contains(q, case=False) |
-            filtered["away"].str.contains(q, case=False) |
-            filtered["league"].str.contains(q, case=False) |
-            filtered["platform"].str.contains(q, case=False)
-        )
-        filtered = filtered[mask]
-    if sport != "All":
-        filtered = filtered[filtered["sport"] == sport]
-    if league != "All":
-        filtered = filtered[filtered["league"] == league]
-    filtered = filtered[filtered["base_price"] <= max_price]
-
-    if filtered.empty:
+    filters = dict(
+        sport=None if sport == "All" else sport,
+        league=None if league == "All" else league,
+        max_price=max_price,
+    )
+    store = catalog_store()
+    version = store.current_version()
+    # Max price applies to what the card will charge (deal included), not base_price.
+    with phase("catalog.search"):
+        prices = price_book(version, store.bucket(), "explore", deal_pct)
+        matches = search_index(version).search(q, prices=prices, **filters)
+
+    if not matches:
         st.info("No matches. Tweak filters or increase max price.")
     else:
-        row_section("Browse", filtered, section_key="explore_browse", deal_on=deal_on, deal_pct=deal_pct, max_items=6)
-
-# LIBRARY
-with tab_library:
-    st.markdown("<div class='rowtitle'>My Library</div>", unsafe_allow_html=True)
+        shown = paged_section("Browse", matches, section_key="explore_browse", surface="explore", deal_pct=deal_pct,
+                              page_size=6, signature=(version, q.strip(), tuple(filters.values()), deal_pct))
+        # A series / league weekend in one go: the whole page goes into the cart.
+        cart = st.session_state.cart
+        new = [game for game in shown if not is_purchased(game.game_id) and game.game_id not in cart]
+        if new and st.button(f"Add {len(new)} to cart", key="explore_cart_page", use_container_width=True):
+            toast(f"Added {add_to_cart(new, surface='explore', deal_pct=deal_pct)} to cart.")
+            request_scroll("selected")
+            st.rerun()
 
-    if not st.session_state.purchases:
+@st.fragment
+@region("tab:library")
+def library_tab():
+    # Append-ordered entries kept by purchase(); a page costs the same for 10 or 10,000 purchases.
+    ent = entitlements()
+    if not len(ent):
+        markdown("<div class='rowtitle'>My Library</div>", unsafe_allow_html=True)
         st.info("No games unlocked yet. Unlock a game from Home or Explore.")
-    else:
-        lib = pd.DataFrame(st.session_state.purchases.values()).sort_values("purchased_at", ascending=False)
-        for _, r in lib.iterrows():
-            game_id = r["game_id"]
-            logo_uri = league_logo_uri(r["league"])
-
-            st.markdown(
-                f"""
-                <div class="poster">
-                  <div class="poster-art" style="height:110px;">
-                    <img class="poster-bg" src="{sport_art_uri('sport', r['league'])}" />
-                    <div class="poster-badge">
-                      <img class="logo" src="{logo_uri}" width="22" height="22"/>
-                      <span>{r["league"]}</span>
-                    </div>
-                  </div>
-                  <div class="poster-main">{r["title"]}</div>
-                  <div class="poster-meta">{r["start"]} - {r["platform"]} - {r["tier"]} - Paid ${float(r["price_paid"]):,.2f}</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+        return
 
-            if st.button("Watch", key=f"lib_watch__{game_id}", use_container_width=True):
-                start_demo_playback(title=r["title"], league=r["league"])
-                toast("Starting demo playback...")
-                st.rerun()
+    page_size = 10
+    page = current_page("library", len(ent), page_size, signature=len(ent))
+    entries = ent.page(page, page_size)
+    renderer = card_renderer()
+    with phase("cards.html"):
+        cards = [renderer.library_card(r) for r in entries]
+    markdown(renderer.row_title("My Library"), unsafe_allow_html=True)
+    for r, card in zip(entries, cards):
+        markdown(card, unsafe_allow_html=True)
+        if st.button("Watch", key=f"lib_watch__{r.game_id}", use_container_width=True):
+            start_demo_playback(r.game_id, title=r.title, league=r.league)
+            toast("Starting demo playback...")
+            st.rerun()
 
-            st.write("")
+    page_nav("library", len(ent), page_size, len(ent), page)
 
-# PROFILE
-with tab_profile:
-    st.markdown("<div class='rowtitle'>Profile</div>", unsafe_allow_html=True)
+@st.fragment
+@region("tab:profile")
+def profile_tab():
+    show_toast()
+    markdown("<div class='rowtitle'>Profile</div>", unsafe_allow_html=True)
     st.write(f"User: {st.session_state.user_id}")
 
-    name = st.text_input("Display name", st.session_state.display_name, key="profile_name")
-    if st.button("Save", key="profile_save", use_container_width=True):
-        st.session_state.display_name = name.strip() or "Guest"
-        toast("Saved.")
-        st.rerun()
+    st.text_input("Display name", st.session_state.display_name, key="profile_name")
+    st.button("Save", key="profile_save", use_container_width=True, on_click=save_display_name)
 
-    st.markdown("<div class='rowtitle'>Wallet (demo)</div>", unsafe_allow_html=True)
+    markdown("<div class='rowtitle'>Wallet (demo)</div>", unsafe_allow_html=True)
     add = st.number_input("Add funds", min_value=0.0, max_value=200.0, value=5.0, step=1.0, key="wallet_add_amt")
     if st.button("Add funds", key="wallet_add_btn", use_container_width=True):
-        st.session_state.wallet = round(st.session_state.wallet + float(add), 2)
+        credit_wallet(float(add))
         toast("Wallet updated.")
         st.rerun()
 
-    st.markdown("<div class='rowtitle'>Reset</div>", unsafe_allow_html=True)
+    markdown("<div class='rowtitle'>Reset</div>", unsafe_allow_html=True)
     if st.button("Reset demo data", key="reset_demo", use_container_width=True):
-        st.session_state.purchases = {}
-        st.session_state.wallet = 12.00
+        ledger().reset(st.session_state.user_id)
+        entitlements().invalidate()
         st.session_state.active_game = None
         st.session_state.now_playing = None
         st.session_state.scroll_to = None
         toast("Reset complete.")
         st.rerun()
 
-# ----------------------------
-# Selected / Checkout (with anchor)
-# ----------------------------
-st.markdown("<div id='selected_anchor'></div>", unsafe_allow_html=True)
+@st.fragment
+@region("selected")
+def selected_panel():
+    if not st.session_state.active_game:
+        return
 
-if st.session_state.active_game:
-    sel = df[df["game_id"] == st.session_state.active_game]
-    if sel.empty:
+    with phase("catalog.lookup"):
+        sel = records(catalog_store().lookup([st.session_state.active_game]))
+    if not sel:
         st.session_state.active_game = None
         toast("Selection refreshed. Please pick a game again.")
         st.rerun()
 
-    game_row = sel.iloc[0]
-    game_id = game_row["game_id"]
+    game_row = sel[0]
+    game_id = game_row.game_id
 
-    st.markdown("<div class='rowtitle'>Selected</div>", unsafe_allow_html=True)
-    st.info(f"{game_row['away']} @ {game_row['home']} - {game_row['league']} - {game_row['start_str']}")
-    st.write(game_row["about"])
-
-    within_24 = (game_row["start"] - datetime.now()) <= timedelta(hours=24)
-    deal_on = bool(within_24)
-    deal_pct = 20 if deal_on else 0
+    markdown("<div class='rowtitle'>Selected</div>", unsafe_allow_html=True)
+    st.info(f"{game_row.away} @ {game_row.home} - {game_row.league} - {game_row.start_str}")
+    st.write(game_row.about)
 
     if is_purchased(game_id):
         c1, c2 = st.columns(2)
         with c1:
             if st.button("Watch", key=f"selected_watch__{game_id}", use_container_width=True):
-                start_demo_playback(title=f"{game_row['away']} @ {game_row['home']}", league=game_row["league"])
+                start_demo_playback(game_id, title=f"{game_row.away} @ {game_row.home}", league=game_row.league)
                 toast("Starting demo playback...")
                 st.rerun()
         with c2:
-            if st.button("Close", key=f"selected_close__{game_id}", use_container_width=True):
-                st.session_state.active_game = None
-                st.rerun()
+            st.button("Close", key=f"selected_close__{game_id}", use_container_width=True,
+                      on_click=set_state, args=("active_game", None))
         social_sheet(game_row, section_key="selected_purchased")
     else:
-        checkout_sheet(game_row, section_key="selected", deal_on=deal_on, deal_pct=deal_pct)
+        checkout_sheet(game_row, section_key="selected", surface="selected")
         social_sheet(game_row, section_key="selected")
 
         c1, c2 = st.columns(2)
         with c1:
-            if st.button("Close", key=f"checkout_close__{game_id}", use_container_width=True):
-                st.session_state.active_game = None
-                st.rerun()
+            st.button("Close", key=f"checkout_close__{game_id}", use_container_width=True,
+                      on_click=set_state, args=("active_game", None))
         with c2:
             if st.button("Add $5", key=f"checkout_add5__{game_id}", use_container_width=True):
-                st.session_state.wallet = round(st.session_state.wallet + 5.0, 2)
+                credit_wallet(5.0)
                 toast("Wallet +$5.")
                 request_scroll("selected")
                 st.rerun()
 
-# ----------------------------
-# Now Playing (with anchor)
-# ----------------------------
-st.markdown("<div id='player_anchor'></div>", unsafe_allow_html=True)
+@st.fragment
+@region("cart")
+def cart_panel():
+    cart = st.session_state.cart
+    if not len(cart):
+        return
+    with phase("cart.price"):
+        items = cart_items(cart)
+    if not items:
+        return
+
+    total = sum(int(round(item.price * 100)) for item in items) / 100
+    markdown(card_renderer().cart(items, total), unsafe_allow_html=True)
 
-if st.session_state.now_playing:
-    vid = st.session_state.now_playing
-    st.markdown("<div class='rowtitle'>Now Playing</div>", unsafe_allow_html=True)
+    if wallet_balance() < total:
+        st.error("Not enough wallet balance for the cart (demo). Add funds in Profile.")
+    else:
+        # Same idempotency slot as checkout_sheet; any edit to the cart gives it a new token,
+        # so a changed cart is a new attempt.
+        key_prefix = f"cart__{cart.token}"
+        token = st.session_state.get("checkout_token")
+        if token is None or token[0] != key_prefix:
+            token = st.session_state.checkout_token = (key_prefix, uuid.uuid4().hex)
+        label = f"Check out {len(items)} game{'s' if len(items) != 1 else ''} ${total:,.2f}"
+        if st.button(label, key="cart_checkout", use_container_width=True):
+            with phase("cart.purchase"):
+                result = purchase_cart(items, key=token[1])
+            if result.status == "insufficient":
+                st.error("Not enough wallet balance (demo). Add funds in Profile.")
+                return
+            st.session_state.checkout_token = None
+            cart.clear()
+            toast(f"Purchased {len(result.entries)} games. Unlocked in Library." if result.status == "ok"
+                  else "Already unlocked. Find them in Library.")
+            st.rerun()
+    st.button("Clear cart", key="cart_clear", use_container_width=True, on_click=cart.clear)
+
+@st.fragment
+@region("player")
+def now_playing_panel():
+    if not st.session_state.now_playing:
+        return
+
+    playback = st.session_state.now_playing
+    raw = YOUTUBE_DEMOS.get(GAME_REFS.string(playback.league))
+    vid = {"title": GAME_REFS.string(playback.title), "url": raw, "embed": to_embed_url(raw) if raw else None}
+    markdown("<div class='rowtitle'>Now Playing</div>", unsafe_allow_html=True)
     st.info(f"{vid['title']} (demo playback)")
 
     if vid.get("embed"):
@@ -764,14 +1151,115 @@ if st.session_state.now_playing:
     else:
         st.warning("No demo video is set for this league. Add a URL in YOUTUBE_DEMOS for this league code.")
 
-    if st.button("Close Player", key="close_player", use_container_width=True):
-        st.session_state.now_playing = None
-        st.rerun()
+    st.button("Close Player", key="close_player", use_container_width=True,
+              on_click=set_state, args=("now_playing", None))
+
+# ----------------------------
+# Navigation
+# GAMEKEY_NAV=active (default) runs only the visible tab's code; =tabs keeps st.tabs,
+# which runs all four tab bodies on every rerun.
+# ----------------------------
+TABS = {"Home": home_tab, "Explore": explore_tab, "Library": library_tab, "Profile": profile_tab}
+TAB_WIDGET_KEYS = {
+    "Explore": ("explore_search", "explore_sport", "explore_league", "explore_max_price",
+                "explore_deals", "explore_deal_pct"),
+    "Profile": ("profile_name", "wallet_add_amt"),
+}
+
+def keep_widget_state(keys):
+    # Streamlit drops the state of widgets that weren't drawn this run; re-assigning the
+    # values keeps an inactive tab's search/filters so switching back is instant.
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+if os.environ.get("GAMEKEY_NAV", "active") == "tabs":
+    for tab, render_tab in zip(st.tabs(list(TABS)), TABS.values()):
+        with tab:
+            render_tab()
+else:
+    active_tab = st.radio("Section", list(TABS), horizontal=True, key="active_tab", label_visibility="collapsed")
+    for name, keys in TAB_WIDGET_KEYS.items():
+        if name != active_tab:
+            keep_widget_state(keys)
+    TABS[active_tab]()
+
+# ----------------------------
+# Selected / Checkout + Cart (with anchor)
+# ----------------------------
+markdown("<div id='selected_anchor'></div>", unsafe_allow_html=True)
+selected_panel()
+cart_panel()
+
+# ----------------------------
+# Now Playing (with anchor)
+# ----------------------------
+markdown("<div id='player_anchor'></div>", unsafe_allow_html=True)
+now_playing_panel()
 
 # Fire scroll (after anchors exist)
 run_scroll_if_requested()
 
-# Close phone frame
-st.markdown("</div></div>", unsafe_allow_html=True)
-
 st.caption("Demo only - No real payments/rights/streams - Prototype presentation.")
+
+# ----------------------------
+# Developer panel (?dev=1): rerun latency percentiles, last run's phases, exports
+# ----------------------------
+def dev_panel():
+    summary = profiler().summary()
+    with st.expander("Rerun profile (dev)", expanded=False):
+        runs = summary["runs"]
+        full = runs.get("full", {})
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Full run p50", f"{full.get('p50', 0) * 1000:.0f} ms")
+        m2.metric("Full run p99", f"{full.get('p99', 0) * 1000:.0f} ms")
+        m3.metric("Runs", sum(r["runs"] for r in runs.values()))
+        sessions = summary["sessions"]
+        st.caption(f"session_state: {sessions['count']} sessions, {sessions['bytes_total'] / 1024:,.1f} KB total, "
+                   f"p50 {sessions['bytes_p50'] / 1024:,.1f} KB, max {sessions['bytes_max'] / 1024:,.1f} KB; "
+                   f"{sessions['evicted']} shed after {sessions['idle_seconds'] / 60:,.0f} min idle"
+                   + (f" (shedding off: {sessions['shed_error']})" if sessions["shed_error"] else ""))
+        startup = summary["startup"]
+        st.caption("Startup (ms since process start): " + ", ".join(
+            f"{name} {ms:,.0f}" for name, ms in startup["milestones_ms"].items()) + "; steps: " + ", ".join(
+            f"{name} {ms:,.0f}" for name, ms in startup["steps_ms"].items()))
+        recs = recommender().stats()
+        st.caption(f"For You profiles: {recs['entries']:,} cached, {recs['hits']:,} hits / {recs['misses']:,} misses")
+        cards = card_renderer().stats()
+        st.caption(f"Card fragments: {cards['entries']:,} cached, {cards['hits']:,} hits / {cards['misses']:,} misses")
+        st.dataframe(
+            [{"kind": kind, "runs": r["runs"], "p50 ms": round(r["p50"] * 1000, 1),
+              "p90 ms": round(r["p90"] * 1000, 1), "p99 ms": round(r["p99"] * 1000, 1),
+              "markdown bytes p50": r["markdown_bytes_p50"]} for kind, r in sorted(runs.items())],
+            hide_index=True, width="stretch",
+        )
+        last = summary["last"]
+        if last:
+            st.caption(f"Last run ({last['kind']}, {last['status']}): {last['seconds'] * 1000:.1f} ms, "
+                       f"{last['markdown_bytes']:,} markdown bytes in {last['markdown_calls']} calls, "
+                       f"{last['widgets']} widgets")
+            st.dataframe(
+                [{"phase": name, "calls": p["calls"], "ms": round(p["seconds"] * 1000, 2)}
+                 for name, p in last["phases"].items()],
+                hide_index=True, width="stretch",
+            )
+        largest = session_registry().report(limit=5)
+        if largest:
+            st.dataframe(
+                [{"session": r["session_id"][:8], "user": r["user_id"], "KB": round(r["bytes"] / 1024, 1),
+                  "idle s": round(r["idle_seconds"])} for r in largest],
+                hide_index=True, width="stretch",
+            )
+        d1, d2 = st.columns(2)
+        with d1:
+            st.download_button("JSON", profiler().to_json(), file_name="gamekey-profile.json",
+                               mime="application/json", key="dev_export_json", width="stretch")
+        with d2:
+            st.download_button("Prometheus", profiler().to_prometheus(), file_name="gamekey-profile.prom",
+                               mime="text/plain", key="dev_export_prom", width="stretch")
+
+if PROFILING and (st.query_params.get("dev") == "1" or os.environ.get("GAMEKEY_DEV") == "1"):
+    dev_panel()
+
+end_run()
+track_session()
@@ -0,0 +1,4 @@
+# gamekey/__init__.py
+# GameKey core - shared, process-wide building blocks for the Streamlit app.
+# Nothing in here imports streamlit (bench.py only drives its AppTest harness); app.py owns the UI
+# and wires these in.
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+# gamekey/assets.py
+# League logos + sport poster art, built once per process and shared by all sessions.
+# - URIs are keyed by (league/sport, source file mtime) and rebuilt when the file changes
+# - Bounded LRU with byte accounting, hit/miss counters for the dev panel
+# - "static" mode writes each raster asset (PNG / JPEG / WebP) once to static/gk/ under a
+#   content-hashed name and hands out app/static/... URLs (browser-cacheable). Sport art is
+#   rasterized to WebP for it; SVG logos and badges stay data URIs, because Streamlit < 1.53
+#   serves app/static .svg as nosniff text/plain and <img> would show nothing. "inline" mode
+#   uses data URIs for everything
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO_DIR = os.path.join(ROOT_DIR, "assets", "logos")
+LOGO_EXTS = ("png", "svg", "jpg", "jpeg", "webp")
+
+# Optimized 1x/2x/3x variants written by `python -m gamekey.build_assets`.
+BUILD_DIR = os.path.join(ROOT_DIR, "assets", "build")
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+
+# Streamlit serves <app dir>/static/* at app/static/* when server.enableStaticServing is on.
+STATIC_DIR = os.path.join(ROOT_DIR, "static", "gk")
+STATIC_URL = "app/static/gk"
+STATIC_EXTS = ("png", "jpg", "webp")  # served with their real Content-Type by every supported Streamlit
+ASSET_MODES = ("static", "inline")
+
+# ----------------------------
+# Logos: local assets + fallback badge
+# Put files in: assets/logos/UCL.png, NBA.png, NFL.png, etc.
+# ----------------------------
+LEAGUE_COLORS = {
+    "UCL": ("#0b5fff", "#ffffff"),
+    "NBA": ("#ff2a5b", "#ffffff"),
+    "NFL": ("#00a3ff", "#ffffff"),
+    "MLS": ("#ff7a00", "#ffffff"),
+    "NWSL": ("#8a5cff", "#ffffff"),
+    "MLB": ("#00d18f", "#0b0b0f"),
+}
+
+MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml", "jpg": "image/jpeg", "webp": "image/webp"}
+
+def sniff_ext(data: bytes, fallback: str = "png") -> str:
+    # Trust the bytes, not the file name (assets/logos/NWSL.png is really an SVG).
+    if data.startswith(b"\x89PNG"):
+        return "png"
+    if data.startswith(b"\xff\xd8"):
+        return "jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    head = data[:256].lstrip().lower()
+    if head.startswith(b"<svg") or head.startswith(b"<?xml"):
+        return "svg"
+    return "jpg" if fallback == "jpeg" else fallback
+
+def bytes_to_data_uri(data: bytes, ext: str) -> str:
+    b64 = base64.b64encode(data).decode("utf-8")
+    return f"data:{MIME_TYPES.get(ext, 'image/png')};base64,{b64}"
+
+def read_asset(path: str):
+    # Returns (bytes, sniffed extension).
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, sniff_ext(data, os.path.splitext(path)[1].lower().lstrip("."))
+
+def file_to_data_uri(path: str) -> str:
+    return bytes_to_data_uri(*read_asset(path))
+
+def svg_badge(text: str, bg: str, fg: str) -> str:
+    return f"""
+    <svg xmlns="http://www.w3.org/2000/svg" width="22" height="22" viewBox="0 0 22 22">
+      <circle cx="11" cy="11" r="10" fill="{bg}" stroke="rgba(15,23,42,0.18)" stroke-width="1"/>
+      <text x="11" y="14" text-anchor="middle" font-family="Arial" font-size="8.5" font-weight="900" fill="{fg}">{text}</text>
+    </svg>
+    """
+
+def svg_to_data_uri(svg: str) -> str:
+    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode("utf-8")).decode("utf-8")
+
+def static_name(name: str) -> str:
+    # League names come from the catalog: keep only [A-Za-z0-9_-] in anything written to disk.
+    return re.sub(r"[^A-Za-z0-9_-]", "_", name)
+
+def publish_static(name: str, data: bytes, ext: str) -> str:
+    # Content-hashed filename: the URL changes whenever the bytes do, so browsers can cache forever.
+    if ext not in STATIC_EXTS:
+        raise ValueError(f"Can't serve .{ext} from app/static; expected one of {STATIC_EXTS}")
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f"{static_name(name)}.{digest}.{ext}"
+    path = os.path.join(STATIC_DIR, filename)
+    if not os.path.exists(path):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique per writer thread
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return f"{STATIC_URL}/{filename}"
+
+def find_logo(league: str):
+    # Returns (path, mtime_ns) of the first matching logo file, or (None, None).
+    for ext in LOGO_EXTS:
+        path = os.path.join(LOGO_DIR, f"{league}.{ext}")
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return path, stat.st_mtime_ns
+    return None, None
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def manifest_entry_fresh(info: dict, path: str, stat) -> bool:
+    # A fresh git checkout resets mtimes, so fall back to the content hash when they differ.
+    if stat.st_size != info.get("source_bytes"):
+        return False
+    if stat.st_mtime_ns == info.get("source_mtime_ns"):
+        return True
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest() == info.get("source_sha256")
+
+def league_badge_svg(league: str) -> str:
+    bg, fg = LEAGUE_COLORS.get(league, ("#0f172a", "#ffffff"))
+    return svg_badge(league, bg, fg)
+
+# ----------------------------
+# Sport background art (no external images needed)
+# One shape list per sport family, in 360x196 SVG user units; drawn as SVG (inline mode) or
+# rasterized to WebP (static mode: app/static serves .svg as text/plain before Streamlit 1.53).
+# ----------------------------
+ART_SIZE = (360, 196)
+ART_DENSITY = 2  # raster art is drawn at 2x for high-DPI screens
+FIELD = ("rect", 18, 14, 324, 168, 18)
+SPORT_ART = {
+    # family: (gradient from, gradient to, line opacity, label, shapes)
+    "soccer": ("#16a34a", "#14532d", 0.55, "SOCCER",
+               (FIELD, ("line", 180, 14, 180, 182), ("ring", 180, 98, 28))),
+    "basket": ("#f97316", "#7c2d12", 0.55, "BASKETBALL", (FIELD, ("ring", 180, 98, 30))),
+    "baseball": ("#2563eb", "#1e3a8a", 0.6, "BASEBALL",
+                 (("poly", (180, 168), (240, 108), (180, 48), (120, 108)), ("dot", 180, 108, 6))),
+    "football": ("#111827", "#020617", 0.55, "FOOTBALL", (FIELD,)),
+}
+FALLBACK_ART = ("#7c3aed", "#312e81", 0.5)
+
+def sport_art(sport: str, league: str = "") -> tuple:
+    # (gradient from, gradient to, line opacity, label, shapes) for a sport.
+    sport_key = (sport or "").lower()
+    for family, art in SPORT_ART.items():
+        if family in sport_key:
+            return art
+    return FALLBACK_ART + ((league or "SPORT").upper(), ())
+
+def _svg_shape(shape, accent: str) -> str:
+    kind, *args = shape
+    stroke = f'fill="none" stroke="{accent}" stroke-width="3"'
+    if kind == "rect":
+        x, y, w, h, r = args
+        return f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{r}" {stroke}/>'
+    if kind == "line":
+        x1, y1, x2, y2 = args
+        return f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{accent}" stroke-width="3"/>'
+    if kind == "ring":
+        cx, cy, r = args
+        return f'<circle cx="{cx}" cy="{cy}" r="{r}" {stroke}/>'
+    if kind == "poly":
+        return f'<polygon points="{" ".join(f"{x},{y}" for x, y in args)}" {stroke}/>'
+    cx, cy, r = args  # "dot"
+    return f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{accent}"/>'
+
+def sport_art_svg(sport: str, league: str = "") -> str:
+    bg1, bg2, opacity, label, shapes = sport_art(sport, league)
+    accent = f"rgba(255,255,255,{opacity})"
+    width, height = ART_SIZE
+    return f"""
+    <svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+      <defs>
+        <linearGradient id="g" x1="0" y1="0" x2="1" y2="1">
+          <stop offset="0" stop-color="{bg1}"/>
+          <stop offset="1" stop-color="{bg2}"/>
+        </linearGradient>
+      </defs>
+      <rect width="{width}" height="{height}" rx="18" fill="url(#g)"/>
+      {"".join(_svg_shape(shape, accent) for shape in shapes)}
+      <text x="20" y="180" font-size="14" font-weight="800" fill="rgba(255,255,255,0.7)">{label}</text>
+    </svg>
+    """
+
+def _rgb(color: str) -> tuple:
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+def sport_art_webp(sport: str, league: str = "", density: int = ART_DENSITY) -> bytes:
+    # The same art as sport_art_svg(), rasterized with Pillow (imported here: only static mode needs it).
+    import io
+
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    bg1, bg2, opacity, label, shapes = sport_art(sport, league)
+    width, height = ART_SIZE[0] * density, ART_SIZE[1] * density
+    # Diagonal gradient over the bounding box, like the SVG's x1=0 y1=0 x2=1 y2=1.
+    y, x = np.mgrid[0:height, 0:width]
+    t = ((x / (width - 1) + y / (height - 1)) / 2)[..., None]
+    start, end = np.array(_rgb(bg1)), np.array(_rgb(bg2))
+    img = Image.fromarray((start + (end - start) * t).astype("uint8"), "RGB").convert("RGBA")
+
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    accent, line = (255, 255, 255, round(255 * opacity)), 3 * density
+    for kind, *args in shapes:
+        if kind == "rect":
+            x0, y0, w, h, r = (v * density for v in args)
+            draw.rounded_rectangle((x0, y0, x0 + w, y0 + h), r, outline=accent, width=line)
+        elif kind == "line":
+            draw.line([v * density for v in args], fill=accent, width=line)
+        elif kind == "poly":
+            points = [(px * density, py * density) for px, py in args]
+            draw.line(points + points[:1], fill=accent, width=line, joint="curve")
+        else:  # "ring" / "dot"
+            cx, cy, r = (v * density for v in args)
+            box = (cx - r, cy - r, cx + r, cy + r)
+            if kind == "ring":
+                draw.ellipse(box, outline=accent, width=line)
+            else:
+                draw.ellipse(box, fill=accent)
+    draw.text((20 * density, 180 * density), label, fill=(255, 255, 255, 178),
+              font=ImageFont.load_default(size=14 * density), anchor="ls")
+    img = Image.alpha_composite(img, overlay)
+
+    mask = Image.new("L", img.size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, width - 1, height - 1), 18 * density, fill=255)
+    img.putalpha(mask)
+    out = io.BytesIO()
+    img.save(out, "WEBP", quality=85)
+    return out.getvalue()
+
+def art_key(sport: str, league: str = "") -> tuple:
+    # Only the fallback art depends on the league (it is used as the label).
+    sport_key = (sport or "").lower()
+    for family in SPORT_ART:
+        if family in sport_key:
+            return ("art", family)
+    return ("art", "", (league or "SPORT").upper())
+
+# ----------------------------
+# Process-wide asset cache
+# ----------------------------
+class _Entry:
+    __slots__ = ("value", "stamp", "checked", "size")
+
+    def __init__(self, value, stamp, checked: float, size: int):
+        self.value = value
+        self.stamp = stamp
+        self.checked = checked
+        self.size = size
+
+class AssetCache:
+    # Logo entries re-stat their source at most every `stat_interval` seconds, so a hot
+    # rerun is a dict lookup; an edited logo or a rebuilt manifest shows up on the next check.
+    def __init__(self, mode: str = "inline", max_bytes: int = 16 * 1024 * 1024, stat_interval: float = 2.0,
+                 manifest_path: str = MANIFEST_PATH):
+        if mode not in ASSET_MODES:
+            raise ValueError(f"Unknown asset mode {mode!r}; expected one of {ASSET_MODES}")
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.stat_interval = stat_interval
+        self.manifest_path = manifest_path
+        self._manifest = {}
+        self._manifest_stamp = None
+        self._manifest_checked = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.checked < self.stat_interval:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        return None
+
+    def _revalidate(self, key, stamp, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                entry.checked = now
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        return None
+
+    def _store(self, key, stamp, value, size: int, now: float):
+        entry = _Entry(value, stamp, now, size)
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            if entry.size > self.max_bytes:
+                return value
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+        return value
+
+    def _manifest_snapshot(self, now: float):
+        checked = self._manifest_checked
+        if checked is None or now - checked >= self.stat_interval:
+            try:
+                stamp = os.stat(self.manifest_path).st_mtime_ns
+            except OSError:
+                stamp = None
+            if stamp != self._manifest_stamp:
+                self._manifest = load_manifest(self.manifest_path) if stamp else {}
+                self._manifest_stamp = stamp
+            self._manifest_checked = now
+        return self._manifest, self._manifest_stamp
+
+    def _logo(self, league: str):
+        # Value is (src, srcset); srcset is only filled for built variants in static mode.
+        key = ("logo", league)
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is not None:
+            return entry.value
+
+        manifest, manifest_stamp = self._manifest_snapshot(now)
+        info = manifest.get("logos", {}).get(league)
+        stat = None
+        if info:
+            path = os.path.join(ROOT_DIR, info["source"])
+            try:
+                stat = os.stat(path)
+            except OSError:
+                info = None
+        if info:
+            stamp = ("manifest", manifest_stamp, stat.st_mtime_ns)
+        else:
+            path, mtime = find_logo(league)
+            stamp = (path, mtime)
+
+        entry = self._revalidate(key, stamp, now)
+        if entry is not None:
+            return entry.value
+
+        variants = info["variants"] if info and manifest_entry_fresh(info, path, stat) else None
+        value = self._build_logo(league, variants, path)
+        return self._store(key, stamp, value, len(value[0]) + len(value[1]), now)
+
+    def _uri(self, name: str, data: bytes, ext: str) -> str:
+        # Static mode publishes raster files only; everything else stays a data URI.
+        if self.mode == "static" and ext in STATIC_EXTS:
+            return publish_static(name, data, ext)
+        return bytes_to_data_uri(data, ext)
+
+    def _build_logo(self, league: str, variants, path):
+        if variants:
+            files = {density: os.path.join(ROOT_DIR, v["path"]) for density, v in variants.items()}
+            if self.mode == "inline":
+                # One crisp-enough inline copy; a srcset of data URIs would triple the payload.
+                return file_to_data_uri(files.get("2x") or files["1x"]), ""
+            if len(set(files.values())) == 1:
+                # Vector logo: the same file covers every density.
+                return self._uri(f"logo-{league}", *read_asset(files["1x"])), ""
+            urls = {}
+            for density, file_path in files.items():
+                urls[density] = self._uri(f"logo-{league}-{density}", *read_asset(file_path))
+            srcset = ", ".join(f"{url} {density}" for density, url in sorted(urls.items()))
+            return urls["1x"], srcset
+        if path:
+            return self._uri(f"logo-{league}", *read_asset(path)), ""
+        return svg_to_data_uri(league_badge_svg(league)), ""
+
+    def logo_uri(self, league: str) -> str:
+        return self._logo(league)[0]
+
+    def logo_srcset(self, league: str) -> str:
+        return self._logo(league)[1]
+
+    def art_uri(self, sport: str, league: str = "") -> str:
+        # Art is generated from code, so it never goes stale within a process. Static mode
+        # publishes it rasterized (WebP); inline mode embeds the SVG.
+        key = art_key(sport, league)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+        if self.mode == "static":
+            name = "art-" + "-".join(part for part in key[1:] if part).lower()
+            uri = publish_static(name, sport_art_webp(sport, league), "webp")
+        else:
+            uri = svg_to_data_uri(sport_art_svg(sport, league))
+        return self._store(key, None, uri, len(uri), time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+# gamekey/bench.py
+# Headless benchmark harness for full-script reruns, built on streamlit's AppTest:
+#   python -m gamekey.bench [--sizes 6,1000,50000] [--scenarios home,explore_typing] [--repeat 5]
+#                           [--baseline bench/baseline.json] [--save-baseline] [--tolerance 0.25]
+# - Catalog sizes: 6 is the built-in demo; larger sizes are synthetic SQLite catalogs in a temp dir
+# - Scenarios: cold start, Home rerun, Explore typing, Details -> Buy -> Confirm, Watch,
+#   Library with N purchases (N = the catalog size)
+# - Per scenario: p50/p90 wall time per rerun, peak Python memory (tracemalloc, separate pass),
+#   emitted element payload (serialized protos of the rendered tree)
+# - Compares p50 wall time against a saved baseline; exits 1 on regressions past --tolerance
+# Time is frozen with GAMEKEY_NOW so runs are comparable. This is the one module in the package
+# that imports streamlit, and only its testing API.
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from gamekey.assets import ROOT_DIR
+from gamekey.catalog import DEMO_GAMES
+from gamekey.ledger import CartItem, Ledger
+from gamekey.sources import CATALOG_COLUMNS, write_sqlite
+from gamekey.table import GameTable
+
+APP_PATH = os.path.join(ROOT_DIR, "app.py")
+BASELINE_PATH = os.path.join(ROOT_DIR, "bench", "baseline.json")
+BENCH_NOW = datetime(2026, 1, 10, 19, 0)
+SIZES = (6, 1_000, 50_000)
+SCENARIOS = ("cold_start", "home", "explore_typing", "checkout", "watch", "library")
+TYPING = ("k", "kn", "kni", "knic", "knick")
+NOISE_FLOOR_MS = 5.0  # smaller absolute slowdowns are never reported as regressions
+
+class BenchError(RuntimeError):
+    pass
+
+# ----------------------------
+# Catalogs
+# ----------------------------
+def synthetic_catalog(n: int, seed: int = 1, now: datetime = BENCH_NOW, chunk_size: int = 50_000):
+    # Yields GameTable chunks: the demo fixtures repeated with spread kickoffs and random prices.
+    rng = random.Random(seed)
+    for lo in range(0, n, chunk_size):
+        rows = []
+        for i in range(lo, min(n, lo + chunk_size)):
+            game = dict(DEMO_GAMES[i % len(DEMO_GAMES)])
+            game.update(game_id=f"GK-{i:06d}", start=now + timedelta(minutes=rng.randint(-3000, 60000)),
+                        base_price=round(rng.uniform(0.99, 9.99), 2))
+            rows.append(tuple(game[c] for c in CATALOG_COLUMNS))
+        yield GameTable.from_rows(rows)
+
+def catalog_spec(size: int, workdir: str) -> str:
+    if size <= len(DEMO_GAMES):
+        return "demo"
+    path = os.path.join(workdir, f"catalog-{size}.db")
+    if not os.path.exists(path):
+        write_sqlite(synthetic_catalog(size), path)
+    return f"sqlite:{path}"
+
+@contextmanager
+def app_env(size: int, workdir: str):
+    # Points app.py at this size's catalog + a scratch ledger, and drops process-wide caches
+    # (st.cache_resource is shared by every AppTest in this process).
+    import streamlit as st
+    from streamlit import config
+
+    # AppTest re-parses config (and resets the log level) on every run; keep bare-mode
+    # ScriptRunContext / deprecation chatter out of the report.
+    config.on_config_parsed(_quiet_logs, force_connect=True)
+    env = {
+        "GAMEKEY_CATALOG": catalog_spec(size, workdir),
+        "GAMEKEY_DB": os.path.join(workdir, f"ledger-{size}.db"),
+        "GAMEKEY_NOW": BENCH_NOW.isoformat(),
+    }
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    st.cache_resource.clear()
+    try:
+        yield dict(env, size=size)
+    finally:
+        st.cache_resource.clear()
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+# ----------------------------
+# AppTest helpers
+# ----------------------------
+def _quiet_logs():
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")
+
+def new_app(user: str = None):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    at.query_params["u"] = user or f"bench-{uuid.uuid4().hex[:8]}"
+    return at
+
+def payload_bytes(at) -> int:
+    # Serialized size of every element / block proto in the rendered tree.
+    total, stack = 0, [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            total += proto.ByteSize()
+        stack.extend(getattr(node, "children", {}).values())
+    return total
+
+def timed_run(at):
+    t = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - t
+    if at.exception:
+        raise BenchError(at.exception[0].message)
+    return seconds, payload_bytes(at)
+
+def button_key(at, prefix: str) -> str:
+    for b in at.button:
+        if b.key and b.key.startswith(prefix):
+            return b.key
+    raise BenchError(f"no button with key prefix {prefix!r}")
+
+def buy_first_trending(at):
+    # Details -> Confirm on the first Trending card; returns (game_id, [(s, bytes), ...]).
+    game_id = button_key(at, "details_home_trending__").split("__", 1)[1]
+    at.button(key=f"details_home_trending__{game_id}").click()
+    samples = [timed_run(at)]
+    at.button(key=f"confirm_selected__checkout__{game_id}").click()
+    samples.append(timed_run(at))
+    return game_id, samples
+
+# ----------------------------
+# Scenarios: each returns a list of (seconds, payload bytes) samples
+# ----------------------------
+def scenario_cold_start(ctx, repeat: int):
+    import streamlit as st
+
+    samples = []
+    for _ in range(repeat):
+        st.cache_resource.clear()
+        samples.append(timed_run(new_app()))
+    return samples
+
+def scenario_home(ctx, repeat: int):
+    at = new_app()
+    timed_run(at)
+    return [timed_run(at) for _ in range(repeat)]
+
+def scenario_explore_typing(ctx, repeat: int):
+    at = new_app()
+    timed_run(at)
+    at.radio(key="active_tab").set_value("Explore")
+    timed_run(at)
+    samples = []
+    for _ in range(repeat):
+        for text in TYPING:
+            at.text_input(key="explore_search").set_value(text)
+            samples.append(timed_run(at))
+        at.text_input(key="explore_search").set_value("")
+        timed_run(at)
+    return samples
+
+def scenario_checkout(ctx, repeat: int):
+    # One sample per flow: Details (the card's Buy does the same) + Confirm.
+    samples = []
+    for _ in range(repeat):
+        at = new_app()
+        timed_run(at)
+        _, steps = buy_first_trending(at)
+        samples.append((sum(s for s, _ in steps), steps[-1][1]))
+    return samples
+
+def scenario_watch(ctx, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        at = new_app()
+        timed_run(at)
+        game_id, _ = buy_first_trending(at)
+        at.button(key=f"watch_home_trending__{game_id}").click()
+        samples.append(timed_run(at))
+    return samples
+
+def scenario_library(ctx, repeat: int):
+    user = f"bench-lib-{uuid.uuid4().hex[:8]}"
+    n = ctx["size"]
+    ledger = Ledger(ctx["GAMEKEY_DB"])
+    ledger.credit(user, n)
+    ledger.purchase_many(user, [CartItem(f"GK-LIB-{i:05d}", 0.99, title=f"Away {i} @ Home {i}",
+                                         league=("NBA", "NFL", "MLB")[i % 3], platform="ESPN",
+                                         start="Sat, Jan 10 - 07:00 PM", tier="Standard") for i in range(n)])
+    ledger.close()
+    at = new_app(user)
+    timed_run(at)
+    at.radio(key="active_tab").set_value("Library")
+    timed_run(at)
+    return [timed_run(at) for _ in range(repeat)]
+
+SCENARIO_FUNCS = {name: globals()[f"scenario_{name}"] for name in SCENARIOS}
+
+# ----------------------------
+# Runner + baseline
+# ----------------------------
+def summarize(samples, peak_bytes: int = None) -> dict:
+    ms = sorted(s * 1000 for s, _ in samples)
+    return {
+        "samples": len(ms),
+        "wall_ms_p50": round(statistics.median(ms), 2),
+        "wall_ms_p90": round(ms[min(len(ms) - 1, int(len(ms) * 0.9))], 2),
+        "peak_kb": None if peak_bytes is None else round(peak_bytes / 1024, 1),
+        "payload_bytes": int(statistics.median(b for _, b in samples)),
+    }
+
+def run(sizes=SIZES, scenarios=SCENARIOS, repeat: int = 5, memory: bool = True, log=print) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="gamekey-bench-") as workdir:
+        for size in sizes:
+            with app_env(size, workdir) as ctx:
+                for name in scenarios:
+                    func = SCENARIO_FUNCS[name]
+                    samples = func(ctx, repeat)
+                    peak = None
+                    if memory:
+                        # Separate single pass: tracemalloc slows everything down.
+                        tracemalloc.start()
+                        try:
+                            func(ctx, 1)
+                            peak = tracemalloc.get_traced_memory()[1]
+                        finally:
+                            tracemalloc.stop()
+                    results[f"{size}/{name}"] = summary = summarize(samples, peak)
+                    peak_kb = "-" if peak is None else f"{summary['peak_kb']:,.0f}"
+                    log(f"{size:>6} {name:<15} p50 {summary['wall_ms_p50']:>8.1f} ms  "
+                        f"peak {peak_kb:>9} KB  payload {summary['payload_bytes']:>8,} B")
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    # Returns report lines; lines for regressions start with "REGRESSION".
+    lines = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if base is None:
+            lines.append(f"new        {key}")
+            continue
+        a, b = base["wall_ms_p50"], cur["wall_ms_p50"]
+        change = (b - a) / a if a else 0.0
+        worse = change > tolerance and b - a > NOISE_FLOOR_MS
+        lines.append(f"{'REGRESSION' if worse else 'ok':<10} {key:<24} {a:>8.1f} -> {b:>8.1f} ms ({change:+.0%})  "
+                     f"payload {base['payload_bytes']:,} -> {cur['payload_bytes']:,} B")
+    return lines
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+def save_baseline(path: str, results: dict):
+    merged = {**load_baseline(path), **results}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"now": BENCH_NOW.isoformat(), "python": sys.version.split()[0], "results": merged}, f,
+                  indent=2, sort_keys=True)
+        f.write("\n")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Headless rerun benchmarks for app.py (AppTest).")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="catalog sizes, comma-separated")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="timed reruns (or flows) per scenario")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results into the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown (0.25 = +25%%)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    results = run(sizes, scenarios, repeat=args.repeat, memory=not args.no_memory)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved: {os.path.relpath(args.baseline)}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"no baseline at {os.path.relpath(args.baseline)} (run with --save-baseline)")
+        return 0
+    lines = compare(results, baseline, args.tolerance)
+    print("\n".join(lines))
+    return 1 if any(line.startswith("REGRESSION") for line in lines) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# gamekey/build_assets.py
+# Offline logo build step:
+#   python -m gamekey.build_assets [--src assets/logos] [--out assets/build] [--strict]
+# - Validates assets/logos against the LEAGUE_COLORS league set (stray files are skipped)
+# - Writes downscaled 1x/2x/3x variants for the 22x22 .logo slot + manifest.json
+# - Prints a bytes-saved report per logo
+# The app reads the manifest in one lookup (see AssetCache._logo) instead of probing extensions.
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+
+from PIL import Image, UnidentifiedImageError
+
+from gamekey.assets import BUILD_DIR, LEAGUE_COLORS, LOGO_DIR, LOGO_EXTS, ROOT_DIR, sniff_ext
+
+LOGO_SIZE = 22  # CSS px, matches .logo in app.py
+DENSITIES = (1, 2, 3)
+MANIFEST_VERSION = 1
+
+def rel(path: str) -> str:
+    return os.path.relpath(path, ROOT_DIR).replace(os.sep, "/")
+
+def scan_logos(src_dir: str, leagues):
+    # Returns ({league: path}, issues). Extension priority follows LOGO_EXTS, like the runtime probe.
+    found, issues = {}, []
+    for name in sorted(os.listdir(src_dir)):
+        path = os.path.join(src_dir, name)
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower().lstrip(".")
+        if name.startswith(".") or not os.path.isfile(path):
+            continue
+        if ext not in LOGO_EXTS:
+            issues.append(f"skip {name}: unsupported extension")
+        elif stem not in leagues:
+            issues.append(f"skip {name}: not a known league ({', '.join(sorted(leagues))})")
+        elif stem in found:
+            kept = os.path.basename(found[stem])
+            if LOGO_EXTS.index(ext) < LOGO_EXTS.index(os.path.splitext(kept)[1].lower().lstrip(".")):
+                found[stem] = path
+                kept = name
+            issues.append(f"duplicate logo for {stem}: using {kept}")
+        else:
+            found[stem] = path
+    for league in sorted(set(leagues) - set(found)):
+        issues.append(f"missing logo for {league}: the app will draw a badge")
+    return found, issues
+
+def png_bytes(img: Image.Image) -> bytes:
+    out = io.BytesIO()
+    img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+def build_variants(league: str, data: bytes, ext: str, out_dir: str, size: int):
+    # Returns {"1x": {...}, "2x": {...}, "3x": {...}} relative to ROOT_DIR.
+    os.makedirs(out_dir, exist_ok=True)
+    if ext == "svg":
+        # Vector: one file serves every density.
+        path = os.path.join(out_dir, f"{league}.svg")
+        with open(path, "wb") as f:
+            f.write(data)
+        entry = {"path": rel(path), "bytes": len(data), "width": size, "height": size}
+        return {f"{d}x": dict(entry) for d in DENSITIES}
+
+    src = Image.open(io.BytesIO(data))
+    src = src.convert("RGBA")
+    variants = {}
+    for d in DENSITIES:
+        img = src.copy()
+        img.thumbnail((size * d, size * d), Image.LANCZOS)
+        out = png_bytes(img)
+        path = os.path.join(out_dir, f"{league}@{d}x.png")
+        with open(path, "wb") as f:
+            f.write(out)
+        variants[f"{d}x"] = {"path": rel(path), "bytes": len(out), "width": img.width, "height": img.height}
+    return variants
+
+def build(src_dir: str = LOGO_DIR, out_dir: str = BUILD_DIR, size: int = LOGO_SIZE, leagues=None) -> dict:
+    leagues = set(leagues or LEAGUE_COLORS)
+    found, issues = scan_logos(src_dir, leagues)
+    logos_dir = os.path.join(out_dir, "logos")
+    logos = {}
+    for league, path in sorted(found.items()):
+        with open(path, "rb") as f:
+            data = f.read()
+        stat = os.stat(path)
+        declared = os.path.splitext(path)[1].lower().lstrip(".").replace("jpeg", "jpg")
+        ext = sniff_ext(data, declared)
+        if ext != declared:
+            issues.append(f"{os.path.basename(path)} is really {ext.upper()} content")
+        try:
+            variants = build_variants(league, data, ext, logos_dir, size)
+        except (UnidentifiedImageError, OSError) as e:
+            issues.append(f"skip {os.path.basename(path)}: {e}")
+            continue
+        logos[league] = {
+            "source": rel(path),
+            "source_bytes": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "source_sha256": hashlib.sha256(data).hexdigest(),
+            "format": ext,
+            "variants": variants,
+        }
+    manifest = {"version": MANIFEST_VERSION, "size": size, "logos": logos, "issues": issues}
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, "manifest.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, os.path.join(out_dir, "manifest.json"))
+    return manifest
+
+def report(manifest: dict) -> str:
+    # "Served" is the 2x variant: what a typical retina phone downloads for a 22px slot.
+    lines = [f"{'league':<6} {'source':>9} {'1x':>7} {'2x':>7} {'3x':>7} {'saved@2x':>9}"]
+    total_src = total_served = 0
+    for league, info in sorted(manifest["logos"].items()):
+        v = info["variants"]
+        served = v["2x"]["bytes"]
+        total_src += info["source_bytes"]
+        total_served += served
+        lines.append(
+            f"{league:<6} {info['source_bytes']:>9,} {v['1x']['bytes']:>7,} {v['2x']['bytes']:>7,} "
+            f"{v['3x']['bytes']:>7,} {info['source_bytes'] - served:>9,}"
+        )
+    lines.append(f"{'total':<6} {total_src:>9,} {'':>7} {total_served:>7,} {'':>7} {total_src - total_served:>9,}")
+    for issue in manifest["issues"]:
+        lines.append(f"! {issue}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build optimized league logo variants + manifest.")
+    parser.add_argument("--src", default=LOGO_DIR, help="source logo directory")
+    parser.add_argument("--out", default=BUILD_DIR, help="output directory (manifest.json + logos/)")
+    parser.add_argument("--size", type=int, default=LOGO_SIZE, help="1x size in CSS px")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero if validation found issues")
+    args = parser.parse_args(argv)
+
+    manifest = build(args.src, args.out, args.size)
+    print(report(manifest))
+    return 1 if args.strict and manifest["issues"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
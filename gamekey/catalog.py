@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# gamekey/catalog.py
+# Shared, versioned catalog layer.
+# - The catalog source is opened once per process and refreshed on a TTL or an explicit bump()
+# - Relative kickoff times (start_offset) are resolved at query time, per time bucket,
+#   so cached results never go stale
+# - Results are GameTables (gamekey/table.py): immutable, so every session shares them as-is
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from gamekey.clock import Clock
+from gamekey.sources import CATALOG_COLUMNS, CatalogQuery, CatalogSource
+from gamekey.table import Game, GameTable  # noqa: F401  (Game: re-exported for app.py)
+
+# ----------------------------
+# Demo catalog (kickoffs are relative to "now")
+# ----------------------------
+DEMO_GAMES = [
+    {"game_id": "GK-7001", "sport": "Soccer", "league": "UCL", "home": "Manchester City", "away": "Galatasaray",
+     "start_offset": timedelta(hours=7), "platform": "Paramount+", "market": "US", "base_price": 2.99,
+     "tags": ["Decision Day", "High stakes", "Prime time"], "about": "A must-win night. One game. One key."},
+
+    {"game_id": "GK-7002", "sport": "Basketball", "league": "NBA", "home": "Knicks", "away": "Celtics",
+     "start_offset": timedelta(days=1, hours=2), "platform": "ESPN", "market": "US", "base_price": 1.99,
+     "tags": ["MSG energy", "Playoff race", "Big matchup"], "about": "Classic rivalry energy in the Garden."},
+
+    {"game_id": "GK-7003", "sport": "American Football", "league": "NFL", "home": "Eagles", "away": "Cowboys",
+     "start_offset": timedelta(days=2, hours=4), "platform": "FOX Sports", "market": "US", "base_price": 3.99,
+     "tags": ["Rivalry", "Sunday", "Must watch"], "about": "Two brands. One statement game."},
+
+    {"game_id": "GK-7004", "sport": "Soccer", "league": "MLS", "home": "NYCFC", "away": "Inter Miami",
+     "start_offset": timedelta(days=3, hours=1), "platform": "Apple TV", "market": "US", "base_price": 2.49,
+     "tags": ["Stars", "Weekend", "Big draw"], "about": "When the stars come to town, you tap in."},
+
+    {"game_id": "GK-7005", "sport": "Soccer", "league": "NWSL", "home": "Gotham FC", "away": "Angel City",
+     "start_offset": timedelta(days=4, hours=3), "platform": "Prime Video", "market": "US", "base_price": 1.49,
+     "tags": ["Womens sports", "Community", "Rising"], "about": "Elite talent. Big moment. Easy access."},
+
+    {"game_id": "GK-7006", "sport": "Baseball", "league": "MLB", "home": "Yankees", "away": "Red Sox",
+     "start_offset": timedelta(days=5, hours=2), "platform": "MLB.TV", "market": "US", "base_price": 3.49,
+     "tags": ["Classic rivalry", "Prime series", "History"], "about": "A rivalry you do not need a subscription for."},
+]
+
+def demo_catalog() -> GameTable:
+    # Kickoffs stay relative (seconds from the time bucket) until a scan resolves them.
+    return GameTable.from_rows(
+        (tuple(int(g["start_offset"].total_seconds()) if c == "start" else g[c] for c in CATALOG_COLUMNS)
+         for g in DEMO_GAMES),
+        relative=True,
+    )
+
+def records(table: GameTable) -> list:
+    # Game records for just the rows a card / sheet shows.
+    return table.records()
+
+# ----------------------------
+# Versioned store
+# ----------------------------
+class CatalogStore:
+    # Wraps a CatalogSource (see gamekey/sources.py). Query results are cached per
+    # (version, time bucket, query) in a bounded LRU; only `limit` rows are ever materialized.
+    # The version bumps when the source's stamp() changes (checked every `ttl` seconds) or on bump();
+    # sources without a stamp (None) only change on bump().
+    # Time buckets come from `clock` (gamekey/clock.py); pass a FixedClock for deterministic runs.
+    def __init__(self, source: CatalogSource, ttl: float = 300.0, bucket_seconds: int = 60, max_queries: int = 256,
+                 clock: Clock = None):
+        self.source = source
+        self.ttl = ttl
+        self.clock = clock or Clock(bucket_seconds)
+        self.bucket_seconds = self.clock.bucket_seconds
+        self.max_queries = max_queries
+        self.version = 1
+        self._stamp = source.stamp()
+        self._checked_at = time.monotonic()
+        self._results = OrderedDict()
+        self._facets = None
+        self._lock = threading.Lock()
+
+    def bump(self):
+        # Explicit refresh: every session sees the new version on its next query.
+        with self._lock:
+            if hasattr(self.source, "reload"):
+                self.source.reload()
+            self._new_version()
+
+    def _new_version(self):
+        # Caller holds the lock.
+        self.version += 1
+        self._results.clear()
+        self._facets = None
+
+    def _refresh(self):
+        # Caller holds the lock.
+        if self.ttl and time.monotonic() - self._checked_at >= self.ttl:
+            self._checked_at = time.monotonic()
+            stamp = self.source.stamp()
+            # None = the source can't tell (in-memory tables): no change; bump() refreshes those.
+            if stamp is not None and stamp != self._stamp:
+                self._stamp = stamp
+                if hasattr(self.source, "reload"):
+                    self.source.reload()
+                self._new_version()
+
+    @property
+    def relative_starts(self) -> bool:
+        # Kickoffs move with the time bucket (demo catalog): time windows can be evaluated
+        # against the bucket the data was scanned at.
+        return self.source.relative_starts
+
+    def current_version(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self.version
+
+    def scan(self, q: CatalogQuery = CatalogQuery(), now: datetime = None):
+        # Raw streaming access for index builders; nothing is cached here.
+        return self.source.scan(q, self.bucket(now))
+
+    def bucket(self, now: datetime = None) -> datetime:
+        return self.clock.bucket(now)
+
+    def query(self, q: CatalogQuery = CatalogQuery(), now: datetime = None) -> GameTable:
+        anchor = self.bucket(now)
+        with self._lock:
+            self._refresh()
+            key = (self.version, anchor, q)
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+        if result is None:
+            result = materialize(self.source.scan(q, anchor), q.limit)
+            with self._lock:
+                if key[0] == self.version:
+                    self._results[key] = result
+                    while len(self._results) > self.max_queries:
+                        self._results.popitem(last=False)
+        return result
+
+    def lookup(self, game_ids, now: datetime = None) -> GameTable:
+        return self.query(CatalogQuery(game_ids=tuple(game_ids)), now=now)
+
+    def facets(self, now: datetime = None) -> dict:
+        with self._lock:
+            self._refresh()
+            facets = self._facets
+        if facets is None:
+            facets = self.source.facets(self.bucket(now))
+            with self._lock:
+                self._facets = facets
+        return facets
+
+def materialize(chunks, limit: int = None) -> GameTable:
+    # Streams chunks, keeping only the `limit` earliest kickoffs (ties: scan order).
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        if limit and len(parts) > 1:
+            parts = [GameTable.concat(parts).sort().head(limit)]
+    best = GameTable.concat(parts).sort()
+    return best.head(limit) if limit else best
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# gamekey/clock.py
+# One clock for everything time-dependent.
+# - "now" is quantized into buckets, so caches keyed by the bucket stay valid for a whole bucket
+# - TimeWindows evaluates every game's kickoff against the bucket once (numpy), giving the
+#   started / within-24h / upcoming states that rails and deal rules read
+# - The time source is injectable: FixedClock makes runs deterministic for tests and benchmarks
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+def to_seconds(values) -> np.ndarray:
+    # Kickoffs as int64 epoch seconds; accepts seconds already (SearchIndex.starts) or datetimes.
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype("int64", copy=False)
+    return values.astype("datetime64[s]").astype("int64")
+
+class Clock:
+    def __init__(self, bucket_seconds: int = 60, source=None):
+        self.bucket_seconds = bucket_seconds
+        self._source = source or datetime.now  # returns a naive local datetime
+
+    def now(self) -> datetime:
+        return self._source()
+
+    def time(self) -> float:
+        # Epoch seconds, for storage timestamps (Ledger).
+        return self.now().timestamp()
+
+    def bucket(self, now: datetime = None) -> datetime:
+        ts = int((now or self.now()).timestamp())
+        return datetime.fromtimestamp(ts - ts % self.bucket_seconds)
+
+class FixedClock(Clock):
+    # Frozen at `at` until set() / advance(); e.g. GAMEKEY_NOW=2026-01-01T20:00 in app.py.
+    def __init__(self, at: datetime, bucket_seconds: int = 60):
+        super().__init__(bucket_seconds, source=lambda: self.at)
+        self.at = at
+
+    def set(self, at: datetime):
+        self.at = at
+
+    def advance(self, delta: timedelta):
+        self.at += delta
+
+# ----------------------------
+# Time windows
+# ----------------------------
+@dataclass(frozen=True)
+class TimeWindow:
+    # A game is in the window when after < (kickoff - now) <= until; None = unbounded.
+    name: str
+    after: timedelta = None
+    until: timedelta = None
+
+WINDOWS = (
+    TimeWindow("started", until=timedelta(0)),
+    TimeWindow("within_24h", until=timedelta(hours=24)),  # includes games already on
+    TimeWindow("upcoming", after=timedelta(0)),
+)
+
+class TimeWindows:
+    # Window masks for a set of kickoffs at one bucket. Ranks are positions in `starts`
+    # (SearchIndex ranks when built from an index, so they're in kickoff order).
+    def __init__(self, starts, now: datetime, windows=WINDOWS):
+        self.now = now
+        until_kickoff = to_seconds(starts) - int(np.datetime64(now, "s").astype("int64"))
+        self._masks = {}
+        for w in windows:
+            mask = np.ones(len(until_kickoff), dtype=bool)
+            if w.after is not None:
+                mask &= until_kickoff > int(w.after.total_seconds())
+            if w.until is not None:
+                mask &= until_kickoff <= int(w.until.total_seconds())
+            self._masks[w.name] = mask
+        self._ranks = {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self._masks.values()), ()))
+
+    def mask(self, name: str) -> np.ndarray:
+        return self._masks[name]
+
+    def ranks(self, name: str, limit: int = None) -> list:
+        ranks = self._ranks.get(name)
+        if ranks is None:
+            ranks = self._ranks[name] = np.flatnonzero(self._masks[name]).tolist()
+        return ranks[:limit] if limit else ranks
+
+    def states(self, rank: int) -> tuple:
+        return tuple(name for name, mask in self._masks.items() if mask[rank])
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# gamekey/entitlements.py
+# Per-session cache of what a user owns: the game_id set + the Library, in purchase order.
+# - Loaded from the ledger once, then every is_purchased() check is a lookup in memory
+# - Write-through: a successful purchase appends its LibraryEntry right away, so the
+#   Library never re-reads or re-sorts; pages are slices from the newest end
+# - Version-stamped: at most every `check_interval` seconds, one primary-key read of the
+#   wallet version tells us whether another tab / device wrote; only then is the set reloaded
+# - Compact: a purchase is a GameRefs int, codes for what was bought (title, league, platform,
+#   kickoff text as shown then), tier code, cents + epoch seconds in typed arrays (~33 bytes);
+#   the strings themselves live once per process in GAME_REFS
+
+import bisect
+import time
+from array import array
+
+from gamekey.ledger import LibraryEntry
+from gamekey.session import GAME_REFS
+
+DETAILS = ("title", "league", "platform", "start")  # per purchase, from its ledger row
+
+class Entitlements:
+    __slots__ = ("user_id", "check_interval", "version", "checked", "loads",
+                 "_refs", "_details", "_tiers", "_cents", "_times", "_owned")
+    games = GAME_REFS  # shared, not per session
+
+    def __init__(self, user_id: str, check_interval: float = 1.0):
+        self.user_id = user_id
+        self.check_interval = check_interval
+        self.version = None  # ledger wallet version the set was loaded at; None = stale
+        self.checked = 0.0
+        self.loads = 0
+        self._clear()
+
+    def _clear(self):
+        self._refs = array("i")   # GameRefs ref per purchase, oldest first (append order)
+        self._details = array("I")  # DETAILS string codes per purchase, flattened
+        self._tiers = array("B")
+        self._cents = array("i")
+        self._times = array("d")  # purchased_at, epoch seconds
+        self._owned = array("i")  # sorted refs, for membership
+
+    def __contains__(self, game_id: str) -> bool:
+        ref = self.games.get(game_id)
+        if ref is None:
+            return False
+        i = bisect.bisect_left(self._owned, ref)
+        return i < len(self._owned) and self._owned[i] == ref
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def signature(self, recent: int = None) -> tuple:
+        # Cache key for what the user owns: the sorted refs themselves (not a hash of them), so
+        # equal sets - and only equal sets - give equal keys, for any user. With `recent`, the
+        # last `recent` purchases (as a set) are part of it too, once they aren't the whole set.
+        recent_refs = b""
+        if recent is not None and len(self._refs) > recent:
+            recent_refs = array("i", sorted(self._refs[len(self._refs) - recent:])).tobytes()
+        return self._owned.tobytes(), recent_refs
+
+    def refresh(self, ledger, now: float = None):
+        now = time.monotonic() if now is None else now
+        if self.version is not None and now - self.checked < self.check_interval:
+            return
+        self.checked = now
+        if self.version is None or ledger.version(self.user_id) != self.version:
+            self.version, entries = ledger.library(self.user_id)
+            self._clear()
+            for entry in entries:
+                self._append(entry)
+            self.loads += 1
+
+    def _append(self, entry: LibraryEntry):
+        ref = self.games.ref(entry.game_id)
+        self._refs.append(ref)
+        self._details.extend(self.games.code(getattr(entry, name)) for name in DETAILS)
+        self._tiers.append(self.games.tier(entry.tier))
+        self._cents.append(int(round(entry.price_paid * 100)))
+        self._times.append(entry.purchased_at)
+        bisect.insort(self._owned, ref)
+
+    def entry(self, i: int) -> LibraryEntry:
+        title, league, platform, start = (self.games.string(c) for c in self._details[i * 4:i * 4 + 4])
+        return LibraryEntry(self.games.game_id(self._refs[i]), title, league, platform, start,
+                            self.games.tier_name(self._tiers[i]), self._cents[i] / 100, self._times[i])
+
+    def page(self, page: int, page_size: int) -> list:
+        # Newest first; only the requested window is materialized.
+        end = len(self._refs) - page * page_size
+        return [self.entry(i) for i in range(max(0, end) - 1, max(0, end - page_size) - 1, -1)]
+
+    def grant(self, entry: LibraryEntry, version: int):
+        self.grant_all((entry,), version)
+
+    def grant_all(self, entries, version: int):
+        # Write-through after a purchase or a cart checkout (one version bump for the batch).
+        # If the version skipped ahead, someone else wrote in between, so reload on the next refresh.
+        for entry in entries:
+            if entry.game_id not in self:
+                self._append(entry)
+        self.version = version if self.version is not None and version == self.version + 1 else None
+
+    def invalidate(self):
+        self.version = None
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+# gamekey/ledger.py
+# Durable wallet + purchase store shared by every session.
+# - SQLite in WAL mode: readers never block the single writer, so is_purchased / balance
+#   lookups keep flowing while another session checks out
+# - A small connection pool (one connection per in-flight call, never shared between threads)
+# - Checkout is one BEGIN IMMEDIATE transaction: balance check, debit and grant commit together;
+#   a cart of several games is the same single transaction (purchase_many), all or nothing
+# - Idempotency keys: replaying the key of a completed charge (double-clicked Confirm)
+#   returns "duplicate" instead of charging again
+# Money is stored in integer cents.
+
+import os
+import queue
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from gamekey.assets import ROOT_DIR
+
+DEFAULT_DB = os.path.join(ROOT_DIR, "data", "gamekey.db")
+STARTING_BALANCE = 12.00
+IN_CHUNK = 900   # ids per IN (...) query, under SQLite's host-parameter limit on older builds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallets (
+    user_id TEXT PRIMARY KEY,
+    balance_cents INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS purchases (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    game_id TEXT NOT NULL,
+    title TEXT, league TEXT, platform TEXT, start TEXT, tier TEXT,
+    price_cents INTEGER NOT NULL,
+    purchased_at REAL NOT NULL,
+    UNIQUE (user_id, game_id)
+);
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def to_cents(amount: float) -> int:
+    return int(round(float(amount) * 100))
+
+class LibraryEntry(NamedTuple):
+    game_id: str
+    title: str
+    league: str
+    platform: str
+    start: str            # kickoff as shown on the card
+    tier: str
+    price_paid: float
+    purchased_at: float   # epoch seconds
+
+ENTRY_COLUMNS = "game_id, title, league, platform, start, tier, price_cents, purchased_at"
+
+def _entry(row) -> LibraryEntry:
+    return LibraryEntry(*row[:6], row[6] / 100, row[7])
+
+class CartItem(NamedTuple):
+    # One game in a batch checkout, priced by the caller (tier included).
+    game_id: str
+    price: float
+    title: str = None
+    league: str = None
+    platform: str = None
+    start: str = None
+    tier: str = None
+
+class PurchaseResult(NamedTuple):
+    status: str      # "ok", "duplicate" (key replayed), "owned" or "insufficient"
+    balance: float   # wallet balance after the call
+    version: int     # wallet version after the call (see Ledger.version)
+    entry: LibraryEntry = None  # the new library entry when status == "ok"
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("ok", "duplicate")
+
+class BatchResult(NamedTuple):
+    status: str      # "ok", "duplicate" (key replayed), "owned" (every game already) or "insufficient"
+    balance: float
+    version: int
+    entries: tuple = ()   # new library entries in cart order when status == "ok"
+    skipped: tuple = ()   # game_ids left out (not charged) because they were already owned
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("ok", "duplicate")
+
+class Ledger:
+    def __init__(self, path: str = DEFAULT_DB, pool_size: int = 8, busy_timeout: float = 5.0,
+                 starting_balance: float = STARTING_BALANCE, clock=time.time):
+        # clock: epoch-seconds source for purchased_at / key ages (Clock.time in the app).
+        self.path = path
+        self.clock = clock
+        self.busy_timeout = busy_timeout
+        self.starting_cents = to_cents(starting_balance)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    # ----------------------------
+    # Connection pool
+    # ----------------------------
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; writes open their own BEGIN IMMEDIATE so the write lock is taken up
+        # front (no deferred-transaction upgrade deadlocks between sessions).
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at each WAL checkpoint; safe with WAL
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def _write(self):
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ----------------------------
+    # Wallet
+    # ----------------------------
+    def _balance_cents(self, conn, user_id: str) -> int:
+        row = conn.execute("SELECT balance_cents FROM wallets WHERE user_id = ?", (user_id,)).fetchone()
+        return self.starting_cents if row is None else row[0]
+
+    def _ensure_wallet(self, conn, user_id: str):
+        conn.execute("INSERT OR IGNORE INTO wallets (user_id, balance_cents) VALUES (?, ?)",
+                     (user_id, self.starting_cents))
+
+    def _replayed(self, conn, key: str):
+        if key is None:
+            return None
+        row = conn.execute("SELECT status FROM idempotency WHERE key = ?", (key,)).fetchone()
+        return row and row[0]
+
+    def _remember(self, conn, key: str, user_id: str, status: str):
+        if key is not None:
+            conn.execute("INSERT INTO idempotency (key, user_id, status, created_at) VALUES (?, ?, ?, ?)",
+                         (key, user_id, status, self.clock()))
+
+    def balance(self, user_id: str) -> float:
+        with self._conn() as conn:
+            return self._balance_cents(conn, user_id) / 100
+
+    def _version(self, conn, user_id: str) -> int:
+        row = conn.execute("SELECT version FROM wallets WHERE user_id = ?", (user_id,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def version(self, user_id: str) -> int:
+        # Bumped by every write for this user (purchase, credit, reset).
+        with self._conn() as conn:
+            return self._version(conn, user_id)
+
+    def credit(self, user_id: str, amount: float, key: str = None) -> float:
+        with self._write() as conn:
+            if self._replayed(conn, key) is None:
+                self._ensure_wallet(conn, user_id)
+                conn.execute("UPDATE wallets SET balance_cents = balance_cents + ?, version = version + 1 "
+                             "WHERE user_id = ?", (to_cents(amount), user_id))
+                self._remember(conn, key, user_id, "ok")
+            return self._balance_cents(conn, user_id) / 100
+
+    # ----------------------------
+    # Purchases
+    # ----------------------------
+    def purchase(self, user_id: str, game_id: str, price: float, key: str = None, **details) -> PurchaseResult:
+        # Atomic debit-and-grant. `details`: title, league, platform, start, tier.
+        result = self.purchase_many(user_id, [CartItem(game_id, price, **details)], key=key)
+        return PurchaseResult(result.status, result.balance, result.version,
+                              result.entries[0] if result.entries else None)
+
+    def purchase_many(self, user_id: str, items, key: str = None) -> BatchResult:
+        # One transaction for a whole cart of CartItems: one balance check against the total, one
+        # debit (one version bump), every grant. Games already owned are skipped, not charged;
+        # the rest commit together or, if the wallet can't cover them, not at all.
+        unique = {}
+        for item in items:
+            unique.setdefault(item.game_id, item)
+        items = list(unique.values())
+        with self._write() as conn:
+            if self._replayed(conn, key) is not None:
+                return BatchResult("duplicate", self._balance_cents(conn, user_id) / 100,
+                                   self._version(conn, user_id))
+            self._ensure_wallet(conn, user_id)
+            owned = self._owned(conn, user_id, [item.game_id for item in items])
+            todo = [item for item in items if item.game_id not in owned]
+            total = sum(to_cents(item.price) for item in todo)
+            entries = ()
+            if not todo:
+                status = "owned"
+            elif self._balance_cents(conn, user_id) < total:
+                status = "insufficient"
+            else:
+                status = "ok"
+                conn.execute("UPDATE wallets SET balance_cents = balance_cents - ?, version = version + 1 "
+                             "WHERE user_id = ?", (total, user_id))
+                now = self.clock()
+                rows = [(item.game_id, item.title, item.league, item.platform, item.start, item.tier,
+                         to_cents(item.price), now) for item in todo]
+                conn.executemany(f"INSERT INTO purchases (user_id, {ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 [(user_id,) + row for row in rows])
+                entries = tuple(_entry(row) for row in rows)
+                # Only charges are remembered: a refused attempt can be retried with the same key.
+                self._remember(conn, key, user_id, status)
+            return BatchResult(status, self._balance_cents(conn, user_id) / 100, self._version(conn, user_id),
+                               entries, tuple(item.game_id for item in items if item.game_id in owned))
+
+    def _owned(self, conn, user_id: str, ids: list) -> set:
+        # The subset of `ids` the user owns, in chunks so a large cart stays under the parameter limit.
+        owned = set()
+        for i in range(0, len(ids), IN_CHUNK):
+            chunk = ids[i:i + IN_CHUNK]
+            owned.update(row[0] for row in conn.execute(
+                f"SELECT game_id FROM purchases WHERE user_id = ? AND game_id IN ({','.join('?' * len(chunk))})",
+                [user_id] + chunk))
+        return owned
+
+    def owns(self, user_id: str, game_id: str) -> bool:
+        # Served by the UNIQUE (user_id, game_id) index.
+        with self._conn() as conn:
+            return conn.execute("SELECT 1 FROM purchases WHERE user_id = ? AND game_id = ?",
+                                (user_id, game_id)).fetchone() is not None
+
+    def library(self, user_id: str):
+        # (version, [LibraryEntry] oldest first) read from one snapshot, for entitlement caches.
+        with self._conn() as conn:
+            conn.execute("BEGIN")
+            try:
+                version = self._version(conn, user_id)
+                rows = conn.execute(f"SELECT {ENTRY_COLUMNS} FROM purchases WHERE user_id = ? ORDER BY seq",
+                                    (user_id,)).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        return version, [_entry(r) for r in rows]
+
+    def reset(self, user_id: str):
+        with self._write() as conn:
+            conn.execute("DELETE FROM purchases WHERE user_id = ?", (user_id,))
+            self._ensure_wallet(conn, user_id)
+            conn.execute("UPDATE wallets SET balance_cents = ?, version = version + 1 WHERE user_id = ?",
+                         (self.starting_cents, user_id))
+
+    def prune_keys(self, older_than: float = 86400.0):
+        # Idempotency keys only need to outlive a double click / retry.
+        with self._write() as conn:
+            conn.execute("DELETE FROM idempotency WHERE created_at < ?", (self.clock() - older_than,))
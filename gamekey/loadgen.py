@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+# gamekey/loadgen.py
+# Offline multi-session load generator + capacity report:
+#   python -m gamekey.loadgen [--users 1,5,10,25] [--duration 30] [--size 1000] [--think 1,3]
+#                             [--slo-ms 500] [--url http://127.0.0.1:8501] [--json report.json]
+# - Starts app.py under `streamlit run` on a local port (or targets --url) with a throwaway
+#   ledger, a fixed clock (GAMEKEY_NOW) and the bench catalogs (6 = demo, larger = synthetic)
+# - Every simulated user is a real websocket session speaking Streamlit's protobuf protocol,
+#   following a click path: browse Home (Details), buy (topping up when short), watch,
+#   search Explore keystroke by keystroke, back to Home
+# - Per concurrency level: throughput (reruns/s), client-side rerun latency p50/p90/p99 per
+#   action, server CPU (% of one core) + RSS from /proc, st.session_state bytes per session
+#   from the app's profiler export
+# - Capacity = the largest level whose p90 stays within --slo-ms
+# - --cold N: scale-from-zero instead - N fresh servers, each timed from spawn to healthy, then
+#   one first visit to its first element / first card / finished run, + the app's own startup
+#   breakdown (gamekey/startup.py); --startup lazy|eager picks the app's startup mode
+# Only localhost traffic; the websocket client is `websockets` (a streamlit dependency).
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from gamekey.bench import APP_PATH, BENCH_NOW, catalog_spec
+from gamekey.catalog import DEMO_GAMES
+from gamekey.profiler import quantile
+
+LEVELS = (1, 5, 10, 25)
+SEARCH_TERMS = sorted({g[side] for g in DEMO_GAMES for side in ("home", "away")})
+
+# ----------------------------
+# Local server + /proc sampling
+# ----------------------------
+@contextmanager
+def app_server(port: int, size: int, workdir: str, env: dict = None):
+    # `streamlit run app.py` with its own ledger / catalog / profiler export; yields (proc, export path).
+    export = os.path.join(workdir, "profile.json")
+    env = dict(os.environ, **(env or {}),
+               GAMEKEY_CATALOG=catalog_spec(size, workdir),
+               GAMEKEY_DB=os.path.join(workdir, "ledger.db"),
+               GAMEKEY_NOW=BENCH_NOW.isoformat(),
+               GAMEKEY_PROFILE_EXPORT=export,
+               GAMEKEY_PROFILE_INTERVAL="1")
+    cmd = [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.port", str(port),
+           "--server.address", "127.0.0.1", "--server.headless", "true", "--server.fileWatcherType", "none",
+           "--browser.gatherUsageStats", "false"]
+    with open(os.path.join(workdir, "server.log"), "wb") as log:
+        proc = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT, cwd=os.path.dirname(APP_PATH))
+        try:
+            wait_healthy(f"http://127.0.0.1:{port}", proc)
+            yield proc, export
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+def wait_healthy(base: str, proc=None, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode} (see server.log)")
+        try:
+            with urllib.request.urlopen(f"{base}/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server at {base} not healthy after {timeout:.0f}s")
+
+class ProcStats:
+    # CPU seconds + RSS of one pid from /proc (Linux); every reading is None elsewhere.
+    TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def __init__(self, pid: int = None):
+        self.pid = pid
+
+    def cpu_seconds(self):
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self.TICKS  # utime + stime
+        except (OSError, TypeError, IndexError):
+            return None
+
+    def rss_bytes(self):
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, TypeError):
+            pass
+        return None
+
+async def sample_cpu(stats: ProcStats, out: list, interval: float = 1.0):
+    # Appends CPU % of one core per interval until cancelled.
+    prev, t = stats.cpu_seconds(), time.perf_counter()
+    while prev is not None:
+        await asyncio.sleep(interval)
+        cur, now = stats.cpu_seconds(), time.perf_counter()
+        if cur is None:
+            return
+        out.append(100.0 * (cur - prev) / (now - t))
+        prev, t = cur, now
+
+# ----------------------------
+# Simulated browser session
+# ----------------------------
+class Session:
+    # Speaks the same BackMsg / ForwardMsg protocol as the frontend: every rerun carries the
+    # current widget values, a click is a one-shot trigger, and widgets inside a fragment
+    # rerun only that fragment (unless the app calls st.rerun()).
+    def __init__(self, url: str, user: str):
+        self.url = url
+        self.user = user
+        self.ws = None
+        self.widgets = {}  # user key -> (element id, fragment id)
+        self.values = {}   # user key -> string value (radio / text input)
+        self.samples = []  # (action, seconds, bytes received)
+        self.timeline = {}  # last rerun: seconds to its first element / first poster card
+
+    async def __aenter__(self):
+        import websockets
+
+        self.ws = await websockets.connect(f"{self.url}/_stcore/stream", max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    def find(self, prefix: str) -> list:
+        return [key for key in self.widgets if key.startswith(prefix)]
+
+    async def rerun(self, action: str, click: str = None, changed: str = None):
+        # `click`: a button key; `changed`: the key whose value was just edited in self.values.
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        from streamlit.runtime.state.common import user_key_from_element_id
+
+        msg = BackMsg()
+        run = msg.rerun_script
+        run.query_string = f"u={self.user}"
+        for key, value in self.values.items():
+            if key in self.widgets:
+                run.widget_states.widgets.append(WidgetState(id=self.widgets[key][0], string_value=value))
+        if click is not None:
+            run.widget_states.widgets.append(WidgetState(id=self.widgets[click][0], trigger_value=True))
+        # A widget inside a fragment reruns only that fragment.
+        fragment_id = self.widgets.get(click or changed, ("", ""))[1]
+        run.fragment_id = fragment_id
+
+        t = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        seen, nbytes, full = {}, 0, not fragment_id
+        self.timeline = {}
+        while True:
+            raw = await self.ws.recv()
+            nbytes += len(raw)
+            fm = ForwardMsg()
+            fm.ParseFromString(raw)
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element = fm.delta.new_element
+                which = element.WhichOneof("type")
+                self.timeline.setdefault("first_element", time.perf_counter() - t)
+                if which == "markdown" and 'class="poster"' in element.markdown.body:
+                    self.timeline.setdefault("first_card", time.perf_counter() - t)
+                element_id = getattr(getattr(element, which), "id", "") if which else ""
+                if element_id:
+                    seen[user_key_from_element_id(element_id)] = (element_id, fm.delta.fragment_id)
+            elif kind == "script_finished":
+                if fm.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    seen, full = {}, True  # st.rerun(): a full run follows
+                    continue
+                break
+        self.timeline["finished"] = time.perf_counter() - t
+        self.samples.append((action, self.timeline["finished"], nbytes))
+        if full:
+            self.widgets = seen
+        else:
+            self.widgets.update(seen)
+
+async def user_journey(session: Session, rng: random.Random, deadline: float, think):
+    # Home -> Details -> Buy (top up if short) -> Watch -> Explore search -> Home, until the deadline.
+    async def pause():
+        await asyncio.sleep(rng.uniform(*think))
+        return time.monotonic() < deadline
+
+    await session.rerun("open")
+    while await pause():
+        cards = session.find("details_home_")
+        if cards:
+            card = rng.choice(cards)
+            game_id = card.split("__", 1)[1]
+            await session.rerun("details", click=card)
+            if not await pause():
+                break
+            if not session.find(f"confirm_selected__checkout__{game_id}") and session.find(f"checkout_add5__{game_id}"):
+                await session.rerun("topup", click=f"checkout_add5__{game_id}")
+            confirm = session.find(f"confirm_selected__checkout__{game_id}")
+            if confirm:
+                await session.rerun("buy", click=confirm[0])
+                if not await pause():
+                    break
+            watch = session.find("watch_home_") + session.find(f"selected_watch__{game_id}")
+            if watch:
+                await session.rerun("watch", click=rng.choice(watch))
+                if not await pause():
+                    break
+            if session.find("close_player"):
+                await session.rerun("close_player", click="close_player")
+
+        session.values["active_tab"] = "Explore"
+        await session.rerun("tab", changed="active_tab")
+        term = rng.choice(SEARCH_TERMS).lower()
+        for n in range(1, min(len(term), 5) + 1):
+            session.values["explore_search"] = term[:n]
+            await session.rerun("search", changed="explore_search")
+            await asyncio.sleep(rng.uniform(0.1, 0.3))  # typing speed
+        if not await pause():
+            break
+        session.values.pop("explore_search", None)
+        session.values["active_tab"] = "Home"
+        await session.rerun("tab", changed="active_tab")
+
+async def run_level(url: str, users: int, duration: float, think, ramp: float, seed: int, stats: ProcStats) -> dict:
+    deadline = time.monotonic() + duration
+    sessions, errors, cpu = [], [], []
+
+    async def one(i: int):
+        await asyncio.sleep(ramp * i / max(1, users))
+        try:
+            async with Session(url, f"load-{seed}-{i:04d}") as session:
+                sessions.append(session)
+                await user_journey(session, random.Random(seed * 100_003 + i), deadline, think)
+        except Exception as exc:  # one broken session is a data point, not the end of the run
+            errors.append(f"{type(exc).__name__}: {exc}")
+
+    sampler = asyncio.ensure_future(sample_cpu(stats, cpu))
+    t = time.perf_counter()
+    rss_before = stats.rss_bytes()
+    await asyncio.gather(*(one(i) for i in range(users)))
+    elapsed = time.perf_counter() - t
+    sampler.cancel()
+    return summarize_level(users, elapsed, [s for session in sessions for s in session.samples], errors, cpu,
+                           rss_before, stats.rss_bytes())
+
+# ----------------------------
+# Report
+# ----------------------------
+def latency_ms(seconds: list) -> dict:
+    ordered = sorted(seconds)
+    return {f"p{int(q * 100)}": round(quantile(ordered, q) * 1000, 1) for q in (0.5, 0.9, 0.99)}
+
+def summarize_level(users, elapsed, samples, errors, cpu, rss_before, rss_after) -> dict:
+    actions = {}
+    for action, seconds, _ in samples:
+        actions.setdefault(action, []).append(seconds)
+    return {
+        "users": users,
+        "seconds": round(elapsed, 1),
+        "reruns": len(samples),
+        "reruns_per_s": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": latency_ms([s for _, s, _ in samples]),
+        "kb_per_rerun": round(sum(b for *_, b in samples) / max(1, len(samples)) / 1024, 1),
+        "actions": {a: {"reruns": len(xs), **latency_ms(xs)} for a, xs in sorted(actions.items())},
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "cpu_pct_mean": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "cpu_pct_max": round(max(cpu), 1) if cpu else None,
+        "rss_mb": round(rss_after / 2**20, 1) if rss_after else None,
+        "rss_mb_delta": round((rss_after - rss_before) / 2**20, 1) if rss_after and rss_before else None,
+    }
+
+def read_export(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def capacity(levels: list, slo_ms: float) -> dict:
+    ok = [lv for lv in levels if lv["errors"] == 0 and lv["latency_ms"]["p90"] <= slo_ms]
+    best = max(ok, key=lambda lv: lv["users"]) if ok else None
+    saturated = next((lv["users"] for lv in levels if (lv["cpu_pct_mean"] or 0) >= 90), None)
+    return {"slo_ms_p90": slo_ms, "max_users": best["users"] if best else 0,
+            "reruns_per_s": best["reruns_per_s"] if best else 0.0, "cpu_saturated_at_users": saturated}
+
+def format_report(report: dict) -> str:
+    lines = [f"{'users':>5} {'reruns/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'KB/run':>7} "
+             f"{'cpu%':>6} {'cpu% max':>8} {'rss MB':>7} {'errors':>6}"]
+    for lv in report["levels"]:
+        lat = lv["latency_ms"]
+        lines.append(f"{lv['users']:>5} {lv['reruns_per_s']:>9.2f} {lat['p50']:>8.1f} {lat['p90']:>8.1f} "
+                     f"{lat['p99']:>8.1f} {lv['kb_per_rerun']:>7.1f} {lv['cpu_pct_mean'] or 0:>6.1f} "
+                     f"{lv['cpu_pct_max'] or 0:>8.1f} {lv['rss_mb'] or 0:>7.1f} {lv['errors']:>6}")
+    last = report["levels"][-1] if report["levels"] else None
+    if last:
+        lines.append("p90 ms by action at %d users: %s" % (
+            last["users"], ", ".join(f"{a} {s['p90']:.0f}" for a, s in last["actions"].items())))
+    sessions = report.get("server", {}).get("sessions")
+    if sessions:
+        lines.append(f"session_state: {sessions['count']} sessions, p50 {sessions['bytes_p50'] / 1024:,.1f} KB, "
+                     f"max {sessions['bytes_max'] / 1024:,.1f} KB")
+    cap = report["capacity"]
+    lines.append(f"capacity: {cap['max_users']} concurrent users at p90 <= {cap['slo_ms_p90']:.0f} ms "
+                 f"({cap['reruns_per_s']:.1f} reruns/s)"
+                 + (f"; CPU saturated from {cap['cpu_saturated_at_users']} users" if cap["cpu_saturated_at_users"]
+                    else ""))
+    return "\n".join(lines)
+
+async def run(url: str, levels, duration: float, think, ramp: float, seed: int, stats: ProcStats,
+              export: str = None, log=print) -> dict:
+    results = []
+    for users in levels:
+        level = await run_level(url, users, duration, think, ramp, seed + users, stats)
+        results.append(level)
+        log(f"{users:>5} users: {level['reruns_per_s']:.2f} reruns/s, p90 {level['latency_ms']['p90']:.0f} ms, "
+            f"cpu {level['cpu_pct_mean'] or 0:.0f}%, errors {level['errors']}")
+    server = {}
+    if export:
+        # The profiler exports on the first run after its interval; nudge it with one more session.
+        await asyncio.sleep(1.1)
+        async with Session(url, "load-probe") as probe:
+            await probe.rerun("open")
+        server = read_export(export)
+    return {"levels": results, "server": {"sessions": server.get("sessions"), "runs": server.get("runs")}}
+
+# ----------------------------
+# Cold start (scale-from-zero)
+# ----------------------------
+COLD_STEPS = ("healthy", "first_element", "first_card", "finished")
+
+async def first_visit(url: str, user: str) -> dict:
+    async with Session(url, user) as session:
+        await session.rerun("open")
+    return session.timeline
+
+def cold_start(size: int, port: int, workdir: str, probes: int, startup: str, log=print) -> dict:
+    # Per probe: spawn -> /_stcore/health answers ("healthy"), then from the first visit's rerun
+    # request: first element, first poster card, run finished. "to_first_card" adds the two.
+    catalog_spec(size, workdir)  # written once, outside the timings
+    rows, server = [], {}
+    for i in range(probes):
+        t = time.perf_counter()
+        with app_server(port, size, workdir, env={"GAMEKEY_STARTUP": startup}) as (proc, export):
+            row = {"healthy": time.perf_counter() - t}
+            row.update(asyncio.run(first_visit(f"ws://127.0.0.1:{port}", f"cold-{i}")))
+            # The export is written by the run after its interval; that run also sees the warm milestone.
+            time.sleep(1.1)
+            asyncio.run(first_visit(f"ws://127.0.0.1:{port}", f"cold-{i}-probe"))
+            server = read_export(export).get("startup") or {}
+        row["to_first_card"] = row["healthy"] + row.get("first_card", row["finished"])
+        rows.append(row)
+        log(f"probe {i + 1}/{probes}: " + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in row.items()))
+    steps = COLD_STEPS + ("to_first_card",)
+    return {"startup": startup, "size": size, "probes": probes,
+            "ms_p50": {k: round(quantile(sorted(r[k] for r in rows if k in r), 0.5) * 1000, 1) for k in steps},
+            "server": server}
+
+def format_cold(report: dict) -> str:
+    p50 = report["ms_p50"]
+    lines = [f"cold start ({report['startup']}, {report['size']:,} games, p50 of {report['probes']}): "
+             + ", ".join(f"{k} {p50[k]:,.0f} ms" for k in COLD_STEPS),
+             f"scale-from-zero to first card: {p50['to_first_card']:,.0f} ms"]
+    server = report["server"]
+    if server:
+        lines.append("server (ms since process start): " + ", ".join(
+            f"{k} {v:,.0f}" for k, v in sorted(server["milestones_ms"].items(), key=lambda kv: kv[1])))
+        lines.append("startup steps (ms): " + ", ".join(f"{k} {v:,.0f}" for k, v in server["steps_ms"].items()))
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline multi-session load test + capacity report for app.py.")
+    parser.add_argument("--users", default=",".join(map(str, LEVELS)), help="concurrency levels, comma-separated")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    parser.add_argument("--think", default="1,3", help="think time range between clicks, seconds (min,max)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which a level's sessions start")
+    parser.add_argument("--size", type=int, default=1_000, help="catalog size for the spawned server")
+    parser.add_argument("--port", type=int, default=8599, help="port for the spawned server")
+    parser.add_argument("--url", help="target an already running instance (http://host:port) instead")
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="p90 rerun latency target for capacity")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--cold", type=int, metavar="N", help="measure N cold starts instead of load levels")
+    parser.add_argument("--startup", choices=("lazy", "eager"), default="lazy", help="app startup mode (GAMEKEY_STARTUP)")
+    args = parser.parse_args(argv)
+    if args.cold and args.url:
+        parser.error("--cold spawns its own servers; it cannot target --url")
+
+    levels = [int(u) for u in args.users.split(",") if u]
+    think = tuple(float(x) for x in args.think.split(","))
+    if len(think) != 2:
+        parser.error("--think takes min,max")
+
+    def go(url, stats, export=None):
+        return asyncio.run(run(url, levels, args.duration, think, args.ramp, args.seed, stats, export))
+
+    if args.cold:
+        with tempfile.TemporaryDirectory(prefix="gamekey-cold-") as workdir:
+            report = cold_start(args.size, args.port, workdir, args.cold, args.startup)
+        print(format_cold(report))
+    elif args.url:
+        base = args.url.rstrip("/")
+        wait_healthy(base)
+        report = go(base.replace("http", "ws", 1), ProcStats())
+    else:
+        with tempfile.TemporaryDirectory(prefix="gamekey-load-") as workdir:
+            with app_server(args.port, args.size, workdir, env={"GAMEKEY_STARTUP": args.startup}) as (proc, export):
+                report = go(f"ws://127.0.0.1:{args.port}", ProcStats(proc.pid), export)
+    if not args.cold:
+        report["capacity"] = capacity(report["levels"], args.slo_ms)
+        report["config"] = {"users": levels, "duration": args.duration, "think": think,
+                            "size": None if args.url else args.size, "url": args.url, "seed": args.seed}
+        print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
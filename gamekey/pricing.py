@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# gamekey/pricing.py
+# Pricing engine: effective price = base price x market x best matching deal, plus tier add-ons.
+# - Deals are a declarative rule table (DEAL_RULES) instead of per-surface if/else
+# - Prices are computed for a whole candidate set in one numpy pass, in integer cents
+#   (round half up), so cards, checkout and the Explore price filter always agree
+# - Time conditions name a clock window ("within_24h"), evaluated once per bucket by TimeWindows
+# - app.py caches a PriceBook per (catalog version, time bucket, surface, deal percent)
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from gamekey.clock import TimeWindows
+
+# ----------------------------
+# Rule tables
+# ----------------------------
+@dataclass(frozen=True)
+class DealRule:
+    name: str
+    surface: str                 # where the deal shows: "trending", "explore", "selected", ...
+    pct: int = None              # percent off; None = the caller's deal_pct (Explore slider)
+    window: str = None           # only games in this clock window (see gamekey/clock.py WINDOWS)
+    league: str = None
+    market: str = None
+
+DEAL_RULES = (
+    DealRule("trending-tonight", surface="trending", pct=20),
+    DealRule("explore-deals", surface="explore"),
+    DealRule("kickoff-24h", surface="selected", pct=20, window="within_24h"),
+)
+
+# Access tiers: name -> add-on in cents, in display order.
+TIERS = (
+    ("Standard", 0),
+    ("Plus (24h replay)", 100),
+    ("Party (watch link)", 200),
+)
+
+# Market multiplier in basis points (10_000 = 1.0); unknown markets pay list price.
+MARKET_BP = {"US": 10_000}
+
+def to_cents(amount) -> np.ndarray:
+    return np.rint(np.asarray(amount, dtype="float64") * 100).astype("int64")
+
+# ----------------------------
+# Engine
+# ----------------------------
+class PricingEngine:
+    def __init__(self, rules=DEAL_RULES, tiers=TIERS, market_bp=None):
+        self.rules = tuple(rules)
+        self.tiers = tuple(tiers)
+        self.market_bp = dict(MARKET_BP if market_bp is None else market_bp)
+
+    def deal_pcts(self, surface: str, windows: TimeWindows, leagues, markets, deal_pct: int = 0) -> np.ndarray:
+        # Best (largest) matching deal per game; rules don't stack.
+        n = len(leagues)
+        best = np.zeros(n, dtype="int64")
+        for rule in self.rules:
+            if rule.surface != surface:
+                continue
+            pct = deal_pct if rule.pct is None else rule.pct
+            if not pct:
+                continue
+            hit = np.ones(n, dtype=bool)
+            if rule.window is not None:
+                hit &= windows.mask(rule.window)
+            if rule.league is not None:
+                hit &= np.asarray(leagues) == rule.league
+            if rule.market is not None:
+                hit &= np.asarray(markets) == rule.market
+            best = np.where(hit, np.maximum(best, pct), best)
+        return best
+
+    def price_cents(self, base_prices, windows: TimeWindows, leagues, markets, surface: str, deal_pct: int = 0):
+        # Returns (effective price in cents, deal percent), both int64 arrays.
+        pcts = self.deal_pcts(surface, windows, leagues, markets, deal_pct)
+        bp = np.array([self.market_bp.get(m, 10_000) for m in markets], dtype="int64")
+        scaled = to_cents(base_prices) * bp * (100 - pcts)  # cents x 1e6
+        return (scaled + 500_000) // 1_000_000, pcts
+
+    def tier_prices(self, price: float) -> dict:
+        cents = int(round(price * 100))
+        return {name: (cents + add) / 100 for name, add in self.tiers}
+
+# ----------------------------
+# Price book: effective prices for a whole catalog version
+# ----------------------------
+class PriceBook:
+    # Aligned with SearchIndex ranks (kickoff order); `windows` is TimeWindows over index.starts.
+    # `key` identifies the book for caches.
+    def __init__(self, index, engine: PricingEngine, windows: TimeWindows, surface: str, deal_pct: int = 0,
+                 key=None):
+        self.key = key if key is not None else (surface, deal_pct, windows.now)
+        self._rank = index.rank_of
+        self.cents, self.pcts = engine.price_cents(index.prices, windows, index.leagues, index.markets,
+                                                   surface, deal_pct)
+        self._under = {}
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    def quote(self, game_id: str):
+        # (effective price, deal percent), or None if the game isn't in this catalog version.
+        rank = self._rank().get(game_id)
+        if rank is None:
+            return None
+        return int(self.cents[rank]) / 100, int(self.pcts[rank])
+
+    def ranks_under(self, max_price: float) -> list:
+        # Sorted ranks whose effective price is <= max_price (for SearchIndex.search).
+        cap = int(round(max_price * 100))
+        ranks = self._under.get(cap)
+        if ranks is None:
+            ranks = self._under[cap] = np.flatnonzero(self.cents <= cap).tolist()
+        return ranks
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# gamekey/profiler.py
+# Rerun profiler.
+# - RunProfile: one script run (or fragment rerun): inclusive time + call count per phase,
+#   HTML bytes sent through st.markdown, widget count
+# - Profiler: process-wide aggregate over the last `window` runs -> p50/p90/p99 per run kind,
+#   per-phase totals, plus session accounting (gamekey/session.py SessionRegistry) and the
+#   cold-start breakdown (gamekey/startup.py StartupReport) when wired in;
+#   exported as JSON or Prometheus text (textfile-collector friendly)
+# app.py decides what a phase is (tab bodies, rails, cards, logo lookups, checkout, player).
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+def quantile(sorted_values, q: float) -> float:
+    # Nearest-rank on an already sorted list.
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+def deep_sizeof(obj, _seen=None) -> int:
+    # Approximate retained size: sys.getsizeof over containers, __dict__ and __slots__,
+    # counting each object once. Classes, modules and functions are shared, not counted.
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen or isinstance(obj, (type, type(sys), type(deep_sizeof))):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name), seen)
+    return size
+
+class RunProfile:
+    __slots__ = ("kind", "started", "touched", "seconds", "phases", "md_bytes", "md_calls", "widgets", "status")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = self.touched = time.perf_counter()
+        self.seconds = None
+        self.phases = {}   # name -> [calls, seconds]
+        self.md_bytes = 0
+        self.md_calls = 0
+        self.widgets = None
+        self.status = "running"
+
+    def add(self, name: str, seconds: float):
+        self.touched = time.perf_counter()
+        slot = self.phases.get(name)
+        if slot is None:
+            self.phases[name] = [1, seconds]
+        else:
+            slot[0] += 1
+            slot[1] += seconds
+
+    def markdown(self, nbytes: int):
+        self.touched = time.perf_counter()
+        self.md_bytes += nbytes
+        self.md_calls += 1
+
+    def finish(self, widgets: int = None, status: str = "ok", at: float = None):
+        # `at`: perf_counter() the run actually ended (e.g. its last activity), default now.
+        if self.seconds is None:
+            self.seconds = (time.perf_counter() if at is None else at) - self.started
+            self.widgets = widgets
+            self.status = status
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "status": self.status,
+            "seconds": self.seconds,
+            "markdown_bytes": self.md_bytes,
+            "markdown_calls": self.md_calls,
+            "widgets": self.widgets,
+            "phases": {name: {"calls": c, "seconds": s}
+                       for name, (c, s) in sorted(self.phases.items(), key=lambda kv: -kv[1][1])},
+        }
+
+class Profiler:
+    def __init__(self, window: int = 1000, export_path: str = None, export_interval: float = 15.0,
+                 sessions=None, startup=None):
+        self.window = window
+        self.sessions = sessions  # anything with summary() -> dict (SessionRegistry)
+        self.startup = startup    # same, for StartupReport
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self._runs = {}        # kind -> deque of run seconds
+        self._bytes = {}       # kind -> deque of markdown bytes per run
+        self._counts = {}      # kind -> (runs, total seconds) since start
+        self._phases = {}      # name -> [calls, seconds] since start
+        self._last = None
+        self._exported = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, run: RunProfile):
+        with self._lock:
+            self._runs.setdefault(run.kind, deque(maxlen=self.window)).append(run.seconds)
+            self._bytes.setdefault(run.kind, deque(maxlen=self.window)).append(run.md_bytes)
+            n, total = self._counts.get(run.kind, (0, 0.0))
+            self._counts[run.kind] = (n + 1, total + run.seconds)
+            for name, (calls, seconds) in run.phases.items():
+                slot = self._phases.setdefault(name, [0, 0.0])
+                slot[0] += calls
+                slot[1] += seconds
+            self._last = run
+            due = self.export_path and time.monotonic() - self._exported >= self.export_interval
+            if due:
+                self._exported = time.monotonic()
+        if due:
+            self.write(self.export_path)
+
+    def summary(self) -> dict:
+        with self._lock:
+            kinds = {}
+            for kind, runs in self._runs.items():
+                ordered = sorted(runs)
+                sizes = sorted(self._bytes[kind])
+                n, total = self._counts[kind]
+                kinds[kind] = {
+                    "runs": n,
+                    "seconds_total": total,
+                    "window": len(ordered),
+                    **{f"p{int(q * 100)}": quantile(ordered, q) for q in QUANTILES},
+                    "markdown_bytes_p50": quantile(sizes, 0.5),
+                }
+            phases = {name: {"calls": c, "seconds": s}
+                      for name, (c, s) in sorted(self._phases.items(), key=lambda kv: -kv[1][1])}
+            last = self._last.as_dict() if self._last else None
+        sessions = self.sessions.summary() if self.sessions is not None else None
+        startup = self.startup.summary() if self.startup is not None else None
+        return {"runs": kinds, "phases": phases, "sessions": sessions, "startup": startup, "last": last}
+
+    def reset(self):
+        with self._lock:
+            self._runs.clear()
+            self._bytes.clear()
+            self._counts.clear()
+            self._phases.clear()
+            self._last = None
+
+    # ----------------------------
+    # Export
+    # ----------------------------
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2, sort_keys=True)
+
+    def to_prometheus(self) -> str:
+        s = self.summary()
+        lines = [
+            "# HELP gamekey_rerun_seconds Script run latency (last window) by run kind.",
+            "# TYPE gamekey_rerun_seconds summary",
+        ]
+        for kind, r in sorted(s["runs"].items()):
+            for q in QUANTILES:
+                lines.append(f'gamekey_rerun_seconds{{kind="{kind}",quantile="{q}"}} {r[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'gamekey_rerun_seconds_sum{{kind="{kind}"}} {r["seconds_total"]:.6f}')
+            lines.append(f'gamekey_rerun_seconds_count{{kind="{kind}"}} {r["runs"]}')
+        lines += ["# HELP gamekey_rerun_markdown_bytes Median st.markdown bytes per run by run kind.",
+                  "# TYPE gamekey_rerun_markdown_bytes gauge"]
+        for kind, r in sorted(s["runs"].items()):
+            lines.append(f'gamekey_rerun_markdown_bytes{{kind="{kind}"}} {r["markdown_bytes_p50"]}')
+        lines += ["# HELP gamekey_phase_seconds_total Inclusive time spent per phase.",
+                  "# TYPE gamekey_phase_seconds_total counter"]
+        for name, p in s["phases"].items():
+            lines.append(f'gamekey_phase_seconds_total{{phase="{name}"}} {p["seconds"]:.6f}')
+        lines += ["# HELP gamekey_phase_calls_total Calls per phase.",
+                  "# TYPE gamekey_phase_calls_total counter"]
+        for name, p in s["phases"].items():
+            lines.append(f'gamekey_phase_calls_total{{phase="{name}"}} {p["calls"]}')
+        sessions = s["sessions"]
+        if sessions:
+            lines += ["# HELP gamekey_session_state_bytes st.session_state size per session (approximate).",
+                      "# TYPE gamekey_session_state_bytes gauge"]
+            for stat in ("p50", "max", "total"):
+                lines.append(f'gamekey_session_state_bytes{{stat="{stat}"}} {sessions[f"bytes_{stat}"]}')
+            lines += ["# HELP gamekey_sessions Tracked sessions.", "# TYPE gamekey_sessions gauge",
+                      f'gamekey_sessions {sessions["count"]}',
+                      "# HELP gamekey_sessions_evicted_total Sessions shed by the idle policy.",
+                      "# TYPE gamekey_sessions_evicted_total counter",
+                      f'gamekey_sessions_evicted_total {sessions["evicted"]}']
+        startup = s["startup"]
+        if startup:
+            lines += ["# HELP gamekey_startup_seconds When each cold-start milestone was reached, since process start.",
+                      "# TYPE gamekey_startup_seconds gauge"]
+            for name, ms in startup["milestones_ms"].items():
+                lines.append(f'gamekey_startup_seconds{{milestone="{name}"}} {ms / 1000:.3f}')
+            lines += ["# HELP gamekey_startup_step_seconds Time taken by each startup step (imports, cache warming).",
+                      "# TYPE gamekey_startup_step_seconds gauge"]
+            for name, ms in startup["steps_ms"].items():
+                lines.append(f'gamekey_startup_step_seconds{{step="{name}"}} {ms / 1000:.3f}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        # JSON for *.json, Prometheus text otherwise; atomic so a scraper never sees half a file.
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
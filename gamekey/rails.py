@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# gamekey/rails.py
+# Home-screen rails (Trending / Rivalries); For You is per user, see gamekey/recommend.py.
+# They are the same for every user until the catalog version or the time bucket changes,
+# so app.py builds them once per (version, bucket) and shares the result across sessions.
+# Trending reads the precomputed "upcoming" clock window instead of scanning for start >= now.
+
+from datetime import datetime
+
+from gamekey.catalog import CatalogStore
+from gamekey.clock import TimeWindows
+from gamekey.search import SearchIndex
+from gamekey.sources import CatalogQuery
+from gamekey.table import GameTable
+
+RAIL_SIZE = 6
+SAMPLE_POOL = 200  # earliest games that random rails sample from
+RIVALRY_TAGS = ("Rivalry", "Classic rivalry")
+
+def sample_rail(store: CatalogStore, n: int, seed: int, now: datetime = None) -> GameTable:
+    pool = store.query(CatalogQuery(limit=SAMPLE_POOL), now=now)
+    return pool.sample(min(n, len(pool)), seed=seed)
+
+def build_home_rails(store: CatalogStore, index: SearchIndex, windows: TimeWindows, now: datetime) -> dict:
+    # `windows` is TimeWindows over index.starts for this bucket.
+    trending = store.lookup([index.game_ids[i] for i in windows.ranks("upcoming", limit=RAIL_SIZE)], now=now)
+    # Tag lookup in the inverted index, then materialize just those rows.
+    rivalries = store.lookup(index.tagged(RIVALRY_TAGS, limit=RAIL_SIZE), now=now)
+    if not len(rivalries):
+        rivalries = sample_rail(store, RAIL_SIZE, seed=1, now=now)
+    return {
+        "trending": trending,
+        "rivalries": rivalries,
+    }
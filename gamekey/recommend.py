@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# gamekey/recommend.py
+# "For You" recommendations: purchase-history affinity + tags + kickoff time.
+# - RecommendationModel is built once per (catalog version, time bucket) off the request path
+#   (app.py caches it and warms it at startup): the next POOL_SIZE upcoming games as weighted
+#   team / league / sport / tag feature vectors, + their item x item cosine similarity matrix
+# - A user's profile is the normalized sum of their recent purchases' features, as a sparse
+#   {feature: weight} that doesn't depend on any model; score = affinity + a "kicks off soon"
+#   bonus. Picks are greedy and diversity-penalized against the similarity matrix, so one
+#   fixture repeated across the catalog can't fill the rail
+# - Deterministic: no randomness, ties go to the earlier kickoff
+# - Recommender caches each profile per (catalog version, owned set + profile purchases) in a
+#   bounded LRU shared by every session, so it is built once until the user buys something or
+#   the catalog changes; users who own the same games share one entry. Only the time-dependent
+#   part (the bucket's pool + soon bonus, a few hundred dot products) runs after the lookup
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from gamekey.catalog import CatalogStore, records
+from gamekey.sources import CatalogQuery
+
+POOL_SIZE = 300         # earliest upcoming games a recommendation can pick from
+HISTORY_SIZE = 50       # most recent purchases that make up a profile
+FEATURE_WEIGHTS = {"team": 3.0, "league": 2.0, "sport": 1.0, "tag": 0.5}
+SOON_WEIGHT = 0.25      # bonus for a game kicking off now, halving every SOON_HALF_LIFE_HOURS
+SOON_HALF_LIFE_HOURS = 24.0
+DIVERSITY = 1.0         # penalty x similarity to the closest game already picked
+
+def game_features(game) -> dict:
+    # Weighted features of a Game record: (kind, value) -> weight.
+    features = {("sport", game.sport): FEATURE_WEIGHTS["sport"],
+                ("league", game.league): FEATURE_WEIGHTS["league"]}
+    for team in (game.home, game.away):
+        features[("team", team)] = FEATURE_WEIGHTS["team"]
+    for tag in game.tags:
+        features[("tag", tag)] = FEATURE_WEIGHTS["tag"]
+    return features
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+def _unit_features(features: dict) -> dict:
+    norm = sum(w * w for w in features.values()) ** 0.5
+    return {f: w / norm for f, w in features.items()} if norm else {}
+
+def profile(history) -> dict:
+    # Unit {feature: weight} for a purchase `history` (Game records): every purchase counts once,
+    # however many features it has.
+    total = {}
+    for game in history:
+        for feature, weight in _unit_features(game_features(game)).items():
+            total[feature] = total.get(feature, 0.0) + weight
+    return _unit_features(total)
+
+class RecommendationModel:
+    def __init__(self, games: list, now: datetime, version=None):
+        # `games`: candidate Game records in kickoff order from catalog `version`; `now`: the
+        # bucket they're judged at.
+        self.version = version
+        self.games = games
+        self.vocab = {}
+        rows = [game_features(g) for g in games]
+        for features in rows:
+            for feature in features:
+                self.vocab.setdefault(feature, len(self.vocab))
+        self.features = _unit(np.stack([self._vector(f) for f in rows]) if rows
+                              else np.zeros((0, len(self.vocab)), dtype=np.float32))
+        self.similarity = self.features @ self.features.T
+        hours = np.array([(g.start - now).total_seconds() / 3600 for g in games], dtype=np.float32)
+        self.soon = 0.5 ** (np.maximum(hours, 0) / SOON_HALF_LIFE_HOURS)
+
+    @classmethod
+    def from_store(cls, store: CatalogStore, now: datetime, version=None, pool_size: int = POOL_SIZE):
+        pool = store.query(CatalogQuery(start_from=now, limit=pool_size), now=now)
+        return cls(records(pool), now, version=version)
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def _vector(self, features: dict) -> np.ndarray:
+        # Features outside the candidates' vocabulary can't match anything, so they're dropped.
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        for feature, weight in features.items():
+            col = self.vocab.get(feature)
+            if col is not None:
+                vector[col] = weight
+        return vector
+
+    def rank(self, profile: dict, exclude=(), n: int = 6) -> list:
+        # Top `n` Game records for a `profile` (see profile()), skipping game_ids in `exclude`.
+        # Features outside this pool's vocabulary are dropped, then the rest is re-normalized.
+        scores = self.features @ _unit(self._vector(profile)) + SOON_WEIGHT * self.soon
+        available = np.array([g.game_id not in exclude for g in self.games], dtype=bool)
+        closest = np.zeros(len(self.games), dtype=np.float32)
+        picked = []
+        while len(picked) < n and available.any():
+            i = int(np.argmax(np.where(available, scores - DIVERSITY * closest, -np.inf)))
+            picked.append(self.games[i])
+            available[i] = False
+            closest = np.maximum(closest, self.similarity[i])
+        return picked
+
+# ----------------------------
+# Serving cache
+# ----------------------------
+class Recommender:
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def profile(self, version, signature, history) -> dict:
+        # `signature` identifies the owned set + the purchases in the profile
+        # (Entitlements.signature(HISTORY_SIZE)); `history()` returns those purchases as Game
+        # records of catalog `version` and is only called on a miss.
+        key = (version, signature)
+        with self._lock:
+            result = self._profiles.get(key)
+            if result is not None:
+                self._profiles.move_to_end(key)
+                self.hits += 1
+                return result
+        result = profile(history())
+        with self._lock:
+            self.misses += 1
+            self._profiles[key] = result
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+        return result
+
+    def top(self, model: RecommendationModel, signature, history, exclude=(), n: int = 6) -> list:
+        # The cached profile, ranked against this bucket's pool (soon bonus included).
+        return model.rank(self.profile(model.version, signature, history), exclude, n)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._profiles), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# gamekey/render.py
+# HTML rendering for cards, rails and page chrome.
+# - Templates are compiled once at import: indentation and whitespace between tags are
+#   stripped, and rendering is a single bound str.format call
+# - Values are HTML-escaped once, when a fragment is built; callers pass raw strings
+# - CardRenderer caches each card's fragment per (catalog version, game, kickoff text, price,
+#   owned, image URIs) in a bounded LRU shared by every session, so a warm card costs a few
+#   dict lookups; a catalog refresh or a rebuilt logo (new AssetCache URI) builds a new one
+# - Each card goes out as its own markdown block with its buttons right under it; the cart,
+#   which has no per-line widgets, goes out as one block for all its lines
+# - Page chrome (CSS + phone frame) is built once per process; per rerun only the topbar's
+#   wallet balance is dynamic
+
+import html
+import re
+import threading
+from collections import OrderedDict
+
+class Template:
+    def __init__(self, text: str):
+        self.text = re.sub(r">\s+<", "><", " ".join(line.strip() for line in text.strip().splitlines()))
+        self._format = self.text.format
+
+    def render(self, **values) -> str:
+        # Values must already be escaped (see escape()).
+        return self._format(**values)
+
+def escape(value) -> str:
+    # "$" too: st.markdown reads a pair of them in one block as LaTeX.
+    return html.escape(str(value), quote=True).replace("$", "&#36;")
+
+POSTER = Template("""
+    <div class="poster">
+      <div class="poster-art">
+        <img class="poster-bg" src="{art}" />
+        <div class="poster-badge">
+          <img class="logo" src="{logo}" srcset="{srcset}" width="22" height="22"/>
+          <span>{league}</span>
+        </div>
+        {badge}
+      </div>
+      <div class="poster-main">{title}</div>
+      <div class="poster-meta">{meta}</div>
+    </div>
+""")
+
+LIBRARY_CARD = Template("""
+    <div class="poster">
+      <div class="poster-art" style="height:110px;">
+        <img class="poster-bg" src="{art}" />
+        <div class="poster-badge">
+          <img class="logo" src="{logo}" srcset="{srcset}" width="22" height="22"/>
+          <span>{league}</span>
+        </div>
+      </div>
+      <div class="poster-main">{title}</div>
+      <div class="poster-meta">{meta}</div>
+    </div>
+""")
+
+OWNED_BADGE = '<div class="poster-chip owned">Owned</div>'
+PRICE_BADGE = Template('<div class="poster-chip">{price}</div>')
+
+CART_LINE = Template('<div class="cart-line"><span>{title}<br><span class="subtle">{meta}</span></span>'
+                     '<span>{price}</span></div>')
+
+RAIL = Template('<div class="rail{cls}">{title}{cards}</div>')
+ROW_TITLE = Template("<div class='rowtitle'>{title}</div>")
+
+TOPBAR = Template("""
+    <div class="topbar">
+      <div>
+        <div class="brand">GameKey</div>
+        <div class="subtle">Watch one game. Pay once.</div>
+      </div>
+      <div class="wallet">
+        <div class="subtle">Wallet</div>
+        <div>{balance}</div>
+      </div>
+    </div>
+""")
+
+HERO = Template("""
+    <div class="hero">
+      <div class="hero-title">Tonight is<br>for big games.</div>
+      <div class="hero-sub">Instant, low-cost access - no subscription needed.</div>
+      <div>
+        <span class="pill">Trending</span>
+        <span class="pill">Rivalries</span>
+        <span class="pill">For You</span>
+      </div>
+    </div>
+""").render()
+
+PHONE_FRAME = "<div class='phone'><div class='notch'></div><div class='phone-inner'></div></div>"
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # Spaces around these never matter; before ":" they can (descendant + pseudo-class), so keep those.
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def chrome(css: str) -> str:
+    # The block every run starts with: the inline (minified) `css` + the frame.
+    return f"<style>{css}</style>" + PHONE_FRAME
+
+def topbar(balance: float) -> str:
+    return TOPBAR.render(balance=escape(f"${balance:,.2f}"))
+
+# ----------------------------
+# Card fragments
+# ----------------------------
+class CardRenderer:
+    # `images(sport, league)` -> (art uri, logo uri, logo srcset); called on every lookup (it is
+    # AssetCache's own dict lookup), so the URIs are part of each fragment's key.
+    def __init__(self, images, max_entries: int = 4096):
+        self.images = images
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key, build) -> str:
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return fragment
+        fragment = build()
+        with self._lock:
+            self.misses += 1
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def poster(self, game, price: float, owned: bool, version: int) -> str:
+        # `game`: a Game row of catalog `version`; the chip shows `price` (deals move it) or Owned.
+        art, logo, srcset = self.images(game.sport, game.league)
+
+        def build():
+            return POSTER.render(art=escape(art), logo=escape(logo), srcset=escape(srcset),
+                                 league=escape(game.league),
+                                 badge=OWNED_BADGE if owned else PRICE_BADGE.render(price=escape(f"${price:,.2f}")),
+                                 title=escape(f"{game.away} @ {game.home}"),
+                                 meta=escape(f"{game.start_str} - {game.platform}"))
+        return self._cached(("poster", version, game.game_id, game.start_str, round(price * 100), owned,
+                             art, logo, srcset), build)
+
+    def library_card(self, entry) -> str:
+        # `entry`: a ledger LibraryEntry (the details are what was bought, not today's catalog row).
+        art, logo, srcset = self.images("sport", entry.league)
+
+        def build():
+            return LIBRARY_CARD.render(art=escape(art), logo=escape(logo), srcset=escape(srcset),
+                                       league=escape(entry.league), title=escape(entry.title),
+                                       meta=escape(f"{entry.start} - {entry.platform} - {entry.tier} - "
+                                                   f"Paid ${entry.price_paid:,.2f}"))
+        # Everything shown comes from the user's own purchase (+ the image URIs), so all of it is in the key.
+        return self._cached(("library", entry.game_id, entry.title, entry.league, entry.platform, entry.start,
+                             entry.tier, round(entry.price_paid * 100), art, logo, srcset), build)
+
+    @staticmethod
+    def cart(lines: list, total: float) -> str:
+        # `lines`: priced ledger CartItems; one block for the whole cart.
+        rows = "".join(CART_LINE.render(title=escape(line.title), meta=escape(f"{line.start} - {line.tier}"),
+                                        price=escape(f"${line.price:,.2f}")) for line in lines)
+        return RAIL.render(cls=" rail-1", title=ROW_TITLE.render(title=escape(f"Cart ({len(lines)})")),
+                           cards=rows + CART_LINE.render(title="<b>Total</b>", meta="",
+                                                         price=f"<b>{escape(f'${total:,.2f}')}</b>"))
+
+    @staticmethod
+    def row_title(title: str) -> str:
+        return ROW_TITLE.render(title=escape(title))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._fragments), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# gamekey/search.py
+# Prebuilt search index for the Explore tab, built once per catalog version.
+# - Row ids are kickoff ranks, so posting lists are kept sorted by kickoff and a query
+#   can stop as soon as it has `limit` hits
+# - Text: normalized tokens over teams / league / platform / tags, prefix matching via a
+#   sorted token table, optional trigram fuzzy fallback for typos
+# - Sport / league / max-price filters are intersections against prebuilt postings; the
+#   price cap can use a PriceBook's effective prices instead of base_price (see pricing.py)
+# - Exact tag -> games inverted index for tag rails (Rivalries)
+
+import bisect
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from gamekey.table import epoch_seconds, split_tags
+
+TEXT_FIELDS = ("home", "away", "league", "platform", "tags")
+FACET_FIELDS = ("sport", "league", "market")
+FUZZY_MIN_SIMILARITY = 0.5
+
+_SPLIT = re.compile(r"[^0-9a-z]+")
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+def tokenize(text: str) -> list:
+    return [t for t in _SPLIT.split(normalize(text)) if t]
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    def __init__(self, rows, anchor=None):
+        # rows: iterable of dicts/records with game_id, start, base_price + TEXT_FIELDS/FACET_FIELDS.
+        # anchor: the time bucket relative kickoffs were resolved against when scanning.
+        rows = sorted(rows, key=lambda r: r["start"])
+        self.anchor = anchor
+        self.game_ids = [r["game_id"] for r in rows]
+        self.prices = array("d", (float(r["base_price"]) for r in rows))
+        # Per-rank columns the pricing engine needs (kickoffs as epoch seconds).
+        self.starts = array("q", (epoch_seconds(r["start"]) for r in rows))
+        self.leagues = [r["league"] for r in rows]
+        self.markets = [r["market"] for r in rows]
+        self._rank_of = None
+
+        postings = {}
+        token_cache = {}  # team / league / platform strings repeat across thousands of fixtures
+        for rank, r in enumerate(rows):
+            seen = set()
+            for field in TEXT_FIELDS:
+                value = r[field]
+                for part in (value if isinstance(value, (list, tuple)) else [value]):
+                    tokens = token_cache.get(part)
+                    if tokens is None:
+                        tokens = token_cache[part] = tokenize(part)
+                    seen.update(tokens)
+            for token in seen:
+                postings.setdefault(token, array("I")).append(rank)
+        self._tokens = sorted(postings)
+        self._postings = [postings[t] for t in self._tokens]
+
+        self._facets = {}
+        tags = {}
+        for rank, r in enumerate(rows):
+            for field in FACET_FIELDS:
+                self._facets.setdefault((field, r[field]), array("I")).append(rank)
+            raw_tags = r["tags"]
+            for tag in (raw_tags if isinstance(raw_tags, (list, tuple)) else split_tags(raw_tags)):
+                tags.setdefault(tag, array("I")).append(rank)
+        # Exact tag -> ranks; the tag vocabulary is tiny next to the catalog.
+        self._tags = tags
+
+        self._by_price = array("I", sorted(range(len(rows)), key=lambda i: self.prices[i]))
+        self._sorted_prices = array("d", (self.prices[i] for i in self._by_price))
+
+        self._trigrams = {}
+        for i, token in enumerate(self._tokens):
+            for tri in trigrams(token):
+                self._trigrams.setdefault(tri, []).append(i)
+
+        # Keystroke sequences repeat the same terms; memoize term -> sorted ranks.
+        self._term_cache = OrderedDict()
+        self._sets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def rank_of(self) -> dict:
+        # game_id -> rank, built on first use.
+        if self._rank_of is None:
+            with self._lock:
+                if self._rank_of is None:
+                    self._rank_of = {game_id: i for i, game_id in enumerate(self.game_ids)}
+        return self._rank_of
+
+    @classmethod
+    def from_chunks(cls, chunks, anchor=None) -> "SearchIndex":
+        cols = tuple(dict.fromkeys(("game_id", "start", "base_price") + TEXT_FIELDS + FACET_FIELDS))
+        rows = []
+        for chunk in chunks:
+            # GameTable chunks: whole columns at once; kickoffs are already epoch seconds.
+            columns = [chunk.column(c) for c in cols]
+            rows.extend(dict(zip(cols, values)) for values in zip(*columns))
+        return cls(rows, anchor=anchor)
+
+    # ----------------------------
+    # Term lookup
+    # ----------------------------
+    def _prefix_range(self, prefix: str):
+        lo = bisect.bisect_left(self._tokens, prefix)
+        hi = bisect.bisect_left(self._tokens, prefix + "\uffff")
+        return range(lo, hi)
+
+    def _fuzzy_tokens(self, term: str):
+        grams = trigrams(term)
+        counts = {}
+        for tri in grams:
+            for i in self._trigrams.get(tri, ()):
+                counts[i] = counts.get(i, 0) + 1
+        hits = []
+        for i, shared in counts.items():
+            union = len(grams) + len(trigrams(self._tokens[i])) - shared
+            if shared / union >= FUZZY_MIN_SIMILARITY:
+                hits.append(i)
+        return hits
+
+    def _term_ranks(self, term: str, fuzzy: bool) -> array:
+        key = (term, fuzzy)
+        with self._lock:
+            cached = self._term_cache.get(key)
+            if cached is not None:
+                self._term_cache.move_to_end(key)
+                return cached
+        token_ids = list(self._prefix_range(term))
+        if not token_ids and fuzzy and len(term) >= 3:
+            token_ids = self._fuzzy_tokens(term)
+        if len(token_ids) == 1:
+            ranks = self._postings[token_ids[0]]
+        else:
+            merged = set()
+            for i in token_ids:
+                merged.update(self._postings[i])
+            ranks = array("I", sorted(merged))
+        with self._lock:
+            self._term_cache[key] = ranks
+            while len(self._term_cache) > 1024:
+                self._term_cache.popitem(last=False)
+        return ranks
+
+    def _as_set(self, key, ranks) -> frozenset:
+        # Membership side of an intersection; cached for the long facet / term postings.
+        with self._lock:
+            cached = self._sets.get(key)
+            if cached is not None:
+                self._sets.move_to_end(key)
+                return cached
+        cached = frozenset(ranks)
+        with self._lock:
+            self._sets[key] = cached
+            while len(self._sets) > 256:
+                self._sets.popitem(last=False)
+        return cached
+
+    def tagged(self, substrings, limit: int = None) -> list:
+        # game_ids (kickoff order) having any tag that contains any of `substrings`.
+        key = ("tags", tuple(substrings))
+        with self._lock:
+            ranks = self._term_cache.get(key)
+        if ranks is None:
+            merged = set()
+            for tag, postings in self._tags.items():
+                if any(s in tag for s in substrings):
+                    merged.update(postings)
+            ranks = array("I", sorted(merged))
+            with self._lock:
+                self._term_cache[key] = ranks
+        ranks = ranks[:limit] if limit else ranks
+        return [self.game_ids[i] for i in ranks]
+
+    # ----------------------------
+    # Query
+    # ----------------------------
+    def search(self, text: str = "", sport: str = None, league: str = None, market: str = None,
+               max_price: float = None, fuzzy: bool = True, limit: int = None, prices=None) -> list:
+        # Returns game_ids in kickoff order. With `prices` (a PriceBook for this index), max_price
+        # caps effective prices instead of base_price.
+        constraints = []  # (candidate count, key, sorted ranks or None for the price cap)
+        for term in dict.fromkeys(tokenize(text)):
+            ranks = self._term_ranks(term, fuzzy)
+            constraints.append((len(ranks), ("term", term, fuzzy), ranks))
+        for field, value in (("sport", sport), ("league", league), ("market", market)):
+            if value is not None:
+                ranks = self._facets.get((field, value), array("I"))
+                constraints.append((len(ranks), ("facet", field, value), ranks))
+        if max_price is not None and prices is not None:
+            ranks = prices.ranks_under(max_price)
+            if len(ranks) < len(self):
+                constraints.append((len(ranks), ("price", prices.key, max_price), ranks))
+        elif max_price is not None:
+            cut = bisect.bisect_right(self._sorted_prices, max_price)
+            if cut < len(self):
+                constraints.append((cut, ("price", max_price), None))
+
+        if not constraints:
+            return self.game_ids[:limit] if limit else list(self.game_ids)
+
+        # Drive from the smallest candidate set (already in kickoff order), probe the rest.
+        constraints.sort(key=lambda c: c[0])
+        count, key, driver = constraints[0]
+        if driver is None:
+            driver = sorted(self._by_price[:count])
+        checks = []
+        for _, key, ranks in constraints[1:]:
+            if ranks is None:
+                checks.append(lambda i, cap=key[1]: self.prices[i] <= cap)
+            else:
+                checks.append(self._as_set(key, ranks).__contains__)
+
+        out = []
+        for i in driver:
+            if all(check(i) for check in checks):
+                out.append(self.game_ids[i])
+                if limit and len(out) >= limit:
+                    break
+        return out
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# gamekey/session.py
+# Compact per-session state + accounting.
+# - GameRefs: process-wide game_id -> small int table + a shared string table, so a title or
+#   kickoff text repeated across thousands of sessions is stored once
+# - Sessions keep only ints and numbers: Entitlements holds typed arrays of refs / string codes /
+#   cents / epoch seconds, Playback is (ref, title, league, started_at), Cart is ref -> (tier, surface code, deal %);
+#   strings are looked up when a page renders
+# - SessionRegistry: approximate st.session_state bytes per session + totals, and the idle
+#   policy: sessions without a run for `idle_seconds` are handed to an evict callback
+#   (app.py sheds their state down to the user id), so memory stays flat under churn. If the
+#   callback fails (it needs streamlit runtime internals), shedding is switched off with one
+#   logged warning and sessions simply keep their state
+
+import logging
+import threading
+import time
+import uuid
+from typing import NamedTuple
+
+from gamekey.profiler import quantile
+
+class GameRefs:
+    # Append-only; refs and codes are never reused, so any held by a session stay valid.
+    # Only identity lives here. What a user bought (title, kickoff text, ...) can differ between
+    # users, so sessions keep their own codes into the shared string table instead.
+    def __init__(self):
+        self._ids = {}       # game_id -> ref
+        self._game_ids = []  # ref -> game_id
+        self._codes = {}     # display string -> code
+        self._strings = []   # code -> display string
+        self._tiers = {}     # tier name -> small int
+        self._tier_names = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._game_ids)
+
+    @staticmethod
+    def _intern(value, codes: dict, values: list, lock) -> int:
+        # Lock-free read; a miss appends the value first and only then publishes its code, so a
+        # code another thread reads without the lock always has its value in place.
+        code = codes.get(value)
+        if code is None:
+            with lock:
+                code = codes.get(value)
+                if code is None:
+                    values.append(value)
+                    code = codes[value] = len(values) - 1
+        return code
+
+    def ref(self, game_id: str) -> int:
+        return self._intern(game_id, self._ids, self._game_ids, self._lock)
+
+    def get(self, game_id: str):
+        return self._ids.get(game_id)
+
+    def game_id(self, ref: int) -> str:
+        return self._game_ids[ref]
+
+    def code(self, value: str) -> int:
+        # Display strings (titles, leagues, kickoff text) repeat across sessions: stored once.
+        return self._intern(value, self._codes, self._strings, self._lock)
+
+    def string(self, code: int) -> str:
+        return self._strings[code]
+
+    def tier(self, name: str) -> int:
+        return self._intern(name, self._tiers, self._tier_names, self._lock)
+
+    def tier_name(self, code: int) -> str:
+        return self._tier_names[code]
+
+GAME_REFS = GameRefs()
+
+log = logging.getLogger(__name__)
+
+class Playback(NamedTuple):
+    # Now Playing: game ref, title / league codes (GAME_REFS.string), when it started.
+    ref: int
+    title: int
+    league: int
+    started_at: float
+
+# ----------------------------
+# Accounting + idle eviction
+# ----------------------------
+class SessionRecord:
+    __slots__ = ("user_id", "nbytes", "seen")
+
+    def __init__(self, user_id: str, nbytes: int, seen: float):
+        self.user_id = user_id
+        self.nbytes = nbytes
+        self.seen = seen
+
+class SessionRegistry:
+    def __init__(self, idle_seconds: float = 1800.0, sweep_interval: float = 60.0, clock=time.monotonic):
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.evicted = 0
+        self.shed_error = None  # repr of the first failed shed; shedding stops after it
+        self._sessions = {}   # session id -> SessionRecord
+        self._swept = clock()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def touch(self, session_id: str, user_id: str = None, nbytes: int = None):
+        # A run started (full or fragment); `nbytes` (st.session_state size) is passed at the end
+        # of full runs only.
+        now = self.clock()
+        with self._lock:
+            rec = self._sessions.get(session_id)
+            if rec is None:
+                self._sessions[session_id] = SessionRecord(user_id, nbytes or 0, now)
+                return
+            rec.seen = now
+            if user_id is not None:
+                rec.user_id = user_id
+            if nbytes is not None:
+                rec.nbytes = nbytes
+
+    def active(self, session_id: str, now: float = None) -> bool:
+        # Had a run within idle_seconds (a forgotten session that ran again is tracked anew).
+        now = self.clock() if now is None else now
+        with self._lock:
+            rec = self._sessions.get(session_id)
+            return rec is not None and now - rec.seen < self.idle_seconds
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def idle(self, now: float = None) -> list:
+        now = self.clock() if now is None else now
+        with self._lock:
+            return [sid for sid, rec in self._sessions.items() if now - rec.seen >= self.idle_seconds]
+
+    def evict(self, shed, now: float = None) -> int:
+        # At most once per sweep_interval: shed(session_id) every idle session and forget it.
+        now = self.clock() if now is None else now
+        with self._lock:
+            if self.shed_error is not None or now - self._swept < self.sweep_interval:
+                return 0
+            self._swept = now
+        evicted = 0
+        for sid in self.idle(now):
+            try:
+                shed(sid)
+            except Exception as exc:
+                self.shed_error = repr(exc)
+                log.warning("Idle session shedding is off: %s", self.shed_error, exc_info=True)
+                break
+            self.forget(sid)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def summary(self) -> dict:
+        with self._lock:
+            sizes = sorted(rec.nbytes for rec in self._sessions.values())
+        return {"count": len(sizes), "bytes_total": sum(sizes), "bytes_p50": quantile(sizes, 0.5),
+                "bytes_max": sizes[-1] if sizes else 0, "evicted": self.evicted, "idle_seconds": self.idle_seconds,
+                "shed_error": self.shed_error}
+
+    def report(self, limit: int = 20) -> list:
+        # Largest sessions first: session id, user, bytes, seconds since the last run.
+        now = self.clock()
+        with self._lock:
+            rows = [{"session_id": sid, "user_id": rec.user_id, "bytes": rec.nbytes, "idle_seconds": now - rec.seen}
+                    for sid, rec in self._sessions.items()]
+        return sorted(rows, key=lambda r: -r["bytes"])[:limit]
+
+# ----------------------------
+# Cart
+# ----------------------------
+class Cart:
+    # Games picked for one batch checkout: ref -> (tier code, surface code, deal %), in the order
+    # they were added. A line keeps the surface + deal it was added from, so checkout charges the
+    # price its card showed. `token` changes with every edit: one checkout attempt per cart state.
+    __slots__ = ("_lines", "token")
+    games = GAME_REFS  # shared, not per session
+
+    def __init__(self):
+        self._lines = {}
+        self.token = uuid.uuid4().hex
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __contains__(self, game_id: str) -> bool:
+        ref = self.games.get(game_id)
+        return ref is not None and ref in self._lines
+
+    def _changed(self):
+        self.token = uuid.uuid4().hex
+
+    def add(self, game_id: str, tier: str, surface: str = "selected", deal_pct: int = 0) -> bool:
+        # False if it was already in the cart (the line is updated).
+        ref = self.games.ref(game_id)
+        line = (self.games.tier(tier), self.games.code(surface), int(deal_pct))
+        added = ref not in self._lines
+        if self._lines.get(ref) != line:
+            self._lines[ref] = line
+            self._changed()
+        return added
+
+    def remove(self, game_id: str):
+        ref = self.games.get(game_id)
+        if ref is not None and self._lines.pop(ref, None) is not None:
+            self._changed()
+
+    def clear(self):
+        if self._lines:
+            self._lines.clear()
+            self._changed()
+
+    def lines(self) -> list:
+        # [(game_id, tier name, surface, deal %)] in the order they were added.
+        return [(self.games.game_id(ref), self.games.tier_name(tier), self.games.string(surface), deal_pct)
+                for ref, (tier, surface, deal_pct) in self._lines.items()]
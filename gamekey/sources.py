@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+# gamekey/sources.py
+# Pluggable catalog sources for large schedules.
+# - Every backend streams the catalog in GameTable chunks (gamekey/table.py) and applies
+#   CatalogQuery filters as close to the data as it can (SQL WHERE for SQLite, dataset filters
+#   for Parquet, GameTable.filter per chunk for CSV and the in-memory demo)
+# - Only the rows a rail / the Explore tab asks for are ever materialized
+# File backends store `start` as an absolute "YYYY-MM-DD HH:MM:SS" timestamp and `tags` as "a|b|c".
+
+import csv
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+from gamekey.table import CATALOG_COLUMNS, SEARCH_COLUMNS, TAG_SEP, GameTable, split_tags  # noqa: F401
+
+START_SQL_FMT = "%Y-%m-%d %H:%M:%S"
+IN_CHUNK = 900  # game_ids per IN (...) query, under SQLite's host-parameter limit on older builds
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    # Hashable, so the store can cache results per query.
+    league: str = None
+    sport: str = None
+    market: str = None
+    start_from: datetime = None  # inclusive lower bound on kickoff
+    start_to: datetime = None    # exclusive upper bound on kickoff
+    max_price: float = None
+    text: str = None             # case-insensitive substring over SEARCH_COLUMNS
+    tags_any: tuple = None       # substrings; a game matches if any tag contains any of them
+    game_ids: tuple = None
+    limit: int = None            # earliest-kickoff first
+
+# ----------------------------
+# Backends
+# ----------------------------
+class CatalogSource:
+    # scan() yields filtered GameTable chunks with absolute kickoffs.
+    # `anchor` resolves relative kickoffs (start_offset) for sources that have them.
+    chunk_size = 50_000
+    relative_starts = False  # True if kickoffs move with `anchor` (start_offset catalogs)
+
+    def stamp(self):
+        # Changes whenever the underlying data does; the store bumps its version on change.
+        # None = unknown: the store keeps its version until bump().
+        return None
+
+    def scan(self, q: CatalogQuery, anchor: datetime):
+        raise NotImplementedError
+
+    def facets(self, anchor: datetime) -> dict:
+        values = {"sport": set(), "league": set(), "market": set()}
+        for chunk in self.scan(CatalogQuery(), anchor):
+            for col, seen in values.items():
+                seen.update(chunk.column(col))
+        return {col: sorted(seen) for col, seen in values.items()}
+
+class TableSource(CatalogSource):
+    # In-memory catalog (the demo). loader() returns a GameTable, possibly with relative kickoffs.
+    def __init__(self, loader):
+        self._loader = loader
+        self._table = None
+
+    def reload(self):
+        self._table = None
+
+    def _load(self) -> GameTable:
+        if self._table is None:
+            self._table = self._loader()
+        return self._table
+
+    @property
+    def relative_starts(self) -> bool:
+        return self._load().relative
+
+    def scan(self, q: CatalogQuery, anchor: datetime):
+        # One chunk: the filter is already vectorized over the whole table.
+        table = self._load().resolve(anchor).filter(q)
+        if len(table):
+            yield table
+
+class CsvSource(CatalogSource):
+    # Header row with the CATALOG_COLUMNS (any order).
+    def __init__(self, path: str, chunk_size: int = 50_000):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def scan(self, q: CatalogQuery, anchor: datetime):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            at = [header.index(c) for c in CATALOG_COLUMNS]
+            start_at = CATALOG_COLUMNS.index("start")
+            rows = []
+            for record in reader:
+                row = [record[i] for i in at]
+                row[start_at] = datetime.fromisoformat(row[start_at])
+                rows.append(row)
+                if len(rows) >= self.chunk_size:
+                    yield from self._chunk(rows, q)
+                    rows = []
+            yield from self._chunk(rows, q)
+
+    @staticmethod
+    def _chunk(rows: list, q: CatalogQuery):
+        chunk = GameTable.from_rows(rows).filter(q)
+        if len(chunk):
+            yield chunk
+
+class ParquetSource(CatalogSource):
+    # Filters become a pyarrow dataset expression, so row groups are pruned by their statistics.
+    def __init__(self, path: str, chunk_size: int = 50_000):
+        try:
+            import pyarrow.dataset  # noqa: F401  (ships with streamlit)
+        except ImportError as e:
+            raise ImportError("ParquetSource needs pyarrow: pip install pyarrow") from e
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _expression(self, q: CatalogQuery):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        terms = []
+        for col in ("league", "sport", "market"):
+            if getattr(q, col):
+                terms.append(ds.field(col) == getattr(q, col))
+        if q.start_from is not None:
+            terms.append(ds.field("start") >= pa.scalar(q.start_from, pa.timestamp("us")))
+        if q.start_to is not None:
+            terms.append(ds.field("start") < pa.scalar(q.start_to, pa.timestamp("us")))
+        if q.max_price is not None:
+            terms.append(ds.field("base_price") <= q.max_price)
+        if q.game_ids is not None:
+            terms.append(ds.field("game_id").isin(list(q.game_ids)))
+        if q.text and q.text.strip():
+            hit = None
+            for col in SEARCH_COLUMNS:
+                term = pc.match_substring(ds.field(col), pattern=q.text, ignore_case=True)
+                hit = term if hit is None else hit | term
+            terms.append(hit)
+        if q.tags_any:
+            hit = None
+            for s in q.tags_any:
+                term = pc.match_substring(ds.field("tags"), pattern=s)
+                hit = term if hit is None else hit | term
+            terms.append(hit)
+        expr = None
+        for term in terms:
+            expr = term if expr is None else expr & term
+        return expr
+
+    def scan(self, q: CatalogQuery, anchor: datetime):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.path, format="parquet")
+        for batch in dataset.to_batches(filter=self._expression(q), columns=list(CATALOG_COLUMNS),
+                                        batch_size=self.chunk_size):
+            if batch.num_rows:
+                columns = batch.to_pydict()
+                yield GameTable.from_rows(zip(*(columns[c] for c in CATALOG_COLUMNS)))
+
+class SqliteSource(CatalogSource):
+    # Expects a `games` table with the CATALOG_COLUMNS; see write_sqlite() for the schema.
+    def __init__(self, path: str, table: str = "games", chunk_size: int = 50_000):
+        self.path = path
+        self.table = table
+        self.chunk_size = chunk_size
+
+    def stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _sql(self, q: CatalogQuery):
+        where, params = [], []
+        for col in ("league", "sport", "market"):
+            if getattr(q, col):
+                where.append(f"{col} = ?")
+                params.append(getattr(q, col))
+        if q.start_from is not None:
+            where.append("start >= ?")
+            params.append(q.start_from.strftime(START_SQL_FMT))
+        if q.start_to is not None:
+            where.append("start < ?")
+            params.append(q.start_to.strftime(START_SQL_FMT))
+        if q.max_price is not None:
+            where.append("base_price <= ?")
+            params.append(float(q.max_price))
+        if q.game_ids is not None:
+            where.append(f"game_id IN ({','.join('?' * len(q.game_ids))})")
+            params.extend(q.game_ids)
+        if q.text and q.text.strip():
+            like = "%" + q.text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(" + " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in SEARCH_COLUMNS) + ")")
+            params.extend([like] * len(SEARCH_COLUMNS))
+        if q.tags_any:
+            # instr() is case-sensitive like GameTable.filter; a substring without "|" can't span tags.
+            where.append("(" + " OR ".join("instr(tags, ?) > 0" for _ in q.tags_any) + ")")
+            params.extend(q.tags_any)
+        # Kickoffs come back as epoch seconds (SQLite reads the text as UTC, like epoch_seconds()).
+        select = ["CAST(strftime('%s', start) AS INTEGER)" if c == "start" else c for c in CATALOG_COLUMNS]
+        sql = f"SELECT {', '.join(select)} FROM {self.table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY start"
+        if q.limit:
+            sql += f" LIMIT {int(q.limit)}"
+        return sql, params
+
+    def scan(self, q: CatalogQuery, anchor: datetime):
+        # A long game_ids list runs as one query per IN_CHUNK ids (SQLite's host-parameter limit);
+        # each is kickoff-ordered + limited, and materialize() merges them like any other chunks.
+        ids = q.game_ids
+        parts = [q] if ids is None or len(ids) <= IN_CHUNK else [
+            replace(q, game_ids=ids[i:i + IN_CHUNK]) for i in range(0, len(ids), IN_CHUNK)]
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            for part in parts:
+                cursor = conn.execute(*self._sql(part))
+                while True:
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    yield GameTable.from_rows(rows)
+        finally:
+            conn.close()
+
+    def facets(self, anchor: datetime) -> dict:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            return {col: [r[0] for r in conn.execute(f"SELECT DISTINCT {col} FROM {self.table} ORDER BY {col}")]
+                    for col in ("sport", "league", "market")}
+        finally:
+            conn.close()
+
+def write_sqlite(chunks, path: str, table: str = "games"):
+    # Loads GameTable chunks (absolute kickoffs) into an indexed games table.
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (game_id TEXT PRIMARY KEY, sport TEXT, league TEXT, home TEXT, "
+            "away TEXT, start TEXT, platform TEXT, market TEXT, base_price REAL, tags TEXT, about TEXT)"
+        )
+        start_at = CATALOG_COLUMNS.index("start")
+        for chunk in chunks:
+            rows = (row[:start_at] + (time.strftime(START_SQL_FMT, time.gmtime(row[start_at])),) + row[start_at + 1:]
+                    for row in chunk.rows())
+            conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({','.join('?' * len(CATALOG_COLUMNS))})", rows)
+        for col in ("start", "league", "sport", "market"):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table} ({col})")
+        conn.commit()
+    finally:
+        conn.close()
+
+def open_source(spec: str, loader=None) -> CatalogSource:
+    # "demo" (uses loader), "csv:path", "parquet:path" or "sqlite:path".
+    kind, _, path = (spec or "demo").partition(":")
+    if kind == "demo":
+        return TableSource(loader)
+    if kind == "csv":
+        return CsvSource(path)
+    if kind == "parquet":
+        return ParquetSource(path)
+    if kind == "sqlite":
+        return SqliteSource(path)
+    raise ValueError(f"Unknown catalog source {spec!r}; expected demo, csv:, parquet: or sqlite:")
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# gamekey/startup.py
+# Cold-start bookkeeping + background cache warming.
+# - StartupReport: milestones (first script run, first paint, first card, caches warm) in
+#   seconds since the process started, + how long each startup step took (deferred imports,
+#   each warmed cache); kept once per process in STARTUP
+# - Warmer: runs named warm-up tasks once per process on a daemon thread. A task that fails
+#   is recorded and skipped; the session that needs the value builds it (and raises) itself
+# The process start comes from /proc (Linux); elsewhere it is when this module was imported.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+WARM_THREAD = "gamekey-warm"
+
+def process_started() -> float:
+    # Epoch seconds: boot time + the process's start time in clock ticks since boot.
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+class StartupReport:
+    def __init__(self, started: float = None):
+        self.started = process_started() if started is None else started
+        self.milestones = {}  # name -> seconds since process start (first time only)
+        self.steps = {}       # name -> seconds (first time only)
+        self._lock = threading.Lock()
+
+    def mark(self, name: str) -> bool:
+        # True the first time `name` is reached in this process.
+        if name in self.milestones:
+            return False
+        with self._lock:
+            if name in self.milestones:
+                return False
+            self.milestones[name] = time.time() - self.started
+            return True
+
+    @contextmanager
+    def step(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            if name not in self.steps:
+                with self._lock:
+                    self.steps.setdefault(name, time.perf_counter() - t)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "milestones_ms": {name: round(s * 1000, 1)
+                                  for name, s in sorted(self.milestones.items(), key=lambda kv: kv[1])},
+                "steps_ms": {name: round(s * 1000, 1) for name, s in self.steps.items()},
+            }
+
+STARTUP = StartupReport()
+
+class Warmer:
+    def __init__(self, report: StartupReport = STARTUP):
+        self.report = report
+        self.errors = {}  # task name -> repr of the exception
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return "warm" in self.report.milestones
+
+    def start(self, tasks, background: bool = True) -> bool:
+        # `tasks`: [(name, fn)], run in order. False if warming already started in this process.
+        with self._lock:
+            if self._started:
+                return False
+            self._started = True
+        if background:
+            threading.Thread(target=self._run, args=(list(tasks),), name=WARM_THREAD, daemon=True).start()
+        else:
+            self._run(tasks)
+        return True
+
+    def _run(self, tasks):
+        for name, fn in tasks:
+            try:
+                with self.report.step(f"warm.{name}"):
+                    fn()
+            except Exception as exc:  # the foreground path retries and reports it properly
+                self.errors[name] = repr(exc)
+        self.report.mark("warm")
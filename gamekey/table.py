@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# gamekey/table.py
+# Columnar game table: the catalog core, without pandas.
+# - One typed column per field (the `array` module): kickoffs as int64 epoch seconds, prices
+#   as doubles, every text field (tags joined with "|") as a uint32 code into the table's
+#   interned string list, so a team / league / platform repeated across fixtures is stored once
+# - Filters (CatalogQuery) are numpy masks over zero-copy views of the columns; string
+#   predicates run once per distinct string, not once per row
+# - Stable kickoff sort, take / head, seeded sample and concat return new tables whose string
+#   list holds only the strings their rows use; a table is never mutated once built
+# - Game records are built only for the rows a card or sheet actually shows
+
+import calendar
+from array import array
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import numpy as np
+
+CATALOG_COLUMNS = ("game_id", "sport", "league", "home", "away", "start", "platform", "market",
+                   "base_price", "tags", "about")
+TEXT_COLUMNS = tuple(c for c in CATALOG_COLUMNS if c not in ("start", "base_price"))
+SEARCH_COLUMNS = ("home", "away", "league", "platform")
+TAG_SEP = "|"
+START_FMT = "%a, %b %d - %I:%M %p"
+EPOCH = datetime(1970, 1, 1)
+
+def split_tags(value) -> list:
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if not isinstance(value, str) or not value:
+        return []
+    return value.split(TAG_SEP)
+
+def epoch_seconds(value) -> int:
+    # Naive kickoff -> seconds, treating it as UTC (same convention as numpy datetime64).
+    if isinstance(value, int):
+        return value
+    return calendar.timegm(value.timetuple())
+
+def from_epoch(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=seconds)
+
+# ----------------------------
+# Lightweight row record (what cards, checkout and the Selected panel read)
+# ----------------------------
+class Game(NamedTuple):
+    game_id: str
+    sport: str
+    league: str
+    home: str
+    away: str
+    start: datetime
+    platform: str
+    market: str
+    base_price: float
+    tags: list
+    about: str
+    start_str: str
+
+class Interner:
+    def __init__(self):
+        self.strings = []
+        self._codes = {}
+
+    def __call__(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+# ----------------------------
+# Table
+# ----------------------------
+class GameTable:
+    __slots__ = ("strings", "codes", "starts", "prices", "relative", "_lookup")
+
+    def __init__(self, strings: list, codes: dict, starts: array, prices: array, relative: bool = False):
+        # `codes`: column -> array("I") into `strings`. `relative`: starts are offsets from an anchor.
+        self.strings = strings
+        self.codes = codes
+        self.starts = starts
+        self.prices = prices
+        self.relative = relative
+        self._lookup = None
+
+    @classmethod
+    def from_rows(cls, rows, relative: bool = False) -> "GameTable":
+        # `rows`: tuples in CATALOG_COLUMNS order; start as epoch seconds (or a naive datetime),
+        # tags as a list or "a|b" string.
+        intern = Interner()
+        codes = {c: array("I") for c in TEXT_COLUMNS}
+        text = [(i, codes[c].append) for i, c in enumerate(CATALOG_COLUMNS) if c in codes]
+        tags_at, start_at, price_at = (CATALOG_COLUMNS.index(c) for c in ("tags", "start", "base_price"))
+        starts, prices = array("q"), array("d")
+        for row in rows:
+            for i, append in text:
+                value = row[i]
+                if i == tags_at and not isinstance(value, str):
+                    value = TAG_SEP.join(value or ())
+                append(intern("" if value is None else value))
+            starts.append(epoch_seconds(row[start_at]))
+            prices.append(float(row[price_at]))
+        return cls(intern.strings, codes, starts, prices, relative)
+
+    @classmethod
+    def empty(cls) -> "GameTable":
+        return cls.from_rows(())
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def column(self, name: str) -> list:
+        # Plain Python values: strings (tags still "a|b" joined), epoch seconds, prices.
+        if name == "start":
+            return self.starts.tolist()
+        if name == "base_price":
+            return self.prices.tolist()
+        strings = self.strings
+        return [strings[c] for c in self.codes[name]]
+
+    def _view(self, name: str) -> np.ndarray:
+        if name == "start":
+            return np.frombuffer(self.starts, dtype=np.int64) if len(self) else np.zeros(0, np.int64)
+        if name == "base_price":
+            return np.frombuffer(self.prices, dtype=np.float64) if len(self) else np.zeros(0, np.float64)
+        codes = self.codes[name]
+        return np.frombuffer(codes, dtype=np.uint32) if len(codes) else np.zeros(0, np.uint32)
+
+    def _strings_where(self, predicate) -> np.ndarray:
+        # Boolean lookup over the string list; index it with a code column to get a row mask.
+        return np.fromiter((predicate(s) for s in self.strings), dtype=bool, count=len(self.strings))
+
+    def _code_of(self, value: str):
+        if self._lookup is None:
+            self._lookup = {s: i for i, s in enumerate(self.strings)}
+        return self._lookup.get(value)
+
+    # ----------------------------
+    # Query operations
+    # ----------------------------
+    def filter(self, q) -> "GameTable":
+        # `q`: a CatalogQuery (gamekey/sources.py); same semantics on every backend.
+        mask = np.ones(len(self), dtype=bool)
+        for col in ("league", "sport", "market"):
+            value = getattr(q, col)
+            if value:
+                code = self._code_of(value)
+                mask &= False if code is None else self._view(col) == code
+        starts = self._view("start")
+        if q.start_from is not None:
+            mask &= starts >= epoch_seconds(q.start_from)
+        if q.start_to is not None:
+            mask &= starts < epoch_seconds(q.start_to)
+        if q.max_price is not None:
+            mask &= self._view("base_price") <= q.max_price
+        if q.game_ids is not None:
+            wanted = set(q.game_ids)
+            mask &= self._strings_where(wanted.__contains__)[self._view("game_id")]
+        if q.text and q.text.strip():
+            needle = q.text.lower()
+            hit = self._strings_where(lambda s: needle in s.lower())
+            mask &= np.logical_or.reduce([hit[self._view(col)] for col in SEARCH_COLUMNS])
+        if q.tags_any:
+            hit = self._strings_where(lambda s: any(sub in tag for tag in split_tags(s) for sub in q.tags_any))
+            mask &= hit[self._view("tags")]
+        return self if mask.all() else self.take(np.flatnonzero(mask))
+
+    def take(self, rows) -> "GameTable":
+        # New table with `rows` (positions, in that order) and only the strings they use.
+        rows = np.asarray(rows, dtype=np.intp)
+        intern = Interner()
+        remap = np.full(len(self.strings), -1, dtype=np.int64)
+        codes = {}
+        for col in TEXT_COLUMNS:
+            picked = self._view(col)[rows]
+            for old in np.unique(picked).tolist():
+                if remap[old] < 0:
+                    remap[old] = intern(self.strings[old])
+            codes[col] = array("I", remap[picked].astype(np.uint32).tobytes())
+        return GameTable(intern.strings, codes, array("q", self._view("start")[rows].tobytes()),
+                         array("d", self._view("base_price")[rows].tobytes()), self.relative)
+
+    def sort(self) -> "GameTable":
+        # Earliest kickoff first; ties keep their current order.
+        order = np.argsort(self._view("start"), kind="stable")
+        return self if (order == np.arange(len(order))).all() else self.take(order)
+
+    def head(self, n: int) -> "GameTable":
+        return self if n >= len(self) else self.take(np.arange(n))
+
+    def sample(self, n: int, seed: int) -> "GameTable":
+        # Same draw as pandas' DataFrame.sample(n, random_state=seed).
+        return self.take(np.random.RandomState(seed).choice(len(self), size=n, replace=False))
+
+    def resolve(self, anchor: datetime) -> "GameTable":
+        # Relative kickoffs -> absolute, against `anchor` (the time bucket).
+        if not self.relative:
+            return self
+        starts = array("q", (self._view("start") + epoch_seconds(anchor)).tobytes())
+        return GameTable(self.strings, self.codes, starts, self.prices)
+
+    @staticmethod
+    def concat(tables) -> "GameTable":
+        tables = [t for t in tables if len(t)]
+        if len(tables) == 1:
+            return tables[0]
+        if not tables:
+            return GameTable.empty()
+        intern = Interner()
+        codes = {col: array("I") for col in TEXT_COLUMNS}
+        starts, prices = array("q"), array("d")
+        for t in tables:
+            remap = np.fromiter((intern(s) for s in t.strings), dtype=np.uint32, count=len(t.strings))
+            for col in TEXT_COLUMNS:
+                codes[col].frombytes(remap[t._view(col)].tobytes())
+            starts.extend(t.starts)
+            prices.extend(t.prices)
+        return GameTable(intern.strings, codes, starts, prices, tables[0].relative)
+
+    # ----------------------------
+    # Rows out
+    # ----------------------------
+    def rows(self):
+        # Tuples in CATALOG_COLUMNS order: start as epoch seconds, tags "a|b" joined.
+        strings = self.strings
+        cols = [self.starts if c == "start" else self.prices if c == "base_price" else self.codes[c]
+                for c in CATALOG_COLUMNS]
+        text = [c in self.codes for c in CATALOG_COLUMNS]
+        for values in zip(*cols):
+            yield tuple(strings[v] if is_text else v for v, is_text in zip(values, text))
+
+    def records(self) -> list:
+        out = []
+        for (game_id, sport, league, home, away, start, platform, market, price, tags, about) in self.rows():
+            start = from_epoch(start)
+            out.append(Game(game_id, sport, league, home, away, start, platform, market, price,
+                            split_tags(tags), about, start.strftime(START_FMT)))
+        return out
@@ -0,0 +1,40 @@
+# tests/conftest.py
+# Shared fixtures: a small fixed catalog + a scratch ledger. Nothing here imports streamlit.
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from gamekey.ledger import Ledger  # noqa: E402
+from gamekey.table import CATALOG_COLUMNS  # noqa: E402
+
+NOW = datetime(2026, 1, 10, 19, 0)
+
+def game_row(game_id, league="NBA", sport="Basketball", home="Knicks", away="Celtics", hours=1.0,
+             price=2.0, tags=("Rivalry",), platform="ESPN", market="US"):
+    values = dict(game_id=game_id, sport=sport, league=league, home=home, away=away,
+                  start=NOW + timedelta(hours=hours), platform=platform, market=market,
+                  base_price=price, tags=list(tags), about="")
+    return tuple(values[c] for c in CATALOG_COLUMNS)
+
+@pytest.fixture
+def catalog_rows():
+    # Out of kickoff order on purpose; G4 ties with G1.
+    return [
+        game_row("G1", hours=3, price=1.99),
+        game_row("G2", league="NFL", sport="American Football", home="Eagles", away="Cowboys", hours=1,
+                 price=3.99, tags=("Sunday", "Must watch")),
+        game_row("G3", league="MLB", sport="Baseball", home="Yankees", away="Red Sox", hours=-2,
+                 price=3.49, tags=("Classic rivalry",)),
+        game_row("G4", league="NBA", home="Lakers", away="Warriors", hours=3, price=2.49, tags=()),
+    ]
+
+@pytest.fixture
+def ledger(tmp_path):
+    store = Ledger(str(tmp_path / "ledger.db"), starting_balance=10.0, clock=lambda: 1_000.0)
+    yield store
+    store.close()
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from gamekey import assets
+from gamekey.assets import AssetCache
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path))
+    return tmp_path
+
+def test_publish_static_keeps_filenames_safe(static_dir):
+    url = assets.publish_static("logo-../../etc/x y", PNG, "png")
+    name = url.rsplit("/", 1)[1]
+    assert name.startswith("logo-______etc_x_y.") and os.listdir(static_dir) == [name]
+
+def test_publish_static_refuses_types_streamlit_serves_as_text(static_dir):
+    for ext in ("svg", "css"):
+        with pytest.raises(ValueError):
+            assets.publish_static("app", b"x", ext)
+
+def test_static_mode_publishes_raster_art_and_keeps_svg_inline(static_dir, monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, "LOGO_DIR", str(tmp_path / "logos"))
+    cache = AssetCache(mode="static", manifest_path=str(tmp_path / "missing.json"))
+    art = cache.art_uri("Soccer")
+    assert art.startswith(assets.STATIC_URL + "/art-soccer.") and art.endswith(".webp")
+    assert cache.art_uri("Curling", "X/League").rsplit("/", 1)[1].startswith("art-x_league.")
+    assert cache.logo_uri("X/League").startswith("data:image/svg+xml;base64,")  # generated badge
+    assert sorted(name.rsplit(".", 1)[1] for name in os.listdir(static_dir)) == ["webp", "webp"]
+
+def test_lru_keeps_bytes_within_budget():
+    cache = AssetCache(max_bytes=100)
+    for key, size in (("a", 40), ("b", 40), ("c", 30)):  # "c" pushes out the oldest, "a"
+        cache._store(key, None, key, size, now=0)
+    assert list(cache._entries) == ["b", "c"] and cache.bytes == 70 and cache.evictions == 1
+    cache._store("b", None, "b2", 50, now=0)  # replaced in place, not counted twice
+    cache._store("big", None, "big", 101, now=0)  # larger than the budget: returned, not kept
+    assert list(cache._entries) == ["c", "b"] and cache.bytes == 80 == sum(e.size for e in cache._entries.values())
+    assert cache._lookup("c", now=0).value == "c" and list(cache._entries) == ["b", "c"]  # touched "c" is now newest
+    assert cache.stats()["bytes"] == 80
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+from gamekey import catalog
+from gamekey.catalog import CatalogStore
+from gamekey.clock import FixedClock
+from gamekey.sources import TableSource
+from gamekey.table import GameTable
+
+from conftest import NOW
+
+class StampedSource(TableSource):
+    def __init__(self, rows, stamp):
+        super().__init__(lambda: GameTable.from_rows(rows))
+        self.value = stamp
+        self.reloads = 0
+
+    def stamp(self):
+        return self.value
+
+    def reload(self):
+        super().reload()
+        self.reloads += 1
+
+@pytest.fixture
+def monotonic(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(catalog, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+def store_for(source):
+    return CatalogStore(source, ttl=10, clock=FixedClock(NOW))
+
+def test_stamp_change_is_seen_once_the_ttl_passes(catalog_rows, monotonic):
+    source = StampedSource(catalog_rows, stamp=1)
+    store = store_for(source)
+    first = store.query()
+    source.value = 2
+    monotonic.now = 5
+    assert store.current_version() == 1 and store.query() is first  # within the TTL: not checked
+    monotonic.now = 10
+    assert store.current_version() == 2 and source.reloads == 1
+    assert store.query() is not first
+    monotonic.now = 20
+    assert store.current_version() == 2  # same stamp: no change
+
+def test_none_stamp_keeps_the_version_until_bump(catalog_rows, monotonic):
+    source = StampedSource(catalog_rows, stamp=None)
+    store = store_for(source)
+    for now in (10, 20, 30):
+        monotonic.now = now
+        assert store.current_version() == 1
+    assert source.reloads == 0
+    store.bump()
+    assert store.current_version() == 2 and source.reloads == 1
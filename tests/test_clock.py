@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from conftest import NOW
+from gamekey.clock import Clock, FixedClock, TimeWindows
+
+def test_bucket_floors_to_the_bucket_size():
+    clock = FixedClock(NOW + timedelta(minutes=7, seconds=59), bucket_seconds=300)
+    assert clock.bucket() == NOW + timedelta(minutes=5)
+    assert Clock(60).bucket(NOW + timedelta(seconds=59)) == NOW
+
+def test_fixed_clock_moves_only_when_told():
+    clock = FixedClock(NOW)
+    assert clock.now() == NOW and clock.bucket() == NOW
+    clock.advance(timedelta(seconds=61))
+    assert clock.bucket() == NOW + timedelta(minutes=1)
+    clock.set(NOW - timedelta(days=1))
+    assert clock.now() == NOW - timedelta(days=1) and clock.time() == (NOW - timedelta(days=1)).timestamp()
+
+def test_time_windows_at_the_bucket():
+    offsets = [-2, 0, 0.5, 24, 25]  # hours from now, in kickoff order
+    windows = TimeWindows([NOW + timedelta(hours=h) for h in offsets], NOW)
+    assert len(windows) == 5
+    assert windows.ranks("started") == [0, 1]  # kickoff == now counts as started
+    assert windows.ranks("within_24h") == [0, 1, 2, 3]
+    assert windows.ranks("upcoming") == [2, 3, 4] and windows.ranks("upcoming", limit=2) == [2, 3]
+    assert windows.mask("upcoming").tolist() == [False, False, True, True, True]
+    assert windows.states(0) == ("started", "within_24h") and windows.states(4) == ("upcoming",)
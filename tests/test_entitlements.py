@@ -0,0 +1,47 @@
+from gamekey.entitlements import Entitlements
+from gamekey.render import CardRenderer
+
+def buy(ledger, user, game_id, start, price=2.0):
+    return ledger.purchase(user, game_id, price, title="Galatasaray @ Manchester City", league="UCL",
+                           platform="Paramount+", start=start, tier="Standard")
+
+def test_each_user_keeps_their_own_purchase_details(ledger):
+    buy(ledger, "alice", "GK-7001", "Sun, Oct 18 - 03:00 PM")
+    buy(ledger, "bob", "GK-7001", "Mon, Oct 19 - 09:00 PM", price=3.0)
+    alice, bob = Entitlements("alice"), Entitlements("bob")
+    alice.refresh(ledger)
+    bob.refresh(ledger)
+    assert alice.page(0, 10)[0].start == "Sun, Oct 18 - 03:00 PM"
+    assert bob.page(0, 10)[0].start == "Mon, Oct 19 - 09:00 PM"
+    assert bob.page(0, 10)[0].price_paid == 3.0
+
+def test_grant_writes_through_with_the_purchase_details(ledger):
+    ent = Entitlements("alice")
+    ent.refresh(ledger)
+    result = buy(ledger, "alice", "GK-7002", "Tue, Oct 20 - 07:00 PM")
+    ent.grant(result.entry, result.version)
+    assert "GK-7002" in ent and ent.version == result.version
+    assert ent.page(0, 10) == [result.entry]
+
+def test_library_cards_are_cached_per_purchase_details(ledger):
+    buy(ledger, "alice", "GK-7001", "Sun, Oct 18 - 03:00 PM")
+    buy(ledger, "bob", "GK-7001", "Mon, Oct 19 - 09:00 PM")
+    renderer = CardRenderer(lambda sport, league: ("art.png", "logo.png", "logo.png 1x"))
+    cards = []
+    for user in ("alice", "bob"):
+        ent = Entitlements(user)
+        ent.refresh(ledger)
+        cards.append(renderer.library_card(ent.page(0, 10)[0]))
+    assert "Sun, Oct 18" in cards[0] and "Mon, Oct 19" in cards[1]
+
+def test_signature_is_the_owned_set_itself(ledger):
+    for user, games in (("alice", ("G1", "G2")), ("bob", ("G2", "G1")), ("carol", ("G1", "G3"))):
+        for game_id in games:
+            buy(ledger, user, game_id, "Sun, Oct 18 - 03:00 PM", price=0)
+    alice, bob, carol = (Entitlements(user) for user in ("alice", "bob", "carol"))
+    for ent in (alice, bob, carol):
+        ent.refresh(ledger)
+    assert alice.signature() == bob.signature() != carol.signature()
+    # Past `recent` purchases, which ones are recent is part of the key.
+    assert alice.signature(recent=1) != bob.signature(recent=1)
+    assert alice.signature(recent=2) == bob.signature(recent=2)
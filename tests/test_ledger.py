@@ -0,0 +1,62 @@
+import threading
+
+from gamekey.ledger import CartItem
+
+def test_purchase_debits_and_grants(ledger):
+    result = ledger.purchase("u", "G1", 2.5, title="Celtics @ Knicks", tier="Standard")
+    assert (result.status, result.balance, result.version) == ("ok", 7.5, 1)
+    assert result.entry.game_id == "G1" and result.entry.price_paid == 2.5
+    assert ledger.owns("u", "G1")
+    assert ledger.library("u") == (1, [result.entry])
+
+def test_purchase_refusals_change_nothing(ledger):
+    assert ledger.purchase("u", "G1", 20).status == "insufficient"
+    ledger.purchase("u", "G1", 1)
+    assert ledger.purchase("u", "G1", 1).status == "owned"
+    assert (ledger.balance("u"), ledger.version("u")) == (9.0, 1)
+
+def test_idempotency_key_charges_once(ledger):
+    assert ledger.purchase("u", "G1", 1, key="k").status == "ok"
+    assert ledger.purchase("u", "G2", 1, key="k").status == "duplicate"
+    assert ledger.balance("u") == 9.0 and not ledger.owns("u", "G2")
+
+def test_refused_key_can_be_retried(ledger):
+    assert ledger.purchase("u", "G1", 20, key="k").status == "insufficient"
+    ledger.credit("u", 20)
+    assert ledger.purchase("u", "G1", 20, key="k").status == "ok"
+
+def test_purchase_many_is_one_commit(ledger):
+    items = [CartItem("G1", 2), CartItem("G2", 3), CartItem("G1", 9)]  # repeated game: first line wins
+    result = ledger.purchase_many("u", items, key="cart")
+    assert result.status == "ok" and result.version == 1
+    assert [e.game_id for e in result.entries] == ["G1", "G2"]
+    assert result.balance == 5.0
+    assert ledger.purchase_many("u", items, key="cart").status == "duplicate"
+
+def test_purchase_many_is_all_or_nothing(ledger):
+    result = ledger.purchase_many("u", [CartItem("G1", 6), CartItem("G2", 6)])
+    assert result.status == "insufficient" and result.entries == ()
+    assert ledger.library("u") == (0, []) and ledger.balance("u") == 10.0
+
+def test_purchase_many_skips_owned_games(ledger):
+    ledger.purchase("u", "G1", 1)
+    result = ledger.purchase_many("u", [CartItem("G1", 1), CartItem("G2", 1)])
+    assert result.status == "ok" and result.skipped == ("G1",)
+    assert [e.game_id for e in result.entries] == ["G2"] and result.balance == 8.0
+    assert ledger.purchase_many("u", [CartItem("G1", 1)]).status == "owned"
+
+def test_purchase_many_checks_ownership_past_one_chunk(ledger):
+    ledger.purchase("u", "G2500", 0)
+    result = ledger.purchase_many("u", [CartItem(f"G{i}", 0) for i in range(3000)])
+    assert result.status == "ok" and result.skipped == ("G2500",) and len(result.entries) == 2999
+
+def test_concurrent_purchases_never_overdraw(ledger):
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(ledger.purchase("u", f"G{i}", 3)))
+               for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(r.status for r in results).count("ok") == 3
+    assert ledger.balance("u") == 1.0
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from gamekey.clock import TimeWindows
+from gamekey.pricing import DealRule, PricingEngine
+
+from conftest import NOW
+
+def windows(*hours):
+    return TimeWindows([NOW + timedelta(hours=h) for h in hours], NOW)
+
+def cents(engine, prices, surface, deal_pct=0, hours=None, leagues=None, markets=None):
+    n = len(prices)
+    out, pcts = engine.price_cents(prices, windows(*(hours or [48] * n)), leagues or ["NBA"] * n,
+                                   markets or ["US"] * n, surface, deal_pct)
+    return out.tolist(), pcts.tolist()
+
+def test_no_deal_is_list_price():
+    assert cents(PricingEngine(), [2.99, 1.0], "home") == ([299, 100], [0, 0])
+
+def test_surface_and_caller_deals():
+    engine = PricingEngine()
+    assert cents(engine, [2.99], "trending") == ([239], [20])      # 239.2 -> 239
+    assert cents(engine, [2.99], "explore", deal_pct=25) == ([224], [25])  # 224.25 -> 224
+    assert cents(engine, [2.99], "explore") == ([299], [0])
+
+def test_window_rule_only_hits_games_in_the_window():
+    assert cents(PricingEngine(), [2.0, 2.0], "selected", hours=[2, 48]) == ([160, 200], [20, 0])
+
+def test_best_rule_wins_without_stacking():
+    engine = PricingEngine(rules=(DealRule("a", "home", pct=10), DealRule("b", "home", pct=30, league="NFL")))
+    assert cents(engine, [1.0, 1.0], "home", leagues=["NBA", "NFL"]) == ([90, 70], [10, 30])
+
+def test_market_multiplier_and_half_up_rounding():
+    engine = PricingEngine(market_bp={"US": 10_000, "UK": 12_500})
+    assert cents(engine, [1.0, 0.05], "home", markets=["UK", "UK"]) == ([125, 6], [0, 0])  # 6.25 -> 6
+    assert cents(engine, [0.02], "home", markets=["UK"]) == ([3], [0])  # 2.5 -> 3 (half up)
+
+def test_tier_prices():
+    assert PricingEngine().tier_prices(1.99) == {"Standard": 1.99, "Plus (24h replay)": 2.99,
+                                                 "Party (watch link)": 3.99}
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+from conftest import NOW
+from gamekey.recommend import RecommendationModel, Recommender
+
+def game(game_id, league, home, away, hours, sport="Basketball"):
+    return SimpleNamespace(game_id=game_id, sport=sport, league=league, home=home, away=away, tags=(),
+                           start=NOW + timedelta(hours=hours))
+
+POOL = [game("G1", "NBA", "Knicks", "Celtics", 1), game("G2", "NFL", "Eagles", "Cowboys", 2, "American Football"),
+        game("G3", "NBA", "Lakers", "Warriors", 30)]
+BOUGHT = [game("B1", "NBA", "Knicks", "Nets", -48)]
+
+def test_profile_is_cached_across_buckets_until_purchases_change():
+    recommender, calls = Recommender(), []
+
+    def history():
+        calls.append(1)
+        return BOUGHT
+
+    for hours in (0, 1, 2):  # the model rolls over every bucket
+        model = RecommendationModel(POOL, NOW + timedelta(hours=hours), version=1)
+        assert recommender.top(model, "owned-a", history, n=1)[0].game_id == "G1"
+    assert len(calls) == 1 and recommender.stats()["hits"] == 2
+    recommender.top(model, "owned-b", history, n=1)  # bought something
+    recommender.top(RecommendationModel(POOL, NOW, version=2), "owned-b", history, n=1)  # catalog refresh
+    assert len(calls) == 3
+
+def test_picks_follow_the_bucket_after_the_lookup():
+    # Same cached profile; a later bucket's pool (upcoming games only) and soon bonus decide.
+    recommender = Recommender()
+    early = recommender.top(RecommendationModel(POOL, NOW, version=1), "owned", lambda: BOUGHT, n=1)
+    later = NOW + timedelta(hours=29)
+    late = recommender.top(RecommendationModel([g for g in POOL if g.start > later], later, version=1),
+                           "owned", lambda: BOUGHT, n=1)
+    assert early[0].game_id == "G1" and late[0].game_id == "G3"
+    assert recommender.stats() == {"entries": 1, "hits": 1, "misses": 1}
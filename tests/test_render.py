@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+
+from gamekey.render import CardRenderer
+
+GAME = SimpleNamespace(game_id="G1", sport="Basketball", league="NBA", home="Knicks", away="Celtics",
+                       start_str="Sat, Jan 10 - 08:00 PM", platform="ESPN")
+
+def test_poster_fragment_follows_catalog_version_and_logo_uri():
+    logos = {"NBA": "app/static/gk/logo-NBA.aaa.png"}
+    renderer = CardRenderer(lambda sport, league: ("art.png", logos[league], ""))
+    first = renderer.poster(GAME, 2.0, False, version=1)
+    assert renderer.poster(GAME, 2.0, False, version=1) is first
+    renderer.poster(GAME, 2.0, False, version=2)
+    assert renderer.stats()["misses"] == 2
+    logos["NBA"] = "app/static/gk/logo-NBA.bbb.png"  # AssetCache saw a rebuilt logo
+    assert "logo-NBA.bbb.png" in renderer.poster(GAME, 2.0, False, version=2)
@@ -0,0 +1,44 @@
+import pytest
+
+from gamekey.clock import TimeWindows
+from gamekey.pricing import PriceBook, PricingEngine
+from gamekey.search import SearchIndex
+from gamekey.table import GameTable
+
+from conftest import NOW, game_row
+
+@pytest.fixture
+def index(catalog_rows):
+    rows = catalog_rows + [game_row("G5", league="NHL", sport="Hockey", home="Rangers", away="Bruins", hours=5,
+                                    price=4.99, tags=())]
+    return SearchIndex.from_chunks([GameTable.from_rows(rows)], anchor=NOW)
+
+def test_results_are_in_kickoff_order(index):
+    assert index.search() == ["G3", "G2", "G1", "G4", "G5"]
+    assert index.search(limit=2) == ["G3", "G2"]
+
+def test_prefix_and_accent_insensitive(index):
+    assert index.search("kni") == ["G1"]
+    assert index.search("KNÍCKS celt") == ["G1"]
+    assert index.search("knicks yankees") == []
+
+def test_fuzzy_fallback_only_without_prefix_hits(index):
+    assert index.search("yankes") == ["G3"]
+    assert index.search("yankes", fuzzy=False) == []
+
+def test_facets_and_base_price_cap(index):
+    assert index.search(league="NBA") == ["G1", "G4"]
+    assert index.search(sport="Basketball", max_price=2.0) == ["G1"]
+    assert index.search(max_price=3.5) == ["G3", "G1", "G4"]
+    assert index.search(max_price=0.5) == []
+
+def test_price_cap_uses_effective_prices(index):
+    # Explore deal of 50%: G2 (3.99) and G5 (4.99) drop under 2.50.
+    book = PriceBook(index, PricingEngine(), TimeWindows(index.starts, NOW), "explore", 50)
+    assert index.search(max_price=2.5, prices=book) == ["G3", "G2", "G1", "G4", "G5"]
+    assert index.search(max_price=2.5) == ["G1", "G4"]
+    assert book.quote("G2") == (2.0, 50) and book.quote("nope") is None
+
+def test_tagged(index):
+    assert index.tagged(("Rivalry", "Classic rivalry")) == ["G3", "G1"]
+    assert index.tagged(("Rivalry",), limit=1) == ["G1"]
@@ -0,0 +1,87 @@
+import threading
+
+from gamekey.session import Cart, GameRefs, SessionRegistry
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def registry(clock):
+    return SessionRegistry(idle_seconds=100, sweep_interval=10, clock=clock)
+
+def test_idle_sessions_are_shed_and_forgotten():
+    clock = Clock()
+    reg = registry(clock)
+    reg.touch("a", "alice", 1000)
+    reg.touch("b", "bob", 2000)
+    clock.now = 150
+    reg.touch("b")
+    shed = []
+    assert reg.evict(shed.append) == 1
+    assert shed == ["a"] and len(reg) == 1 and reg.summary()["bytes_total"] == 2000
+
+def test_failed_shed_turns_shedding_off():
+    clock = Clock()
+    reg = registry(clock)
+    reg.touch("a")
+    clock.now = 150
+
+    def broken(session_id):
+        raise AttributeError("_session_mgr")
+
+    assert reg.evict(broken) == 0
+    assert "_session_mgr" in reg.summary()["shed_error"]
+    assert len(reg) == 1  # still accounted for: its state was not shed
+    clock.now = 300
+    assert reg.evict(lambda sid: None) == 0
+
+def test_a_run_starting_marks_the_session_active():
+    clock = Clock()
+    reg = registry(clock)
+    reg.touch("a", "alice", 1000)
+    clock.now = 150
+    assert not reg.active("a")
+    reg.touch("a")  # start of a full or fragment run: no size yet
+    assert reg.active("a") and reg.summary()["bytes_total"] == 1000
+    assert reg.evict(lambda sid: None) == 0
+
+def test_cart_keeps_insertion_order_and_latest_tier():
+    cart = Cart()
+    assert cart.add("GK-1", "Standard") and cart.add("GK-2", "Standard")
+    assert not cart.add("GK-1", "Plus (24h replay)")
+    assert cart.lines() == [("GK-1", "Plus (24h replay)", "selected", 0), ("GK-2", "Standard", "selected", 0)]
+    cart.remove("GK-1")
+    assert "GK-1" not in cart and len(cart) == 1
+
+def test_cart_line_keeps_its_price_book_and_token_tracks_edits():
+    cart = Cart()
+    token = cart.token
+    cart.add("GK-1", "Standard", "explore", 30)
+    assert cart.lines() == [("GK-1", "Standard", "explore", 30)]
+    assert cart.token != token
+    token = cart.token
+    cart.add("GK-1", "Standard", "explore", 30)  # no change: same attempt
+    cart.remove("GK-9")
+    assert cart.token == token
+    cart.clear()
+    assert cart.token != token and not len(cart)
+
+def test_intern_publishes_a_code_only_after_its_value():
+    values = []
+
+    class Codes(dict):
+        # What a lock-free reader could see the moment a code appears.
+        def __setitem__(self, value, code):
+            assert values[code] == value
+            super().__setitem__(value, code)
+
+        def setdefault(self, value, code):
+            self[value] = code  # publishing before the append is what this guards against
+            return code
+
+    codes, lock = Codes(), threading.Lock()
+    assert [GameRefs._intern(v, codes, values, lock) for v in ("a", "b", "a")] == [0, 1, 0]
+    assert values == ["a", "b"]
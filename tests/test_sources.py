@@ -0,0 +1,15 @@
+from gamekey.catalog import materialize
+from gamekey.sources import IN_CHUNK, CatalogQuery, SqliteSource, write_sqlite
+from gamekey.table import GameTable
+
+from conftest import NOW, game_row
+
+def test_sqlite_lookup_past_one_in_chunk(tmp_path):
+    n = IN_CHUNK * 2 + 5
+    path = str(tmp_path / "catalog.db")
+    write_sqlite([GameTable.from_rows([game_row(f"G{i}", hours=-i) for i in range(n)])], path)
+    ids = tuple(f"G{i}" for i in range(n)) + ("missing",)
+    found = materialize(SqliteSource(path).scan(CatalogQuery(game_ids=ids), NOW))
+    assert len(found) == n and found.column("game_id")[:2] == [f"G{n - 1}", f"G{n - 2}"]
+    earliest = materialize(SqliteSource(path).scan(CatalogQuery(game_ids=ids, limit=3), NOW), 3)
+    assert earliest.column("game_id") == [f"G{n - 1}", f"G{n - 2}", f"G{n - 3}"]
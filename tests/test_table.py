@@ -0,0 +1,53 @@
+from gamekey.sources import CatalogQuery
+from gamekey.table import CATALOG_COLUMNS, GameTable
+
+from conftest import NOW
+
+def ids(table):
+    return table.column("game_id")
+
+def test_from_rows_round_trips_records(catalog_rows):
+    table = GameTable.from_rows(catalog_rows)
+    assert len(table) == 4
+    first = table.records()[0]
+    assert (first.game_id, first.league, first.tags, first.base_price) == ("G1", "NBA", ["Rivalry"], 1.99)
+    assert first.start == catalog_rows[0][CATALOG_COLUMNS.index("start")]
+
+def test_sort_is_stable_by_kickoff(catalog_rows):
+    assert ids(GameTable.from_rows(catalog_rows).sort()) == ["G3", "G2", "G1", "G4"]
+
+def test_head(catalog_rows):
+    table = GameTable.from_rows(catalog_rows).sort()
+    assert ids(table.head(2)) == ["G3", "G2"]
+    assert table.head(10) is table
+
+def test_take_keeps_only_used_strings(catalog_rows):
+    table = GameTable.from_rows(catalog_rows).take([1])
+    assert ids(table) == ["G2"]
+    assert "Knicks" not in table.strings
+    assert table.records()[0].home == "Eagles"
+
+def test_concat_remaps_string_codes(catalog_rows):
+    a = GameTable.from_rows(catalog_rows[:2])
+    b = GameTable.from_rows(catalog_rows[2:])
+    both = GameTable.concat([a, GameTable.empty(), b])
+    assert ids(both) == ["G1", "G2", "G3", "G4"]
+    assert both.column("home") == [r[3] for r in catalog_rows]
+    assert GameTable.concat([a]) is a
+    assert len(GameTable.concat([])) == 0
+
+def test_filter(catalog_rows):
+    table = GameTable.from_rows(catalog_rows)
+    assert ids(table.filter(CatalogQuery(league="NBA"))) == ["G1", "G4"]
+    assert ids(table.filter(CatalogQuery(league="NHL"))) == []
+    assert ids(table.filter(CatalogQuery(start_from=NOW))) == ["G1", "G2", "G4"]
+    assert ids(table.filter(CatalogQuery(max_price=2.5))) == ["G1", "G4"]
+    assert ids(table.filter(CatalogQuery(text="yank"))) == ["G3"]
+    assert ids(table.filter(CatalogQuery(tags_any=("rivalry", "Rivalry")))) == ["G1", "G3"]
+    assert ids(table.filter(CatalogQuery(game_ids=("G4", "G2")))) == ["G2", "G4"]
+    assert table.filter(CatalogQuery()) is table
+
+def test_sample_is_seeded(catalog_rows):
+    table = GameTable.from_rows(catalog_rows)
+    assert ids(table.sample(2, seed=7)) == ids(table.sample(2, seed=7))
+    assert len(set(ids(table.sample(4, seed=1)))) == 4